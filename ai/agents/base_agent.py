@@ -1,7 +1,8 @@
-from langchain import hub
 from langchain.agents import create_react_agent, AgentExecutor
 from langchain_core.tools import BaseTool
 from typing import List
+from ai.logs import agent_callbacks
+from ai.prompts import REACT_PROMPT
 
 class BaseSubAgent:
     def __init__(self, llm):
@@ -16,9 +17,12 @@ class BaseSubAgent:
         pass
 
     def create_agent(self):
-        prompt = hub.pull("hwchase17/react")
-        self.agent = create_react_agent(self.llm, self.tools, prompt)
-        self.agent_executor = AgentExecutor(agent=self.agent, tools=self.tools, verbose=True)
+        self.agent = create_react_agent(self.llm, self.tools, REACT_PROMPT)
+        self.agent_executor = AgentExecutor(agent=self.agent, tools=self.tools, callbacks=agent_callbacks())
 
     def run(self, input_text: str) -> str:
-        return self.agent_executor.invoke({"input": input_text})["output"] 
\ No newline at end of file
+        return self.agent_executor.invoke({"input": input_text})["output"]
+
+    async def arun(self, input_text: str) -> str:
+        result = await self.agent_executor.ainvoke({"input": input_text})
+        return result["output"] 
\ No newline at end of file
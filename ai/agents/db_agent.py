@@ -1,38 +1,52 @@
 from langchain_experimental.tools import PythonREPLTool
 from ai.agents.base_agent import BaseSubAgent
+from ai.agents.sql_tools import AsyncQuerySQLDatabaseTool, CachedSQLDatabase, arun_sql, run_sql, strip_sql_markdown
+from ai.agents.sql_planner import Statement, aexecute_plan, execute_plan
+from ai.config import CONCURRENCY_CONFIG, DB_CACHE_CONFIG
+from ai.logs import agent_callbacks
+from ai.prompts import SQL_ANSWER_PROMPT
+from ai.ttl_cache import TTLCache
+from ai.concurrency import run_blocking
+from ai.singleflight import SingleFlight
 from langchain.agents import AgentExecutor
 from langchain_core.language_models import BaseLanguageModel
-from langchain_community.utilities import SQLDatabase
+from langchain_core.output_parsers import StrOutputParser
 from langchain_community.tools.sql_database.tool import (
-    QuerySQLDatabaseTool,
     InfoSQLDatabaseTool,
     ListSQLDatabaseTool,
     QuerySQLCheckerTool
 )
 from langchain.chains import create_sql_query_chain
-import os
-from dotenv import load_dotenv
+from database import AGENT_DATABASE_URL, get_engine, get_async_engine
 
 class DBAgent(BaseSubAgent):
     def __init__(self, llm: BaseLanguageModel):
-        # 먼저 db 설정을 초기화합니다
-        load_dotenv()
+        # 공유 커넥션 풀을 사용하고, 스키마 정보는 메모리에 캐시 (DDL 실행 시 무효화)
+        self.db = CachedSQLDatabase(get_engine(AGENT_DATABASE_URL), metadata=None)
         
-        mysql_config = {
-            'user': os.getenv('DB_USER'),
-            'password': os.getenv('DB_PASSWORD'),
-            'host': os.getenv('DB_HOST'),
-            'database': "ecommerce_db"
-        }
-        
-        # 데이터베이스 이름을 포함한 연결 문자열 생성
-        connection_string = f"mysql+pymysql://{mysql_config['user']}:{mysql_config['password']}@{mysql_config['host']}/{mysql_config['database']}"
-        # 메타데이터 리플렉션을 비활성화하여 캐싱 문제 방지
-        self.db = SQLDatabase.from_uri(connection_string, metadata=None)
+        # 쿼리 실행용 비동기 엔진 (aiomysql이 없으면 스레드 풀에서 동기 드라이버 사용)
+        try:
+            self.async_engine = get_async_engine(AGENT_DATABASE_URL)
+        except ImportError:
+            print("Warning: 비동기 드라이버가 설치되지 않아 동기 드라이버로 쿼리를 실행합니다.")
+            self.async_engine = None
         
         # SQL 체인 설정 업데이트
         self.db_chain = create_sql_query_chain(llm, self.db)
         
+        # 반복 질문은 에이전트 없이 검증된 SQL을 다시 실행하고 결과만 LLM으로 한 번 정리
+        self.sql_cache = TTLCache(DB_CACHE_CONFIG["query_cache_size"])
+        self.answer_chain = SQL_ANSWER_PROMPT | llm | StrOutputParser()
+        self.result_cache = None
+        if DB_CACHE_CONFIG["result_cache_ttl_seconds"] > 0:
+            self.result_cache = TTLCache(
+                DB_CACHE_CONFIG["result_cache_size"],
+                ttl_seconds=DB_CACHE_CONFIG["result_cache_ttl_seconds"]
+            )
+        
+        # 동시에 들어온 같은 읽기 전용 SQL은 한 번만 처리 (자연어 요청과 쓰기 SQL은 매번 실행)
+        self._flight = SingleFlight()
+        
         # 그 다음 부모 클래스 초기화를 호출합니다
         super().__init__(llm)
         
@@ -42,17 +56,19 @@ class DBAgent(BaseSubAgent):
             agent=self.agent,
             tools=self.tools,
             handle_parsing_errors=True,
-            verbose=True
+            # 에이전트가 실행한 SQL을 질문 캐시에 저장하기 위해 중간 단계를 반환
+            return_intermediate_steps=True,
+            callbacks=agent_callbacks()
         )
 
     def setup_tools(self):
         self.tools = [
-            QuerySQLDatabaseTool(
+            # 쿼리 실행 전에 마크다운 포맷팅 제거
+            AsyncQuerySQLDatabaseTool(
                 db=self.db,
+                async_engine=self.async_engine,
                 name="MySQL_쿼리실행",
-                description="MySQL 데이터베이스에 SQL 쿼리를 실행합니다.",
-                # 쿼리 실행 전에 마크다운 포맷팅 제거
-                preprocessor=lambda q: q.replace('```sql', '').replace('```', '').strip()
+                description="MySQL 데이터베이스에 SQL 쿼리를 실행합니다."
             ),
             QuerySQLCheckerTool(
                 db=self.db,
@@ -72,24 +88,159 @@ class DBAgent(BaseSubAgent):
             )
         ]
     
+    def refresh_schema(self):
+        """캐시된 스키마 정보를 버리고 데이터베이스에서 다시 읽어옵니다."""
+        self.db.refresh_schema()
+    
+    def _split_queries(self, query: str):
+        """마크다운 포맷팅을 제거하고 여러 SQL 문을 세미콜론으로 분리합니다."""
+        query = strip_sql_markdown(query)
+        return [q.strip() for q in query.split(';') if q.strip()]
+    
+    def _plan(self, query: str):
+        """문장별로 SQL 여부와 읽고 쓰는 테이블을 분석합니다."""
+        known_tables = self.db.get_usable_table_names()
+        return [Statement(single_query, known_tables) for single_query in self._split_queries(query)]
+    
+    @staticmethod
+    def _format_sql_result(statement: Statement, result: str) -> str:
+        return result if result else f"쿼리가 실행되었습니다: {statement.text}"
+    
+    @staticmethod
+    def _question_key(question: str, schema_version: int):
+        return " ".join(question.lower().split()).rstrip("?!. "), schema_version
+    
+    def _cached_result(self, statement: Statement):
+        if self.result_cache is not None and statement.read_only:
+            return self.result_cache.get((statement.text, self.db.schema_version))
+        return None
+    
+    def _after_sql(self, statement: Statement, result: str):
+        """읽기 결과는 결과 캐시에 저장하고, 쓰기가 일어나면 결과 캐시를 비웁니다."""
+        if self.result_cache is None:
+            return
+        if not statement.read_only:
+            self.result_cache.clear()
+        elif not result.startswith("Error:"):
+            self.result_cache.set((statement.text, self.db.schema_version), result)
+    
+    def _remember_sql(self, question: str, schema_version: int, agent_result: dict):
+        """에이전트가 마지막으로 성공한 읽기 전용 SQL을 질문 캐시에 저장합니다."""
+        validated_sql = None
+        wrote = False
+        for action, observation in agent_result.get("intermediate_steps", []):
+            if action.tool != "MySQL_쿼리실행":
+                continue
+            statement = Statement(strip_sql_markdown(str(action.tool_input)).rstrip(";"))
+            if not statement.read_only:
+                wrote = True
+            elif not str(observation).startswith("Error"):
+                validated_sql = statement.text
+        
+        if wrote:
+            # 데이터를 바꾸는 질문은 캐시하지 않고, 결과 캐시도 무효화
+            if self.result_cache is not None:
+                self.result_cache.clear()
+        elif validated_sql:
+            self.sql_cache.set(self._question_key(question, schema_version), validated_sql)
+    
+    def _execute_sql(self, statement: Statement) -> str:
+        result = self._cached_result(statement)
+        if result is None:
+            result = run_sql(self.db, statement.text)
+            self._after_sql(statement, result)
+        return result
+    
+    async def _aexecute_sql(self, statement: Statement) -> str:
+        result = self._cached_result(statement)
+        if result is None:
+            result = await arun_sql(self.db, self.async_engine, statement.text)
+            self._after_sql(statement, result)
+        return result
+    
+    def _answer_inputs(self, statement: Statement, sql: Statement, result: str) -> dict:
+        return {"question": statement.text, "query": sql.text, "result": result or "(결과 없음)"}
+    
+    def _execute_statement(self, statement: Statement) -> str:
+        # 이미 유효한 SQL이면 바로 실행하고 결과를 그대로 반환
+        # 이전에 검증된 SQL이 있는 질문이면 에이전트 없이 실행한 뒤 결과를 자연어로 정리
+        schema_version = self.db.schema_version
+        sql = statement if statement.is_sql else self._lookup_sql(statement, schema_version)
+        if sql is not None:
+            result = self._execute_sql(sql)
+            if not result.startswith("Error:"):
+                if statement.is_sql:
+                    return self._format_sql_result(sql, result)
+                return self.answer_chain.invoke(self._answer_inputs(statement, sql, result))
+        
+        # 실패하거나 처음 보는 질문은 에이전트에 맡김
+        agent_result = self.agent_executor.invoke({"input": statement.text})
+        self._remember_sql(statement.text, schema_version, agent_result)
+        return agent_result["output"]
+    
+    async def _aexecute_statement(self, statement: Statement) -> str:
+        schema_version = self.db.schema_version
+        sql = statement if statement.is_sql else self._lookup_sql(statement, schema_version)
+        if sql is not None:
+            result = await self._aexecute_sql(sql)
+            if not result.startswith("Error:"):
+                if statement.is_sql:
+                    return self._format_sql_result(sql, result)
+                return await self.answer_chain.ainvoke(self._answer_inputs(statement, sql, result))
+        
+        agent_result = await self.agent_executor.ainvoke({"input": statement.text})
+        self._remember_sql(statement.text, schema_version, agent_result)
+        return agent_result["output"]
+    
+    def _lookup_sql(self, statement: Statement, schema_version: int):
+        sql = self.sql_cache.get(self._question_key(statement.text, schema_version))
+        return Statement(sql) if sql else None
+    
+    @staticmethod
+    def _read_only_sql(statements) -> bool:
+        """모든 문장이 읽기 전용 SQL이면 True (자연어 요청은 쓰기일 수 있으므로 False)"""
+        return all(statement.is_sql and statement.read_only for statement in statements)
+    
+    def _flight_key(self, query: str):
+        return self._question_key(query, self.db.schema_version)
+    
+    def _run_plan(self, statements) -> str:
+        results = execute_plan(
+            statements,
+            self._execute_statement,
+            CONCURRENCY_CONFIG["db_statement_concurrency"]
+        )
+        return "\n".join(results)
+    
+    async def _arun_plan(self, statements) -> str:
+        results = await aexecute_plan(
+            statements,
+            self._aexecute_statement,
+            CONCURRENCY_CONFIG["db_statement_concurrency"]
+        )
+        return "\n".join(results)
+    
     def run(self, query: str) -> str:
         """자연어 쿼리를 실행하고 결과를 반환합니다."""
         try:
-            # 여러 SQL 문을 세미콜론으로 분리하여 개별 실행
+            # 여러 SQL 문을 세미콜론으로 분리하고, 서로 의존하지 않는 문장은 동시에 실행
             if isinstance(query, str):
-                # 마크다운 포맷팅 제거
-                query = query.replace('```sql', '').replace('```', '').strip()
-                
-                # 여러 SQL 문을 분리
-                queries = [q.strip() for q in query.split(';') if q.strip()]
+                statements = self._plan(query)
+                if not self._read_only_sql(statements):
+                    return self._run_plan(statements)
+                return self._flight.do(self._flight_key(query), self._run_plan, statements)
                 
-                results = []
-                for single_query in queries:
-                    if single_query:
-                        result = self.agent_executor.invoke({"input": single_query})
-                        results.append(result["output"])
-                
-                return "\n".join(results)
+        except Exception as e:
+            return f"에러 발생: {str(e)}"
+    
+    async def arun(self, query: str) -> str:
+        """run의 비동기 버전입니다."""
+        try:
+            if isinstance(query, str):
+                statements = await run_blocking(self._plan, query)
+                if not self._read_only_sql(statements):
+                    return await self._arun_plan(statements)
+                return await self._flight.ado(self._flight_key(query), self._arun_plan, statements)
                 
         except Exception as e:
             return f"에러 발생: {str(e)}"
@@ -1,10 +1,12 @@
 from langchain_community.tools import ReadFileTool, Tool
 from langchain_community.utilities import WikipediaAPIWrapper
 from langchain_community.tools import WikipediaQueryRun
+from ai.concurrency import to_async
 from .base_agent import BaseSubAgent
 
 class DocumentAnalysisAgent(BaseSubAgent):
     def setup_tools(self):
+        wikipedia = WikipediaQueryRun(api_wrapper=WikipediaAPIWrapper())
         self.tools = [
             ReadFileTool(
                 name="문서_읽기",
@@ -12,7 +14,8 @@ class DocumentAnalysisAgent(BaseSubAgent):
             ),
             Tool(
                 name="문서_분석",
-                func=WikipediaQueryRun(api_wrapper=WikipediaAPIWrapper()).run,
+                func=wikipedia.run,
+                coroutine=to_async(wikipedia.run),
                 description="문서 내용을 분석하고 관련 정보를 검색하는 도구"
             )
         ] 
\ No newline at end of file
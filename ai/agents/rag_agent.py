@@ -1,85 +1,593 @@
+import asyncio
 import os
-from typing import List, Optional
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from langchain_community.vectorstores import Chroma
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
-from langchain.document_loaders import TextLoader, PyPDFLoader, Docx2txtLoader, UnstructuredMarkdownLoader
 from ai.config import RAG_CONFIG, DEFAULT_MODEL
+from ai.rag.manifest import IngestionManifest, file_sha256, text_sha256, make_chunk_ids
+from ai.rag.embedding_cache import CachedEmbeddings, EmbeddingStore
+from ai.rag.pipeline import IngestionPipeline
+from ai.rag.loader import LOADER_MAP, iter_load_and_split
+from ai.rag.bm25 import BM25Index
+from ai.rag.hybrid import reciprocal_rank_fusion, rerank
+from ai.rag.context import ContextAssembler
+from ai.rag.collections import CollectionWriteLock, collection_paths, validate_collection_name
+from ai.rag.snapshots import IndexSnapshot, SnapshotStore
+from ai.concurrency import run_blocking
+from ai.singleflight import SingleFlight
+from ai.tracing import start_span
+
+def create_embeddings() -> CachedEmbeddings:
+    # 동일한 청크/쿼리를 다시 원격 임베딩하지 않도록 캐시를 앞단에 둠
+    return CachedEmbeddings(
+        GoogleGenerativeAIEmbeddings(model=DEFAULT_MODEL),
+        EmbeddingStore(
+            RAG_CONFIG["embedding_cache_path"],
+            RAG_CONFIG["embedding_cache_max_entries"]
+        ),
+        query_cache_size=RAG_CONFIG["query_cache_size"]
+    )
 
 class RAGTool:
-    def __init__(self):
-        self.embeddings = GoogleGenerativeAIEmbeddings(model=DEFAULT_MODEL)
-        self.vector_store = None
+    def __init__(self, collection: Optional[str] = None, embeddings: Optional[CachedEmbeddings] = None):
+        # 컬렉션마다 벡터 스토어, 매니페스트, 로컬 인덱스, 문서 디렉토리를 따로 사용
+        self.collection = validate_collection_name(collection)
+        self.store_path, self.documents_path = collection_paths(self.collection)
+        os.makedirs(self.store_path, exist_ok=True)
+        os.makedirs(self.documents_path, exist_ok=True)
+
+        self.embeddings = embeddings or create_embeddings()
+        # 인덱스 내용이 바뀔 때마다 증가 (응답 캐시 무효화에 사용)
+        # 컬렉션을 다시 열어도 이전 버전과 겹치지 않도록 시각에서 시작
+        self.corpus_version = time.monotonic_ns()
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=RAG_CONFIG["chunk_size"],
             chunk_overlap=RAG_CONFIG["chunk_overlap"],
             length_function=len,
         )
-        self.loader_map = {
-            ".txt": TextLoader,
-            ".pdf": PyPDFLoader,
-            ".docx": Docx2txtLoader,
-            ".md": UnstructuredMarkdownLoader
-        }
-    
+        self.loader_map = LOADER_MAP
+        # 다른 프로세스/인스턴스와 쓰기를 직렬화하고, 그사이 바뀐 상태를 다시 읽음
+        self._write_lock = CollectionWriteLock(os.path.join(self.store_path, ".write.lock"))
+        self._state_lock = threading.Lock()
+        # 검색은 _active 스냅샷을, 쓰기는 _target 스냅샷을 사용
+        # (평소에는 같고, 재색인과 백그라운드 작업 중에는 _target이 새로 구축 중인 스냅샷)
+        self.snapshots = SnapshotStore(self.store_path, RAG_CONFIG["snapshot_keep"])
+        self._pointer_stamp = self.snapshots.stamp()
+        self._active = self._target = self._open_snapshot(self.snapshots.current())
+        self._retired: Dict[str, IndexSnapshot] = {}
+        # 검색된 청크를 중복 제거/병합하여 토큰 예산에 맞춤
+        self.context_assembler = ContextAssembler(
+            RAG_CONFIG["context_max_tokens"],
+            max_overlap=RAG_CONFIG["chunk_overlap"]
+        )
+        # 동시에 들어온 같은 검색은 한 번만 실행 (코퍼스가 바뀌면 새로 검색)
+        self._flight = SingleFlight()
+
+    # 쓰기 작업은 아래 속성을 통해 _target 스냅샷을 다룸
+    @property
+    def manifest(self) -> IngestionManifest:
+        return self._target.manifest
+
+    @property
+    def ann_index(self):
+        return self._target.ann_index
+
+    @property
+    def bm25(self) -> Optional[BM25Index]:
+        return self._target.bm25
+
+    @property
+    def vector_store(self) -> Optional[Chroma]:
+        return self._active.vector_store
+
+    @property
+    def busy(self) -> bool:
+        """쓰기 작업 중이면 True (컬렉션 레지스트리가 메모리에서 내리지 않음)"""
+        return self._write_lock.locked
+
+    def _open_snapshot(self, snapshot_id: str) -> IndexSnapshot:
+        return IndexSnapshot(snapshot_id, self.snapshots.path(snapshot_id), self._open_vector_store)
+
+    def _reload_if_changed(self):
+        """다른 프로세스나 인스턴스가 이 컬렉션에 쓴 뒤라면 스냅샷이나 매니페스트를 다시 읽습니다."""
+        with self._state_lock:
+            stamp = self.snapshots.stamp()
+            if stamp != self._pointer_stamp:
+                self._pointer_stamp = stamp
+                snapshot_id = self.snapshots.current()
+                if snapshot_id != self._active.id:
+                    self._swap(self._open_snapshot(snapshot_id))
+                    return
+
+            if self._active.manifest_changed():
+                self._active.reload()
+                self.corpus_version += 1
+
+    async def _acquire_write_lock(self):
+        """이벤트 루프를 막지 않고 쓰기 잠금을 얻습니다."""
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self._write_lock.acquire))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # 기다리던 쪽이 취소되어도 스레드는 잠금을 얻으므로, 얻는 즉시 풀어줌
+            acquiring.add_done_callback(
+                lambda future: future.cancelled() or future.exception() or self._write_lock.release()
+            )
+            raise
+
+    @contextmanager
+    def _writing(self):
+        with self._write_lock:
+            self._reload_if_changed()
+            yield
+
+    @contextmanager
+    def _reading(self) -> Iterator[IndexSnapshot]:
+        """검색하는 동안 현재 스냅샷이 정리되지 않도록 붙잡아 둡니다."""
+        self._reload_if_changed()
+        with self._state_lock:
+            snapshot = self._active
+            snapshot.acquire()
+        try:
+            yield snapshot
+        finally:
+            snapshot.release()
+
+    def _open_vector_store(self, path: str) -> Chroma:
+        # HNSW 설정은 컬렉션을 처음 만들 때만 적용됨
+        return Chroma(
+            persist_directory=path,
+            embedding_function=self.embeddings,
+            collection_metadata={
+                "hnsw:M": RAG_CONFIG["hnsw_m"],
+                "hnsw:construction_ef": RAG_CONFIG["hnsw_ef_construction"],
+                "hnsw:search_ef": RAG_CONFIG["hnsw_ef_search"],
+            }
+        )
+
+    def _save_index(self):
+        self._target.save()
+
+    def _get_vector_store(self) -> Chroma:
+        return self._target.get_vector_store()
+
+    def _begin_snapshot(self) -> IndexSnapshot:
+        """빈 스냅샷을 만들어 이후 쓰기가 그곳으로 가도록 합니다. (쓰기 잠금 안에서 호출)"""
+        snapshot = self._open_snapshot(self.snapshots.create())
+        self._target = snapshot
+        return snapshot
+
+    def _validate_snapshot(self, snapshot: IndexSnapshot):
+        """구축 중인 스냅샷의 매니페스트를 기준으로 각 인덱스를 맞추고 실제로 검색되는지 확인합니다.
+
+        일부 배치만 upsert된 채 실패한 파일의 청크는 매니페스트에 없으므로 먼저 지우고,
+        매니페스트의 청크가 모든 인덱스에 들어 있는지만 확인합니다.
+        """
+        expected = snapshot.chunk_ids()
+        indexes = [("Chroma", snapshot.stored_ids())]
+        if snapshot.ann_index is not None:
+            indexes.append(("ANN", set(snapshot.ann_index.labels)))
+        if snapshot.bm25 is not None:
+            indexes.append(("BM25", snapshot.bm25.chunk_ids()))
+
+        orphans = set().union(*(ids - expected for _, ids in indexes))
+        if orphans:
+            # _target이 구축 중인 스냅샷이므로 그 스냅샷에서 지워짐
+            self._delete_chunks(sorted(orphans))
+        for name, ids in indexes:
+            missing = len(expected - ids)
+            if missing:
+                raise RuntimeError(f"스냅샷 검증 실패: {name} 인덱스에 청크 {len(expected)}개 중 {missing}개가 없습니다.")
+        if expected:
+            probe = snapshot.vector_store._collection.peek(1)["documents"][0]
+            if not self._search(snapshot, probe[:200], 1):
+                raise RuntimeError("스냅샷 검증 실패: 검색 결과가 없습니다.")
+
+    def _publish_snapshot(self, snapshot: IndexSnapshot):
+        """구축이 끝난 스냅샷을 검증하고 현재 스냅샷으로 원자적으로 교체합니다."""
+        self._validate_snapshot(snapshot)
+        snapshot.save()
+        self.snapshots.publish(snapshot.id)
+        with self._state_lock:
+            self._pointer_stamp = self.snapshots.stamp()
+            self._swap(snapshot)
+
+    def _abort_snapshot(self, snapshot: IndexSnapshot):
+        self._target = self._active
+        snapshot.close()
+        self.snapshots.discard(snapshot.id)
+
+    def _swap(self, snapshot: IndexSnapshot):
+        """(상태 잠금 안에서) 새 스냅샷으로 교체하고 이전 스냅샷은 검색이 끝나면 정리합니다."""
+        previous = self._active
+        self._active = self._target = snapshot
+        self.corpus_version += 1
+        self._retired[previous.id] = previous
+        previous.retire(self._on_snapshot_idle)
+
+    def _on_snapshot_idle(self, snapshot: IndexSnapshot):
+        self._retired.pop(snapshot.id, None)
+        snapshot.close()
+        in_use = [self._active.id, self._target.id]
+        in_use.extend(retired.id for retired in list(self._retired.values()) if retired.in_use)
+        self.snapshots.collect(in_use)
+
+    def close(self):
+        """컬렉션 레지스트리에서 내려갈 때 스냅샷들의 인덱스 연결을 닫습니다."""
+        with self._state_lock:
+            snapshots = {snapshot.id: snapshot for snapshot in (self._active, self._target)}
+            snapshots.update(self._retired)
+            self._retired.clear()
+        for snapshot in snapshots.values():
+            snapshot.close()
+
+    def _load_file(self, file_path: str) -> List[Document]:
+        file_ext = os.path.splitext(file_path)[1].lower()
+        loader = self.loader_map[file_ext](file_path)
+        return loader.load()
+
     def load_documents(self) -> List[Document]:
         """문서 디렉토리에서 모든 지원되는 문서를 로드합니다."""
         documents = []
-        docs_path = RAG_CONFIG["documents_path"]
-        
+        docs_path = self.documents_path
+
         for filename in os.listdir(docs_path):
             file_path = os.path.join(docs_path, filename)
             file_ext = os.path.splitext(filename)[1].lower()
-            
+
             if file_ext in self.loader_map:
                 try:
-                    loader = self.loader_map[file_ext](file_path)
-                    documents.extend(loader.load())
+                    documents.extend(self._load_file(file_path))
                 except Exception as e:
                     print(f"Warning: {filename} 로딩 중 오류 발생 - {str(e)}")
-                    
+
         return documents
 
+    def _iter_load_and_split(self, items: Iterable[Tuple]):
+        return iter_load_and_split(
+            items,
+            RAG_CONFIG["chunk_size"],
+            RAG_CONFIG["chunk_overlap"],
+            RAG_CONFIG["load_workers"]
+        )
+
+    def iter_documents(self) -> Iterator[Document]:
+        """문서 디렉토리의 파일을 병렬로 로드하며 분할된 청크를 차례로 돌려줍니다."""
+        docs_path = self.documents_path
+        items = (
+            (os.path.join(docs_path, filename),)
+            for filename in sorted(os.listdir(docs_path))
+            if os.path.splitext(filename)[1].lower() in self.loader_map
+        )
+        for (file_path,), chunks, error in self._iter_load_and_split(items):
+            if error is not None:
+                print(f"Warning: {os.path.basename(file_path)} 로딩 중 오류 발생 - {str(error)}")
+                continue
+            yield from chunks
+
+    def _plan_chunks(self, source: str, chunks: List[Document],
+                     mtime: Optional[float], content_hash: str) -> Dict:
+        """한 파일의 청크를 이전 인덱스와 비교하여 추가/삭제할 청크를 계산합니다."""
+        chunk_ids = make_chunk_ids(source, chunks)
+
+        entry = self.manifest.get(source)
+        old_ids = set(entry["chunk_ids"]) if entry else set()
+        new_ids = set(chunk_ids)
+
+        added_ids, added_chunks = [], []
+        for chunk_id, chunk in zip(chunk_ids, chunks):
+            if chunk_id not in old_ids:
+                added_ids.append(chunk_id)
+                added_chunks.append(chunk)
+
+        return {
+            "source": source,
+            "mtime": mtime,
+            "sha256": content_hash,
+            "chunk_ids": chunk_ids,
+            "added_ids": added_ids,
+            "added_chunks": added_chunks,
+            "stale_ids": [chunk_id for chunk_id in old_ids if chunk_id not in new_ids],
+        }
+
+    def _upsert_chunks(self, ids: List[str], chunks: List[Document], vectors: List[List[float]]):
+        """미리 계산한 임베딩으로 청크를 벡터 스토어에 일괄 upsert합니다."""
+        self._get_vector_store()._collection.upsert(
+            ids=ids,
+            embeddings=vectors,
+            documents=[chunk.page_content for chunk in chunks],
+            metadatas=[chunk.metadata for chunk in chunks]
+        )
+        if self.ann_index is not None:
+            self.ann_index.add(ids, vectors)
+        if self.bm25 is not None:
+            self.bm25.add(ids, [chunk.page_content for chunk in chunks])
+
+    def _delete_chunks(self, ids: List[str]):
+        """벡터 스토어와 로컬 인덱스에서 청크를 제거합니다."""
+        self._get_vector_store().delete(ids=ids)
+        if self.ann_index is not None:
+            self.ann_index.remove(ids)
+        if self.bm25 is not None:
+            self.bm25.remove(ids)
+
+    def _commit_plan(self, plan: Dict):
+        """새 청크 반영이 끝난 뒤 오래된 청크를 지우고 매니페스트를 갱신합니다.
+
+        파이프라인 워커 여러 개가 스레드에서 동시에 호출하므로 버전/매니페스트 갱신은 상태 잠금 안에서 합니다.
+        """
+        if plan["stale_ids"]:
+            self._delete_chunks(plan["stale_ids"])
+        with self._state_lock:
+            if plan["added_ids"] or plan["stale_ids"]:
+                self.corpus_version += 1
+            self.manifest.update(plan["source"], plan["mtime"], plan["sha256"], plan["chunk_ids"])
+
+    def _index_chunks(self, source: str, chunks: List[Document],
+                      mtime: Optional[float], content_hash: str) -> Dict[str, int]:
+        """한 파일의 청크를 이전 인덱스와 비교하여 바뀐 청크만 임베딩합니다."""
+        plan = self._plan_chunks(source, chunks, mtime, content_hash)
+        if plan["added_chunks"]:
+            vectors = self.embeddings.embed_documents([chunk.page_content for chunk in plan["added_chunks"]])
+            self._upsert_chunks(plan["added_ids"], plan["added_chunks"], vectors)
+        self._commit_plan(plan)
+        return {"added": len(plan["added_ids"]), "removed": len(plan["stale_ids"])}
+
+    def _remove_source(self, source: str) -> int:
+        """삭제된 파일의 벡터를 제거합니다."""
+        entry = self.manifest.get(source)
+        stale_ids = entry["chunk_ids"] if entry else []
+        if stale_ids:
+            self._delete_chunks(stale_ids)
+        with self._state_lock:
+            self.manifest.remove(source)
+            if stale_ids:
+                self.corpus_version += 1
+        return len(stale_ids)
+
+    @staticmethod
+    def _new_sync_stats() -> Dict:
+        return {"files": 0, "indexed": 0, "unchanged": 0, "deleted": 0,
+                "chunks_added": 0, "chunks_removed": 0}
+
+    def _scan_documents(self, stats: Dict, seen: Set[str]) -> Iterator[Tuple[str, float, str]]:
+        """문서 디렉토리를 훑어 mtime과 내용 해시가 바뀐 파일만 돌려줍니다."""
+        docs_path = os.path.normpath(self.documents_path)
+
+        for filename in sorted(os.listdir(docs_path)):
+            file_path = os.path.join(docs_path, filename)
+            file_ext = os.path.splitext(filename)[1].lower()
+            if file_ext not in self.loader_map or not os.path.isfile(file_path):
+                continue
+
+            seen.add(file_path)
+            stats["files"] += 1
+            try:
+                mtime = os.stat(file_path).st_mtime
+                entry = self.manifest.get(file_path)
+                if entry and entry["mtime"] == mtime:
+                    stats["unchanged"] += 1
+                    continue
+
+                content_hash = file_sha256(file_path)
+                if entry and entry["sha256"] == content_hash:
+                    self.manifest.touch(file_path, mtime)
+                    stats["unchanged"] += 1
+                    continue
+            except OSError as e:
+                print(f"Warning: {filename} 로딩 중 오류 발생 - {str(e)}")
+                continue
+
+            yield file_path, mtime, content_hash
+
+    def _finish_sync(self, stats: Dict, seen: Set[str]):
+        """디렉토리에서 사라진 파일의 벡터를 제거하고 매니페스트를 저장합니다."""
+        docs_path = os.path.normpath(self.documents_path)
+        for source in self.manifest.sources():
+            if os.path.dirname(source) == docs_path and source not in seen:
+                stats["chunks_removed"] += self._remove_source(source)
+                stats["deleted"] += 1
+        self._save_index()
+
+    def sync_documents(self) -> Dict[str, int]:
+        """문서 디렉토리와 벡터 스토어를 동기화합니다.
+
+        mtime과 내용 해시가 바뀐 파일만 다시 분할하고, 그중에서도 새로 생긴 청크만
+        임베딩합니다. 디렉토리에서 사라진 파일의 벡터는 제거합니다.
+        """
+        with self._writing():
+            return self._sync_target()
+
+    def _sync_target(self) -> Dict[str, int]:
+        stats = self._new_sync_stats()
+        seen: Set[str] = set()
+
+        changed = self._iter_load_and_split(self._scan_documents(stats, seen))
+        for (file_path, mtime, content_hash), chunks, error in changed:
+            if error is not None:
+                print(f"Warning: {os.path.basename(file_path)} 로딩 중 오류 발생 - {str(error)}")
+                continue
+            try:
+                result = self._index_chunks(file_path, chunks, mtime, content_hash)
+                stats["indexed"] += 1
+                stats["chunks_added"] += result["added"]
+                stats["chunks_removed"] += result["removed"]
+            except Exception as e:
+                print(f"Warning: {os.path.basename(file_path)} 로딩 중 오류 발생 - {str(e)}")
+
+        self._finish_sync(stats, seen)
+        return stats
+
+    async def async_sync_documents(self, on_progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """sync_documents의 비동기 버전으로, 배치 임베딩 파이프라인을 사용합니다."""
+        await self._acquire_write_lock()
+        try:
+            await asyncio.to_thread(self._reload_if_changed)
+            return await IngestionPipeline(self, on_progress=on_progress).run()
+        except asyncio.CancelledError:
+            # 취소되기 전까지 반영된 파일은 매니페스트에 남겨 다음 동기화 때 건너뜀
+            await asyncio.to_thread(self._save_index)
+            raise
+        finally:
+            self._write_lock.release()
+
+    def reindex(self) -> Dict[str, int]:
+        """문서 디렉토리 전체를 새 스냅샷에 다시 색인하고, 검증 후 원자적으로 교체합니다.
+
+        구축하는 동안 검색은 이전 스냅샷을 그대로 사용하고, 이전 스냅샷은 진행 중인
+        검색이 끝난 뒤 정리됩니다. 청크 임베딩은 캐시에서 재사용됩니다.
+        """
+        with self._writing():
+            snapshot = self._begin_snapshot()
+            try:
+                stats = self._sync_target()
+                self._publish_snapshot(snapshot)
+            except BaseException:
+                self._abort_snapshot(snapshot)
+                raise
+        return stats
+
+    async def async_reindex(self, on_progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """reindex의 비동기 버전으로, 배치 임베딩 파이프라인을 사용합니다."""
+        await self._acquire_write_lock()
+        try:
+            await asyncio.to_thread(self._reload_if_changed)
+            snapshot = await asyncio.to_thread(self._begin_snapshot)
+            try:
+                stats = await IngestionPipeline(self, on_progress=on_progress).run()
+                await asyncio.to_thread(self._publish_snapshot, snapshot)
+            except BaseException:
+                await asyncio.to_thread(self._abort_snapshot, snapshot)
+                raise
+            return stats
+        finally:
+            self._write_lock.release()
+
     def add_document(self, file_path: str) -> bool:
         """새로운 문서를 추가합니다."""
         file_ext = os.path.splitext(file_path)[1].lower()
         if file_ext not in self.loader_map:
             return False
-            
+
         try:
-            # 문서를 documents 디렉토리로 복사
-            import shutil
-            filename = os.path.basename(file_path)
-            dest_path = os.path.join(RAG_CONFIG["documents_path"], filename)
-            shutil.copy2(file_path, dest_path)
-            
-            # 벡터 스토어 업데이트
-            loader = self.loader_map[file_ext](dest_path)
-            documents = loader.load()
-            self.initialize_vector_store(documents)
+            with self._writing():
+                dest_path = self._copy_document(file_path)
+
+                # 벡터 스토어 업데이트 (해당 문서의 바뀐 청크만 임베딩)
+                self._index_chunks(
+                    dest_path,
+                    self.text_splitter.split_documents(self._load_file(dest_path)),
+                    os.stat(dest_path).st_mtime,
+                    file_sha256(dest_path)
+                )
+                self._save_index()
             return True
         except Exception as e:
             print(f"Error adding document: {str(e)}")
             return False
 
+    def _copy_document(self, file_path: str) -> str:
+        """문서를 documents 디렉토리로 복사하고 복사된 경로를 반환합니다."""
+        dest_path = os.path.join(os.path.normpath(self.documents_path), os.path.basename(file_path))
+        shutil.copy2(file_path, dest_path)
+        return dest_path
+
+    async def async_add_document(self, file_path: str, on_progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """문서를 복사한 뒤 새 스냅샷으로 다시 색인합니다. 색인하는 동안 검색은 이전 스냅샷을 사용합니다."""
+        if os.path.splitext(file_path)[1].lower() not in self.loader_map:
+            raise ValueError(f"지원하지 않는 문서 형식입니다: {file_path}")
+        await asyncio.to_thread(self._copy_document, file_path)
+        return await self.async_reindex(on_progress=on_progress)
+
     def initialize_vector_store(self, documents: List[Document]):
-        """문서를 벡터 스토어에 초기화하고 저장합니다."""
-        texts = self.text_splitter.split_documents(documents)
-        self.vector_store = Chroma.from_documents(
-            documents=texts,
-            embedding=self.embeddings,
-            persist_directory=RAG_CONFIG["vector_store_path"]
+        """문서를 기존 벡터 스토어에 증분 반영합니다."""
+        by_source: Dict[str, List[Document]] = {}
+        for doc in documents:
+            by_source.setdefault(doc.metadata.get("source", ""), []).append(doc)
+
+        with self._writing():
+            for source, docs in by_source.items():
+                content_hash = text_sha256(doc.page_content for doc in docs)
+                entry = self.manifest.get(source)
+                if entry and entry["sha256"] == content_hash:
+                    continue
+                self._index_chunks(source, self.text_splitter.split_documents(docs), None, content_hash)
+
+            self._save_index()
+
+    def _vector_search(self, snapshot: IndexSnapshot, query_vector: List[float], k: int) -> List[str]:
+        """로컬 ANN 인덱스가 있으면 그것으로, 없으면 Chroma로 가까운 청크 ID를 찾습니다."""
+        use_ann = snapshot.ann_index is not None and len(snapshot.ann_index)
+        with start_span("rag.vector_search", **{"rag.backend": RAG_CONFIG["index_backend"] if use_ann else "chroma",
+                                               "rag.k": k}):
+            if use_ann:
+                return [chunk_id for chunk_id, _ in snapshot.ann_index.search(query_vector, k)]
+            result = snapshot.vector_store._collection.query(
+                query_embeddings=[query_vector], n_results=k, include=["distances"]
+            )
+            return result["ids"][0]
+
+    def _get_chunks(self, snapshot: IndexSnapshot, ids: List[str],
+                    with_vectors: bool = False) -> Tuple[List[Document], List]:
+        """청크 ID 순서대로 문서(와 저장된 임베딩)를 가져옵니다."""
+        include = ["documents", "metadatas"] + (["embeddings"] if with_vectors else [])
+        found = snapshot.vector_store._collection.get(ids=ids, include=include)
+        position = {chunk_id: i for i, chunk_id in enumerate(found["ids"])}
+
+        docs, vectors = [], []
+        for chunk_id in ids:
+            if chunk_id not in position:
+                continue
+            i = position[chunk_id]
+            docs.append(Document(page_content=found["documents"][i], metadata=found["metadatas"][i] or {}))
+            if with_vectors:
+                vectors.append(found["embeddings"][i])
+        return docs, vectors
+
+    def _bm25_search(self, snapshot: IndexSnapshot, query: str, k: int) -> List[str]:
+        with start_span("rag.bm25_search", **{"rag.k": k}):
+            return [chunk_id for chunk_id, _ in snapshot.bm25.search(query, k)]
+
+    def _search(self, snapshot: IndexSnapshot, query: str, k: int) -> List[Document]:
+        """벡터 검색과 BM25 결과를 RRF로 합치고, 설정에 따라 재정렬하여 k개를 반환합니다."""
+        query_vector = self.embeddings.embed_query(query)
+        if snapshot.bm25 is None:
+            return self._get_chunks(snapshot, self._vector_search(snapshot, query_vector, k))[0]
+
+        n = max(k, RAG_CONFIG["fusion_candidates"])
+        fused = reciprocal_rank_fusion(
+            [
+                self._vector_search(snapshot, query_vector, n),
+                self._bm25_search(snapshot, query, n),
+            ],
+            k=RAG_CONFIG["rrf_k"]
         )
+        if not RAG_CONFIG["rerank"]:
+            return self._get_chunks(snapshot, [chunk_id for chunk_id, _ in fused[:k]])[0]
+
+        docs, vectors = self._get_chunks(snapshot, [chunk_id for chunk_id, _ in fused[:n]], with_vectors=True)
+        return rerank(query, query_vector, docs, vectors, RAG_CONFIG["rerank_keyword_weight"])[:k]
 
     def _run(self, query: str) -> str:
         """검색된 문서를 기반으로 응답을 생성합니다."""
-        if not self.vector_store:
-            return "문서가 초기화되지 않았습니다. 먼저 문서를 로드해주세요."
-            
-        relevant_docs = self.vector_store.similarity_search(query, k=3)
-        context = "\n\n".join([doc.page_content for doc in relevant_docs])
-        
-        return f"""관련 문서 검색 결과:
-        
-        {context}"""
\ No newline at end of file
+        return self._flight.do((query, self.corpus_version), self._retrieve, query)
+
+    async def _arun(self, query: str) -> str:
+        """_run의 비동기 버전으로, 검색을 전용 스레드 풀에서 실행합니다."""
+        return await self._flight.ado((query, self.corpus_version), run_blocking, self._retrieve, query)
+
+    def _retrieve(self, query: str) -> str:
+        with start_span("rag.retrieve", **{"rag.collection": self.collection}), self._reading() as snapshot:
+            if not snapshot.vector_store:
+                return "문서가 초기화되지 않았습니다. 먼저 문서를 로드해주세요."
+            relevant_docs = self._search(snapshot, query, RAG_CONFIG["search_k"])
+
+        context = self.context_assembler.assemble(query, relevant_docs)
+
+        return f"관련 문서 검색 결과:\n\n{context}"
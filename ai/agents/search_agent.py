@@ -2,19 +2,25 @@ from langchain_community.tools import Tool
 from langchain_community.utilities.serpapi import SerpAPIWrapper
 from langchain_community.utilities import WikipediaAPIWrapper
 from langchain_community.tools import WikipediaQueryRun
+from ai.concurrency import to_async
 from .base_agent import BaseSubAgent
 
 class SearchAgent(BaseSubAgent):
     def setup_tools(self):
+        serpapi = SerpAPIWrapper()
+        wikipedia = WikipediaQueryRun(api_wrapper=WikipediaAPIWrapper())
         self.tools = [
             Tool(
                 name="웹검색",
-                func=SerpAPIWrapper().run,
+                func=serpapi.run,
+                coroutine=serpapi.arun,
                 description="웹에서 정보를 검색하는 도구"
             ),
             Tool(
                 name="위키피디아",
-                func=WikipediaQueryRun(api_wrapper=WikipediaAPIWrapper()).run,
+                func=wikipedia.run,
+                # 위키피디아 래퍼는 비동기 API가 없어 전용 스레드 풀에서 실행
+                coroutine=to_async(wikipedia.run),
                 description="위키피디아에서 정보를 검색해야 할 때 사용하는 도구"
             )
         ] 
\ No newline at end of file
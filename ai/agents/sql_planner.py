@@ -0,0 +1,122 @@
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Iterable, List, Set
+
+# SQL로 바로 실행할 수 있는 문장의 첫 키워드
+_SQL_KEYWORDS = {
+    "SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "ALTER", "DROP",
+    "TRUNCATE", "RENAME", "WITH", "SHOW", "DESCRIBE", "DESC", "EXPLAIN", "USE", "SET",
+}
+# 데이터를 바꾸지 않는 문장의 첫 키워드
+_READ_ONLY_KEYWORDS = {"SELECT", "WITH", "SHOW", "DESCRIBE", "DESC", "EXPLAIN"}
+# 연결/트랜잭션/데이터베이스 전체에 영향을 주어 앞뒤 문장과 순서를 지켜야 하는 키워드
+_BARRIER_KEYWORDS = {"USE", "SET", "RENAME", "START", "BEGIN", "COMMIT", "ROLLBACK", "LOCK", "UNLOCK"}
+
+_TABLE = r"([`\w.]+)"
+_WRITE_PATTERN = re.compile(
+    r"\b(?:INSERT\s+(?:IGNORE\s+)?INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?"
+    r"|CREATE\s+(?:TEMPORARY\s+)?TABLE(?:\s+IF\s+NOT\s+EXISTS)?|ALTER\s+TABLE"
+    r"|DROP\s+TABLE(?:\s+IF\s+EXISTS)?)\s+" + _TABLE,
+    re.IGNORECASE,
+)
+_READ_PATTERN = re.compile(r"\b(?:FROM|JOIN|REFERENCES)\s+" + _TABLE, re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_HANGUL = re.compile(r"[가-힣]")
+
+
+def mask_literals(text: str) -> str:
+    """문자열 리터럴 내용을 같은 길이의 공백으로 가립니다 (키워드/주석 위치는 원문과 같음)."""
+    return _STRING_LITERAL.sub(lambda m: m.group(0)[0] + " " * (len(m.group(0)) - 2) + m.group(0)[-1], text)
+
+
+def _table_name(raw: str) -> str:
+    return raw.replace("`", "").split(".")[-1].lower()
+
+
+class Statement:
+    """실행 계획을 위한 문장 분석 결과"""
+
+    def __init__(self, text: str, known_tables: Iterable[str] = ()):
+        self.text = text
+        code = mask_literals(text)
+        first_word = code.split(None, 1)[0].upper() if code.strip() else ""
+
+        # 문자열 밖에 한글이 있으면 SQL이 아닌 자연어 요청으로 봄
+        self.is_sql = first_word in _SQL_KEYWORDS and not _HANGUL.search(code)
+
+        if self.is_sql:
+            self.writes: Set[str] = {_table_name(t) for t in _WRITE_PATTERN.findall(code)}
+            self.reads: Set[str] = {_table_name(t) for t in _READ_PATTERN.findall(code)}
+            self.read_only = first_word in _READ_ONLY_KEYWORDS and not self.writes
+            # 쓰기 대상을 알 수 없는 쓰기 문장(CREATE DATABASE 등)은 순서를 보장
+            self.barrier = first_word in _BARRIER_KEYWORDS or (not self.read_only and not self.writes)
+        else:
+            # 자연어 요청은 언급된 테이블을 모두 쓸 수 있다고 보고, 알 수 없으면 순서를 보장
+            lowered = text.lower()
+            self.writes = {t.lower() for t in known_tables if t.lower() in lowered}
+            self.reads = set()
+            self.read_only = False
+            self.barrier = not self.writes
+
+    def conflicts_with(self, other: "Statement") -> bool:
+        return bool(
+            self.writes & (other.reads | other.writes)
+            or other.writes & self.reads
+        )
+
+
+def build_dependencies(statements: List[Statement]) -> List[Set[int]]:
+    """각 문장이 먼저 끝나기를 기다려야 하는 앞 문장들의 인덱스를 계산합니다.
+
+    같은 테이블을 쓰는 문장이나 쓰고 읽는 문장은 원래 순서를 지키고,
+    서로 관계없는 문장은 동시에 실행될 수 있습니다.
+    """
+    dependencies = []
+    for i, statement in enumerate(statements):
+        depends_on = set()
+        for j in range(i):
+            other = statements[j]
+            if statement.barrier or other.barrier or statement.conflicts_with(other):
+                depends_on.add(j)
+        dependencies.append(depends_on)
+    return dependencies
+
+
+async def aexecute_plan(statements: List[Statement], execute: Callable[[Statement], Awaitable[str]],
+                        concurrency: int) -> List[str]:
+    """의존 관계를 지키면서 문장들을 최대 concurrency개까지 동시에 실행합니다."""
+    dependencies = build_dependencies(statements)
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks: List[asyncio.Task] = []
+
+    async def run_one(index: int) -> str:
+        if dependencies[index]:
+            await asyncio.gather(*(tasks[j] for j in dependencies[index]))
+        async with semaphore:
+            return await execute(statements[index])
+
+    for index in range(len(statements)):
+        tasks.append(asyncio.ensure_future(run_one(index)))
+    return list(await asyncio.gather(*tasks))
+
+
+def execute_plan(statements: List[Statement], execute: Callable[[Statement], str],
+                 concurrency: int) -> List[str]:
+    """aexecute_plan의 동기 버전으로, 스레드 풀에서 실행합니다."""
+    dependencies = build_dependencies(statements)
+    if len(statements) <= 1:
+        return [execute(statement) for statement in statements]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = []
+
+        def run_one(index: int) -> str:
+            # 앞 문장들은 먼저 제출되었으므로 FIFO 스레드 풀에서 교착되지 않음
+            for j in dependencies[index]:
+                futures[j].result()
+            return execute(statements[index])
+
+        for index in range(len(statements)):
+            futures.append(pool.submit(run_one, index))
+        return [future.result() for future in futures]
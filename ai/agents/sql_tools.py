@@ -0,0 +1,366 @@
+import csv
+import io
+import json
+import re
+import threading
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
+from langchain_community.utilities import SQLDatabase
+from langchain_community.utilities.sql_database import truncate_word
+from sqlalchemy import text
+
+from ai.agents.sql_planner import Statement, mask_literals
+from ai.concurrency import run_blocking
+from ai.config import SQL_RESULT_CONFIG
+from ai.singleflight import SingleFlight
+from ai.tracing import start_span
+
+_DDL_PATTERN = re.compile(r"(^|;)\s*(CREATE|ALTER|DROP|RENAME|TRUNCATE)\b", re.IGNORECASE)
+_FIRST_WORD = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_LIMIT_PATTERN = re.compile(r"\bLIMIT\s+\d+", re.IGNORECASE)
+_TRAILING_COMMENT = re.compile(r"(?:--(?=\s|$)|#)[^\n]*$")
+_LOCKING_CLAUSE = re.compile(r"\s+(?:FOR\s+UPDATE|FOR\s+SHARE|LOCK\s+IN\s+SHARE\s+MODE)\b", re.IGNORECASE)
+_FILE_OUTPUT = re.compile(r"\bINTO\s+(?:OUTFILE|DUMPFILE)\b", re.IGNORECASE)
+
+# 동시에 들어온 같은 읽기 전용 쿼리를 한 번만 실행 (쓰기 쿼리는 합치지 않음)
+_read_flight = SingleFlight()
+
+
+def strip_sql_markdown(query: str) -> str:
+    """LLM이 붙인 마크다운 코드 블록 표시를 제거합니다."""
+    return query.replace('```sql', '').replace('```', '').strip()
+
+
+def strip_sql_tail(query: str) -> str:
+    """쿼리 끝에 붙은 한 줄 주석과 세미콜론을 제거합니다."""
+    query = query.rstrip()
+    while True:
+        comment = _TRAILING_COMMENT.search(mask_literals(query))
+        if comment:
+            query = query[:comment.start()].rstrip()
+        elif query.endswith(";"):
+            query = query[:-1].rstrip()
+        else:
+            return query
+
+
+def prepare_export_query(sql: str) -> Optional[str]:
+    """내보낼 수 있는 단일 읽기 전용 쿼리면 정리된 쿼리를, 아니면 None을 반환합니다.
+
+    Statement.read_only는 첫 키워드만 보므로 파일로 쓰는 SELECT ... INTO OUTFILE과
+    세미콜론으로 이어 붙인 여러 문장은 따로 거부합니다.
+    """
+    query = strip_sql_tail(strip_sql_markdown(sql))
+    statement = Statement(query)
+    masked = mask_literals(query)
+    if not statement.is_sql or not statement.read_only or ";" in masked or _FILE_OUTPUT.search(masked):
+        return None
+    return query
+
+
+def is_ddl(query: str) -> bool:
+    """스키마를 바꾸는 DDL 문이 포함되어 있는지 확인합니다."""
+    return bool(_DDL_PATTERN.search(query))
+
+
+class CachedSQLDatabase(SQLDatabase):
+    """테이블 목록과 테이블 정보를 메모리에 캐시하는 SQLDatabase
+
+    ReAct 루프의 테이블 목록/스키마 조회가 매번 information_schema와 샘플 행
+    조회를 하지 않도록 결과를 보관합니다. DDL을 실행하면 캐시가 무효화되고
+    다음 조회 때 스키마를 다시 리플렉션합니다.
+    """
+
+    def __init__(self, engine, **kwargs):
+        self._init_kwargs = kwargs
+        self._schema_lock = threading.RLock()
+        self._table_names: Optional[List[str]] = None
+        self._table_info_cache: Dict[Optional[Tuple[str, ...]], str] = {}
+        self._stale = False
+        self.schema_version = 0
+        super().__init__(engine, **kwargs)
+
+    def refresh_schema(self):
+        """스키마를 다시 리플렉션하고 캐시를 비웁니다."""
+        with self._schema_lock:
+            # SQLDatabase.__init__이 get_usable_table_names를 호출하므로 캐시를 먼저 비움
+            self._table_names = None
+            self._table_info_cache.clear()
+            self._stale = False
+            super().__init__(self._engine, **self._init_kwargs)
+            self.schema_version += 1
+
+    def invalidate_schema(self):
+        """다음 조회 때 스키마를 다시 읽도록 표시합니다."""
+        self._stale = True
+
+    def _ensure_fresh(self):
+        if self._stale:
+            self.refresh_schema()
+
+    def get_usable_table_names(self) -> Iterable[str]:
+        with self._schema_lock:
+            self._ensure_fresh()
+            if self._table_names is None:
+                self._table_names = list(super().get_usable_table_names())
+            return list(self._table_names)
+
+    def get_table_info(self, table_names: Optional[List[str]] = None) -> str:
+        key = tuple(sorted(table_names)) if table_names is not None else None
+        with self._schema_lock:
+            self._ensure_fresh()
+            if key not in self._table_info_cache:
+                self._table_info_cache[key] = super().get_table_info(table_names)
+            return self._table_info_cache[key]
+
+    def run(self, command, *args, **kwargs):
+        try:
+            return super().run(command, *args, **kwargs)
+        finally:
+            if isinstance(command, str) and is_ddl(command):
+                self.invalidate_schema()
+
+
+class _BoundedRows:
+    """행 수/바이트 제한 안에서만 결과 행을 모읍니다."""
+
+    def __init__(self, max_rows: int, max_bytes: int):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.rows: List[tuple] = []
+        self.size = 0
+        self.truncated = False
+
+    def add(self, batch) -> bool:
+        """배치를 추가하고, 제한에 도달해 더 읽을 필요가 없으면 False를 반환합니다."""
+        for row in batch:
+            row = tuple(row)
+            row_size = len(str(row))
+            if len(self.rows) >= self.max_rows or self.size + row_size > self.max_bytes:
+                self.truncated = True
+                return False
+            self.rows.append(row)
+            self.size += row_size
+        return True
+
+
+def _bound_query(statement: Statement, max_rows: int) -> str:
+    """LIMIT이 없는 SELECT에는 제한+1행까지만 가져오도록 LIMIT을 붙입니다.
+
+    끝의 주석/세미콜론은 떼어내고, 잠금 절(FOR UPDATE 등)이 있으면 그 앞에 넣습니다.
+    """
+    query = strip_sql_tail(statement.text)
+    masked = mask_literals(query)
+    if not statement.read_only or not _FIRST_WORD.match(query) or _LIMIT_PATTERN.search(masked):
+        return query
+    limit = f" LIMIT {max_rows + 1}"
+    locking = _LOCKING_CLAUSE.search(masked)
+    if locking:
+        return query[:locking.start()] + limit + query[locking.start():]
+    return query + limit
+
+
+def _numeric_columns(columns: List[str], rows: List[tuple]) -> List[str]:
+    """첫 행의 값 타입으로 집계할 숫자 열을 고릅니다."""
+    if not rows:
+        return []
+    numeric = [
+        column for column, value in zip(columns, rows[0])
+        if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+    ]
+    return numeric[:SQL_RESULT_CONFIG["max_aggregate_columns"]]
+
+
+def _summary_query(statement: Statement, columns: List[str], rows: List[tuple]) -> Optional[str]:
+    """잘린 SELECT 결과의 전체 행 수와 숫자 열 집계를 구하는 쿼리를 만듭니다.
+
+    원래 쿼리 전체를 한 번 더 훑으므로 summarize_truncated 설정이 켜져 있을 때만 만듭니다.
+    """
+    if not SQL_RESULT_CONFIG["summarize_truncated"]:
+        return None
+    query = strip_sql_tail(statement.text)
+    masked = mask_literals(query)
+    if not statement.read_only or not _FIRST_WORD.match(query) or _LOCKING_CLAUSE.search(masked):
+        return None
+    aggregates = ["COUNT(*)"]
+    for column in _numeric_columns(columns, rows):
+        name = column.replace("`", "``")
+        aggregates += [f"MIN(`{name}`)", f"MAX(`{name}`)", f"AVG(`{name}`)"]
+    return f"SELECT {', '.join(aggregates)} FROM ({query}) AS _summary"
+
+
+def _format_result(db: SQLDatabase, statement: Statement, columns: List[str],
+                   collected: _BoundedRows, summary: Optional[tuple]) -> str:
+    """결과를 SQLDatabase.run과 같은 형식으로 만들고, 잘리거나 넓은 결과에는 요약을 덧붙입니다."""
+    if not collected.rows:
+        return ""
+
+    max_columns = SQL_RESULT_CONFIG["max_columns"]
+    rows = [
+        tuple(truncate_word(value, length=db._max_string_length) for value in row[:max_columns])
+        for row in collected.rows
+    ]
+    lines = [str(rows)]
+
+    if len(columns) > max_columns:
+        lines.append(f"[열 생략] 처음 {max_columns}개 열만 표시: {', '.join(columns[max_columns:])} 생략")
+    if collected.truncated:
+        if summary is not None:
+            lines.append(f"[결과 요약] 전체 {summary[0]}행 중 {len(rows)}행만 표시")
+            for i, column in enumerate(_numeric_columns(columns, collected.rows)):
+                low, high, avg = summary[1 + 3 * i:4 + 3 * i]
+                lines.append(f"[집계] {column}: 최소 {low}, 최대 {high}, 평균 {avg}")
+        else:
+            lines.append(f"[결과 요약] 행/크기 제한으로 처음 {len(rows)}행만 표시")
+        lines.append("전체 결과가 필요하면 /db/export 엔드포인트로 내려받으세요.")
+    return "\n".join(lines)
+
+
+def _flight_key(db: SQLDatabase, statement: Statement):
+    return str(db._engine.url), statement.text
+
+
+def run_sql(db: SQLDatabase, query: str) -> str:
+    """SQL을 서버 측 커서로 실행하고 행/바이트 제한 안의 결과만 반환합니다.
+
+    동시에 실행 중인 같은 읽기 전용 쿼리가 있으면 그 결과를 함께 사용합니다.
+    """
+    statement = Statement(query)
+    if statement.read_only:
+        return _read_flight.do(_flight_key(db, statement), _run_sql, db, query, statement)
+    return _run_sql(db, query, statement)
+
+
+def _run_sql(db: SQLDatabase, query: str, statement: Statement) -> str:
+    with start_span("sql", **{"db.statement": statement.text}) as span:
+        result = _execute_sql(db, query, statement)
+        if result.startswith("Error:"):
+            span.set("db.error", result)
+        return result
+
+
+def _execute_sql(db: SQLDatabase, query: str, statement: Statement) -> str:
+    collected = _BoundedRows(SQL_RESULT_CONFIG["max_rows"], SQL_RESULT_CONFIG["max_bytes"])
+    summary = None
+    try:
+        with db._engine.begin() as conn:
+            result = conn.execution_options(stream_results=True).execute(
+                text(_bound_query(statement, SQL_RESULT_CONFIG["max_rows"]))
+            )
+            if not result.returns_rows:
+                return ""
+            columns = list(result.keys())
+            while True:
+                batch = result.fetchmany(SQL_RESULT_CONFIG["fetch_batch_size"])
+                if not batch or not collected.add(batch):
+                    break
+            result.close()
+
+            summary_query = _summary_query(statement, columns, collected.rows) if collected.truncated else None
+            if summary_query:
+                summary = tuple(conn.execute(text(summary_query)).one())
+    except Exception as e:
+        return f"Error: {e}"
+    finally:
+        if isinstance(db, CachedSQLDatabase) and is_ddl(query):
+            db.invalidate_schema()
+
+    return _format_result(db, statement, columns, collected, summary)
+
+
+async def arun_sql(db: SQLDatabase, async_engine: Optional[Any], query: str) -> str:
+    """run_sql의 비동기 버전입니다.
+
+    비동기 엔진이 없으면 동기 드라이버를 제한된 스레드 풀에서 실행합니다.
+    """
+    statement = Statement(query)
+    if statement.read_only:
+        return await _read_flight.ado(_flight_key(db, statement), _arun_sql, db, async_engine, query, statement)
+    return await _arun_sql(db, async_engine, query, statement)
+
+
+async def _arun_sql(db: SQLDatabase, async_engine: Optional[Any], query: str, statement: Statement) -> str:
+    if async_engine is None:
+        return await run_blocking(_run_sql, db, query, statement)
+
+    with start_span("sql", **{"db.statement": statement.text}) as span:
+        result = await _aexecute_sql(db, async_engine, query, statement)
+        if result.startswith("Error:"):
+            span.set("db.error", result)
+        return result
+
+
+async def _aexecute_sql(db: SQLDatabase, async_engine: Any, query: str, statement: Statement) -> str:
+    collected = _BoundedRows(SQL_RESULT_CONFIG["max_rows"], SQL_RESULT_CONFIG["max_bytes"])
+    summary = None
+    try:
+        async with async_engine.begin() as conn:
+            result = await conn.stream(text(_bound_query(statement, SQL_RESULT_CONFIG["max_rows"])))
+            if not result.returns_rows:
+                await result.close()
+                return ""
+            columns = list(result.keys())
+            while True:
+                batch = await result.fetchmany(SQL_RESULT_CONFIG["fetch_batch_size"])
+                if not batch or not collected.add(batch):
+                    break
+            await result.close()
+
+            summary_query = _summary_query(statement, columns, collected.rows) if collected.truncated else None
+            if summary_query:
+                summary = tuple((await conn.execute(text(summary_query))).one())
+    except Exception as e:
+        return f"Error: {e}"
+    finally:
+        if isinstance(db, CachedSQLDatabase) and is_ddl(query):
+            db.invalidate_schema()
+
+    return _format_result(db, statement, columns, collected, summary)
+
+
+def iter_query_export(engine, query: str, fmt: str) -> Iterator[str]:
+    """읽기 전용 쿼리의 전체 결과를 서버 측 커서로 읽으며 CSV 또는 NDJSON으로 내보냅니다.
+
+    query는 prepare_export_query를 통과한 쿼리여야 합니다.
+    """
+    batch_size = SQL_RESULT_CONFIG["fetch_batch_size"]
+    with engine.connect() as conn:
+        if engine.dialect.name == "mysql":
+            # 함수 호출 등으로 숨은 쓰기가 있어도 실패하도록 읽기 전용 트랜잭션에서 실행
+            conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+        result = conn.execution_options(stream_results=True).execute(text(query))
+        columns = list(result.keys())
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue()
+
+        while True:
+            batch = result.fetchmany(batch_size)
+            if not batch:
+                break
+            if fmt == "csv":
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + "\n"
+                    for row in batch
+                )
+
+
+class AsyncQuerySQLDatabaseTool(QuerySQLDatabaseTool):
+    """비동기 엔진으로 쿼리를 실행하여 이벤트 루프를 막지 않는 쿼리 도구"""
+
+    async_engine: Optional[Any] = None
+
+    def _run(self, query: str, run_manager=None) -> str:
+        return run_sql(self.db, strip_sql_markdown(query))
+
+    async def _arun(self, query: str, run_manager=None) -> str:
+        return await arun_sql(self.db, self.async_engine, strip_sql_markdown(query))
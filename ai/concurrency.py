@@ -0,0 +1,31 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable
+
+from ai.config import CONCURRENCY_CONFIG
+
+# 비동기 버전이 없는 블로킹 호출(위키피디아, 로컬 벡터 검색 등)을 위한 전용 스레드 풀
+_blocking_pool = ThreadPoolExecutor(
+    max_workers=CONCURRENCY_CONFIG["blocking_workers"],
+    thread_name_prefix="agent-blocking"
+)
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """블로킹 함수를 제한된 스레드 풀에서 실행하고 결과를 기다립니다.
+
+    현재 컨텍스트(컬렉션, 트레이스 스팬 등)를 복사해서 실행합니다.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_blocking_pool, functools.partial(context.run, func, *args, **kwargs))
+
+
+def to_async(func: Callable) -> Callable[..., Awaitable[Any]]:
+    """블로킹 함수를 Tool(coroutine=...)에 넘길 수 있는 코루틴 함수로 감쌉니다."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_blocking(func, *args, **kwargs)
+    return wrapper
@@ -15,9 +15,114 @@ RAG_CONFIG = {
     "chunk_overlap": 200,
     "vector_store_path": "data/vector_store",
     "documents_path": "data/documents",  # 문서 저장 경로
+    "default_collection": "default",  # 컬렉션을 지정하지 않은 요청이 사용할 컬렉션 (위 두 경로 사용)
+    "collections_dir": "collections",  # 이름 있는 컬렉션의 저장 경로 (vector_store_path 기준, 문서는 documents_path/<이름>)
+    "collection_idle_seconds": 1800,  # 이 시간 동안 쓰지 않은 컬렉션은 메모리에서 내림
+    "max_loaded_collections": 8,  # 메모리에 동시에 올려둘 최대 컬렉션 수
+    "snapshot_keep": 2,  # 전체 재색인 후 남겨둘 최근 인덱스 스냅샷 수 (다른 프로세스의 진행 중 검색용)
+    "jobs_db_path": "data/ingestion_jobs.sqlite",  # 백그라운드 인제스트 작업 기록
+    "ingestion_workers": 2,  # 동시에 실행할 인제스트 작업 수
+    "manifest_file": "manifest.json",  # 인제스트 매니페스트 (vector_store_path 기준)
+    "embedding_cache_path": "data/embedding_cache.sqlite",  # 임베딩 디스크 캐시
+    "embedding_cache_max_entries": 200000,  # 디스크 캐시 최대 항목 수 (LRU 제거)
+    "query_cache_size": 1024,  # 쿼리 임베딩 메모리 캐시 크기
+    "load_workers": 0,  # 문서 로드/분할 프로세스 수 (0이면 CPU 코어 수)
+    "embed_batch_size": 64,  # 임베딩 요청 한 번에 보낼 청크 수
+    "embed_concurrency": 4,  # 동시에 진행할 임베딩 요청 수
+    "embed_max_retries": 5,  # 임베딩 요청 실패 시 재시도 횟수
+    "embed_retry_base_delay": 1.0,  # 재시도 백오프 기본 대기 시간(초)
+    "search_k": 3,  # 검색할 청크 수
+    "index_backend": "chroma",  # 벡터 검색 인덱스: chroma(내장 HNSW), hnswlib, faiss
+    "ann_index_dir": "ann_index",  # 로컬 ANN 인덱스 저장 경로 (vector_store_path 기준)
+    "hnsw_m": 16,  # HNSW 노드당 연결 수 (클수록 재현율과 메모리 증가)
+    "hnsw_ef_construction": 200,  # 인덱스 구축 시 탐색 폭 (새 컬렉션/인덱스에만 적용)
+    "hnsw_ef_search": 64,  # 검색 시 탐색 폭 (클수록 재현율 증가, 지연 시간 증가)
+    "hybrid_search": True,  # 벡터 검색과 BM25 키워드 검색 결과를 함께 사용
+    "bm25_index_file": "bm25.sqlite",  # BM25 역색인 (vector_store_path 기준)
+    "bm25_k1": 1.5,
+    "bm25_b": 0.75,
+    "fusion_candidates": 20,  # 결과 융합 전 각 검색기에서 가져올 후보 수
+    "rrf_k": 60,  # reciprocal rank fusion 상수
+    "rerank": True,  # 융합된 후보를 임베딩 유사도 + 키워드 포함 비율로 재정렬
+    "rerank_keyword_weight": 0.3,  # 재정렬 시 키워드 포함 비율 가중치
+    "context_max_tokens": 1500,  # RAG 프롬프트에 넣을 컨텍스트 토큰 예산 (근사치)
     "supported_formats": [".txt", ".pdf", ".docx", ".md"]  # 지원하는 파일 형식
 }
 
+# 동시성 설정
+CONCURRENCY_CONFIG = {
+    "blocking_workers": 16,  # 비동기 버전이 없는 도구 호출용 스레드 풀 크기
+    "db_statement_concurrency": 4,  # DBAgent가 동시에 실행할 독립 SQL 문 수
+    "single_flight": True  # 동시에 들어온 같은 질문/검색/읽기 쿼리는 한 번만 실행하고 결과를 공유
+}
+
+# DBAgent 캐시 설정
+DB_CACHE_CONFIG = {
+    "query_cache_size": 500,  # (정규화된 질문, 스키마 버전) -> 검증된 SQL 캐시 크기
+    "result_cache_ttl_seconds": 0,  # 읽기 전용 쿼리 결과 캐시 유효 시간(초), 0이면 사용 안 함
+    "result_cache_size": 200,  # 결과 캐시 크기
+    # /users/{user_id} 조회 캐시 (updated_datetime을 갱신하지 않는 쓰기도 이 시간이 지나면 반영)
+    "user_cache_ttl_seconds": 30,
+    "user_cache_size": 10000
+}
+
+# SQL 결과 제한 설정 (LLM 컨텍스트로 들어가는 결과 크기)
+SQL_RESULT_CONFIG = {
+    "max_rows": 50,  # 도구 결과에 포함할 최대 행 수
+    "max_bytes": 8000,  # 도구 결과 최대 크기
+    "max_columns": 20,  # 표시할 최대 열 수 (나머지는 생략)
+    # 잘린 결과의 전체 행 수/집계를 구할지 여부 (원래 쿼리를 한 번 더 전체 실행하므로 기본은 끔)
+    "summarize_truncated": False,
+    "max_aggregate_columns": 5,  # 잘린 결과에서 집계를 계산할 숫자 열 수
+    "fetch_batch_size": 500  # 서버 측 커서에서 한 번에 가져올 행 수
+}
+
+# 응답 캐시 설정
+RESPONSE_CACHE_CONFIG = {
+    "enabled": True,
+    "ttl_seconds": 3600,  # 캐시 항목 유효 시간(초)
+    "max_entries": 1000,  # 최대 항목 수 (LRU 제거)
+    # 의미 유사도 조회 기준 (1.0이면 정확 일치만 사용, 낮추면 RAG 경로에서만 유사 질문 조회)
+    "similarity_threshold": 1.0
+}
+
+# 의도 라우터 설정 (확정하지 못한 질문만 ReAct 에이전트로 처리)
+ROUTER_CONFIG = {
+    "enabled": True,
+    "examples_path": "data/router_examples.jsonl",  # 추가 학습 예문 ({"text": ..., "route": ...} JSONL)
+    "confidence_threshold": 0.8,  # 분류기로 라우트를 확정할 최소 확률
+    "fan_out_min_score": 0.25,  # 여러 출처를 함께 조회할 때 포함할 라우트의 최소 분류기 확률
+    "fan_out_max_routes": 3  # 한 질문에 대해 동시에 조회할 최대 출처 수
+}
+
+# GraphSuperAgent 설정
+GRAPH_CONFIG = {
+    "fan_out": True,  # 여러 출처가 필요한 질문은 서브 에이전트를 병렬 분기로 실행한 뒤 결과를 합침
+    "branch_timeout_seconds": 30  # 병렬 분기 제한 시간 (넘으면 해당 출처를 빼고 답변, 쓰기일 수 있는 DB 분기는 제외)
+}
+
+# /compare/chat 설정
+COMPARE_CONFIG = {
+    "deadline_seconds": 60  # 두 에이전트에 함께 적용되는 요청당 제한 시간 (넘으면 끝난 쪽 결과만 반환)
+}
+
+# 트레이싱/메트릭 설정
+TRACING_CONFIG = {
+    "enabled": True,
+    "service_name": "prompt_demo",
+    "export_path": "data/traces/spans.jsonl",  # OTLP/JSON 형식 스팬 파일 (빈 값이면 파일로 내보내지 않음)
+    "export_batch_size": 256,  # 한 줄(ExportTraceServiceRequest)에 담을 최대 스팬 수
+    "export_max_queue": 10000,  # 내보내기 대기 스팬 수 (넘으면 버림)
+    "export_max_file_bytes": 50 * 1024 * 1024,  # 넘으면 spans.jsonl.1로 교체
+    "max_attribute_length": 500,  # 스팬 속성 문자열 최대 길이
+    "latency_buckets": [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]  # /metrics 히스토그램 구간(초)
+}
+
+# 로그 설정 (DEBUG이면 에이전트의 도구 호출/최종 응답을 기록, AgentExecutor의 verbose 출력 대체)
+LOGGING_CONFIG = {
+    "level": os.getenv("AI_LOG_LEVEL", "WARNING")
+}
+
 # 필요한 디렉토리 생성
 os.makedirs(RAG_CONFIG["vector_store_path"], exist_ok=True)
 os.makedirs(RAG_CONFIG["documents_path"], exist_ok=True) 
\ No newline at end of file
@@ -1,55 +1,60 @@
-from typing import List, Dict, Any
+from typing import Annotated, AsyncIterator, List, Dict, Any, Optional, Tuple, TypedDict
 from langchain_core.messages import HumanMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.tools import Tool
 from langchain.schema import Document
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolExecutor
-import operator
+import asyncio
+import os
+
+from ai.config import DEFAULT_MODEL, GRAPH_CONFIG, ROUTER_CONFIG
+from ai.registry import (
+    ause_rag_tool, get_llm, get_db_agent, get_doc_agent, get_search_agent, get_rag_tool, get_intent_router,
+    use_rag_tool
+)
+from ai.router import IDEMPOTENT_ROUTES, ROUTES
+from ai.singleflight import SingleFlight
+from ai.tracing import start_span
+from ai.usage import record_cache_hit, record_tool_call
+
+# 도구 실행 이벤트에 표시할 라우트별 도구 이름 (일반 LLM 경로는 도구가 아님)
+ROUTE_TOOLS = {"rag": "문서_검색(RAG)", "db": "DB_작업", "doc": "문서_분석", "search": "정보_검색"}
+# 결과를 합칠 때 프롬프트에 표시할 출처 이름
+SOURCE_LABELS = {"rag": "저장된 문서", "db": "데이터베이스", "doc": "문서 분석", "search": "웹 검색", "llm": "일반 답변"}
+
+
+def _merge_results(left: Dict[str, Optional[str]], right: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+    """병렬 분기가 각자 쓴 결과를 합치는 리듀서"""
+    return {**left, **right}
+
+
+class GraphState(TypedDict, total=False):
+    message: str
+    routes: List[str]
+    # 라우트별 분기 결과 (제한 시간 초과/실패한 분기는 None)
+    results: Annotated[Dict[str, Optional[str]], _merge_results]
+    response: str
 
-from ai.config import DEFAULT_MODEL
-from ai.agents.db_agent import DBAgent
-from ai.agents.document_agent import DocumentAnalysisAgent
-from ai.agents.search_agent import SearchAgent
-from ai.agents.rag_agent import RAGTool
 
 class GraphSuperAgent:
     def __init__(self, model_name: str = DEFAULT_MODEL):
-        self.llm = ChatGoogleGenerativeAI(model=model_name)
-        
-        # 서브 에이전트들 초기화
-        self.db_agent = DBAgent(self.llm)
-        self.doc_agent = DocumentAnalysisAgent(self.llm)
-        self.search_agent = SearchAgent(self.llm)
-        self.rag_tool = RAGTool()
+        self.llm = get_llm(model_name)
         
-        # 도구 설정
-        self.tools = [
-            Tool(
-                name="DB_작업",
-                func=self.db_agent.run,
-                description="데이터베이스 관련 작업이 필요할 때 사용"
-            ),
-            Tool(
-                name="문서_분석",
-                func=self.doc_agent.run,
-                description="문서를 읽고 분석해야 할 때 사용"
-            ),
-            Tool(
-                name="정보_검색",
-                func=self.search_agent.run,
-                description="웹에서 정보를 검색해야 할 때 사용"
-            ),
-            Tool(
-                name="문서_검색(RAG)",
-                func=self.rag_tool._run,
-                description="저장된 문서에서 관련 정보를 검색할 때 사용"
-            )
-        ]
+        # 서브 에이전트들은 레지스트리에서 공유 인스턴스를 가져옴
+        self.db_agent = get_db_agent(model_name)
+        self.doc_agent = get_doc_agent(model_name)
+        self.search_agent = get_search_agent(model_name)
+        self.sub_agents = {"db": self.db_agent, "doc": self.doc_agent, "search": self.search_agent}
+        # SuperAgent와 같은 의도 라우터를 공유
+        self.router = get_intent_router()
         
-        self.tool_executor = ToolExecutor(self.tools)
+        # 동시에 들어온 같은 질문은 워크플로우를 한 번만 실행
+        self._flight = SingleFlight()
         self.workflow = self._create_workflow()
 
+    @property
+    def rag_tool(self):
+        """현재 요청의 컬렉션에 해당하는 RAG 도구"""
+        return get_rag_tool()
+
     def _create_workflow(self) -> StateGraph:
         """
         LangGraph 워크플로우 생성
@@ -58,113 +63,208 @@ class GraphSuperAgent:
         # 1. StateGraph를 사용하여 명시적인 상태 관리와 전환을 정의
         #    - LangChain은 단순 체이닝 방식이지만, LangGraph는 상태 기반 워크플로우
         # 2. 비동기 실행 지원이 더 체계적
-        # 3. 조건부 라우팅이 더 유연함 (operator.eq 등을 통한 엣지 조건 설정)
+        # 3. 조건부 라우팅이 더 유연함 (라우팅 함수가 여러 노드를 돌려주면 병렬 분기로 실행)
         # 4. 워크플로우의 시각화 및 디버깅이 용이
         """
-        workflow = StateGraph(StateType=Dict)
-
-        # route_message 함수는 상태 기반으로 다음 노드 결정
-        # LangChain의 단순 체이닝과 달리, 상태에 따라 동적 라우팅 가능
-        def route_message(state: Dict) -> str:
-            message = state["message"]
-            
-            # RAG 키워드 확인
-            rag_keywords = ["찾아줘", "검색해줘", "관련 정보", "문서에서", "문서 검색"]
-            if any(keyword in message for keyword in rag_keywords):
-                return "use_rag"
-            
-            # 다른 키워드 기반 라우팅
-            if "데이터베이스" in message or "DB" in message:
-                return "use_db"
-            elif "문서" in message or "파일" in message:
-                return "use_doc"
-            elif "검색" in message:
-                return "use_search"
-            
-            return "use_llm"
-
-        # 각 노드는 상태를 입력받고 수정된 상태를 반환
+        workflow = StateGraph(GraphState)
+
+        # 각 노드는 상태를 입력받고 갱신할 필드를 반환
         # LangGraph의 특징: 상태 객체를 통한 데이터 흐름 관리
-        async def use_rag(state: Dict) -> Dict:
-            context = await self.rag_tool._run(state["message"])
-            response = await self.llm.ainvoke(
-                [HumanMessage(content=f"다음 컨텍스트를 기반으로 답변해주세요:\n\n{context}\n\n질문: {state['message']}")]
-            )
-            state["response"] = response.content
-            return state
-
-        async def use_db(state: Dict) -> Dict:
-            result = await self.db_agent.run(state["message"])
-            state["response"] = result
-            return state
-
-        async def use_doc(state: Dict) -> Dict:
-            result = await self.doc_agent.run(state["message"])
-            state["response"] = result
-            return state
-
-        async def use_search(state: Dict) -> Dict:
-            result = await self.search_agent.run(state["message"])
-            state["response"] = result
-            return state
-
-        async def use_llm(state: Dict) -> Dict:
-            response = await self.llm.ainvoke(
-                [HumanMessage(content=state["message"])]
-            )
-            state["response"] = response.content
-            return state
+        async def router(state: GraphState) -> Dict:
+            if state.get("routes"):
+                # run에서 이미 라우팅한 경우
+                return {}
+            return {"routes": self.route_message(state)}
+
+        def make_branch(route: str):
+            async def branch(state: GraphState) -> Dict:
+                fan_out = len(state["routes"]) > 1
+                return {"results": {route: await self._run_branch(route, state["message"], fan_out)}}
+            return branch
+
+        async def merge(state: GraphState) -> Dict:
+            response, prompt = self._compose(state["message"], state["results"])
+            if response is None:
+                response = (await self.llm.ainvoke([HumanMessage(content=prompt)])).content
+            return {"response": response}
 
         # 워크플로우 구성
         # LangGraph의 특징: 명시적인 노드와 엣지 정의
-        workflow.add_node("router", route_message)
-        workflow.add_node("rag", use_rag)
-        workflow.add_node("db", use_db)
-        workflow.add_node("doc", use_doc)
-        workflow.add_node("search", use_search)
-        workflow.add_node("llm", use_llm)
-
-        # 조건부 엣지 연결 - LangGraph의 강력한 기능
-        workflow.add_edge("router", "rag", condition=operator.eq("use_rag"))
-        workflow.add_edge("router", "db", condition=operator.eq("use_db"))
-        workflow.add_edge("router", "doc", condition=operator.eq("use_doc"))
-        workflow.add_edge("router", "search", condition=operator.eq("use_search"))
-        workflow.add_edge("router", "llm", condition=operator.eq("use_llm"))
-
-        # 종료 조건
-        workflow.add_edge("rag", END)
-        workflow.add_edge("db", END)
-        workflow.add_edge("doc", END)
-        workflow.add_edge("search", END)
-        workflow.add_edge("llm", END)
+        workflow.add_node("router", router)
+        for route in ROUTES:
+            workflow.add_node(route, make_branch(route))
+            # 같은 단계에서 실행된 분기가 모두 끝나야 merge가 실행됨
+            workflow.add_edge(route, "merge")
+        workflow.add_node("merge", merge)
+
+        # 조건부 엣지 - 선택된 노드가 여러 개면 병렬로 실행
+        workflow.add_conditional_edges("router", lambda state: state["routes"], {route: route for route in ROUTES})
+        workflow.add_edge("merge", END)
 
         workflow.set_entry_point("router")
         
         return workflow.compile()
 
+    # route_message 함수는 상태 기반으로 다음 노드 결정
+    # LangChain의 단순 체이닝과 달리, 상태에 따라 동적 라우팅 가능
+    def route_message(self, state: Dict) -> List[str]:
+        """실행할 노드 목록을 반환합니다. fan_out이 켜져 있으면 여러 출처를 함께 고를 수 있습니다."""
+        with start_span("route") as span:
+            routes = self._select_routes(state)
+            span.set("route", ",".join(routes))
+        return routes
+
+    def _select_routes(self, state: Dict) -> List[str]:
+        message = state["message"]
+        if GRAPH_CONFIG["fan_out"]:
+            return self.router.select(message, max_routes=ROUTER_CONFIG["fan_out_max_routes"])
+        
+        decision = self.router.route(message)
+        # 규칙이 여러 경로를 가리키면 가장 많이 일치한 경로를, 분류기가 확신하지 못하면 일반 LLM을 사용
+        if decision["route"] and (decision["confident"] or decision["source"] == "keyword"):
+            return [decision["route"]]
+        return ["llm"]
+
+    async def _call_source(self, route: str, message: str) -> str:
+        """라우트 하나를 실행합니다. RAG는 답변 대신 검색된 컨텍스트를 반환합니다."""
+        if route in ROUTE_TOOLS:
+            record_tool_call(ROUTE_TOOLS[route])
+        if route == "rag":
+            return await self.rag_tool._arun(message)
+        if route == "llm":
+            return (await self.llm.ainvoke([HumanMessage(content=message)])).content
+        return await self.sub_agents[route].arun(message)
+
+    async def _run_branch(self, route: str, message: str, fan_out: bool) -> Optional[str]:
+        """병렬 분기에서는 제한 시간을 넘기거나 실패한 출처를 None으로 돌려 답변에서 제외합니다.
+
+        DB 분기는 쓰기일 수 있어 취소해도 스레드의 SQL은 계속 실행되므로 제한 시간 없이 기다립니다.
+        """
+        if not fan_out:
+            return await self._call_source(route, message)
+        timeout = GRAPH_CONFIG["branch_timeout_seconds"] if route in IDEMPOTENT_ROUTES else None
+        try:
+            return await asyncio.wait_for(self._call_source(route, message), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"Warning: {route} 분기가 {timeout}초 안에 끝나지 않아 제외합니다.")
+        except Exception as e:
+            print(f"Warning: {route} 분기 실행 중 오류 발생 - {str(e)}")
+        return None
+
+    async def _labelled_branch(self, route: str, message: str, fan_out: bool) -> Tuple[str, Optional[str]]:
+        return route, await self._run_branch(route, message, fan_out)
+
+    def _compose(self, message: str, results: Dict[str, Optional[str]]) -> Tuple[Optional[str], Optional[str]]:
+        """분기 결과로 (바로 돌려줄 응답, LLM에 보낼 프롬프트) 중 하나를 만듭니다."""
+        available = {route: output for route, output in results.items() if output}
+        if not available:
+            # 모든 출처가 제외되면 일반 LLM 답변으로 대체
+            return None, message
+        if len(available) == 1:
+            route, output = next(iter(available.items()))
+            if route == "rag":
+                return None, self._rag_prompt(message, output)
+            return output, None
+        return None, self._merge_prompt(message, available)
+
+    def _rag_prompt(self, message: str, context: str) -> str:
+        return f"다음 컨텍스트를 기반으로 답변해주세요:\n\n{context}\n\n질문: {message}"
+
+    def _merge_prompt(self, message: str, results: Dict[str, str]) -> str:
+        sections = "\n\n".join(
+            f"[{SOURCE_LABELS[route]}]\n{output}" for route, output in results.items()
+        )
+        return (
+            "다음은 여러 출처에서 수집한 정보입니다. 이를 종합해 질문에 대한 하나의 답변을 작성해주세요. "
+            "출처끼리 내용이 다르면 그 차이를 함께 설명해주세요.\n\n"
+            f"{sections}\n\n질문: {message}"
+        )
+
+    async def stream(self, input_text: str) -> AsyncIterator[Dict]:
+        """run의 스트리밍 버전으로, 라우팅/도구 실행 이벤트와 응답 토큰을 차례로 돌려줍니다."""
+        try:
+            async with ause_rag_tool():
+                async for event in self._stream(input_text):
+                    yield event
+        except Exception as e:
+            yield {"type": "error", "message": f"죄송합니다. 오류가 발생했습니다: {str(e)}"}
+
+    async def _stream(self, input_text: str) -> AsyncIterator[Dict]:
+        routes = self.route_message({"message": input_text})
+        yield {"type": "route", "routes": routes}
+        
+        # 일반 LLM 경로는 분기 없이 아래에서 바로 토큰을 스트리밍
+        branches = [route for route in routes if route != "llm"]
+        fan_out = len(routes) > 1
+        for route in branches:
+            yield {"type": "tool_start", "tool": ROUTE_TOOLS[route], "input": input_text}
+        
+        # 분기는 동시에 실행하고 끝나는 순서대로 결과 이벤트를 보냄
+        tasks = [asyncio.ensure_future(self._labelled_branch(route, input_text, fan_out)) for route in branches]
+        results: Dict[str, Optional[str]] = {}
+        try:
+            for done in asyncio.as_completed(tasks):
+                route, output = await done
+                results[route] = output
+                yield {"type": "tool_end", "tool": ROUTE_TOOLS[route], "output": output}
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        response, prompt = self._compose(input_text, results)
+        if response is None:
+            tokens = []
+            async for chunk in self.llm.astream([HumanMessage(content=prompt)]):
+                if chunk.content:
+                    tokens.append(chunk.content)
+                    yield {"type": "token", "content": chunk.content}
+            response = "".join(tokens)
+        else:
+            yield {"type": "token", "content": response}
+        
+        yield {"type": "done", "response": response}
+
     async def run(self, input_text: str) -> str:
         """메시지 처리 및 응답 생성"""
         try:
-            config = {"message": input_text}
-            result = await self.workflow.ainvoke(config)
+            # 컬렉션을 처음 여는 작업은 스레드에서 하고, 처리하는 동안 메모리에서 내려가지 않게 붙잡아 둠
+            async with ause_rag_tool() as rag_tool:
+                routes = self.route_message({"message": input_text})
+                config = {"message": input_text, "routes": routes, "results": {}}
+                if not all(route in IDEMPOTENT_ROUTES for route in routes):
+                    # DB 쓰기일 수 있는 요청은 합치지 않고 매번 실행
+                    result = await self.workflow.ainvoke(config)
+                else:
+                    key = (input_text, rag_tool.collection)
+                    if self._flight.in_flight(key):
+                        record_cache_hit()
+                    result = await self._flight.ado(key, self.workflow.ainvoke, config)
             return result["response"]
         except Exception as e:
             return f"죄송합니다. 오류가 발생했습니다: {str(e)}"
 
-    def initialize_rag(self, documents: List[Document]):
+    def initialize_rag(self, documents: List[Document], collection: Optional[str] = None):
         """RAG 도구 초기화"""
-        self.rag_tool.initialize_vector_store(documents)
-
-    async def load_all_documents(self):
-        """모든 문서를 로드하고 RAG 시스템을 초기화합니다."""
-        documents = self.rag_tool.load_documents()
-        if documents:
-            self.rag_tool.initialize_vector_store(documents)
-            return f"{len(documents)}개의 문서가 로드되었습니다."
+        with use_rag_tool(collection) as rag_tool:
+            rag_tool.initialize_vector_store(documents)
+
+    async def load_all_documents(self, collection: Optional[str] = None):
+        """컬렉션의 모든 문서를 로드하고 RAG 시스템을 초기화합니다."""
+        async with ause_rag_tool(collection) as rag_tool:
+            stats = await rag_tool.async_sync_documents()
+        if stats["files"] or stats["deleted"]:
+            return (
+                f"{stats['files']}개의 문서가 동기화되었습니다. "
+                f"(변경 {stats['indexed']}개, 유지 {stats['unchanged']}개, 삭제 {stats['deleted']}개, "
+                f"청크 추가 {stats['chunks_added']}개, 청크 제거 {stats['chunks_removed']}개, "
+                f"{stats['chunks_per_sec']} chunks/sec)"
+            )
         return "로드할 문서가 없습니다."
 
-    async def add_document(self, file_path: str):
-        """새로운 문서를 추가합니다."""
-        if self.rag_tool.add_document(file_path):
+    async def add_document(self, file_path: str, collection: Optional[str] = None):
+        """컬렉션에 새로운 문서를 추가합니다."""
+        async with ause_rag_tool(collection) as rag_tool:
+            added = await asyncio.to_thread(rag_tool.add_document, file_path)
+        if added:
             return f"{os.path.basename(file_path)}가 성공적으로 추가되었습니다."
         return "문서 추가에 실패했습니다." 
\ No newline at end of file
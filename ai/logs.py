@@ -0,0 +1,33 @@
+import logging
+from typing import Any, List
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from ai.config import LOGGING_CONFIG
+
+logger = logging.getLogger("ai")
+logger.setLevel(LOGGING_CONFIG["level"])
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s - %(message)s"))
+    logger.addHandler(_handler)
+
+agent_logger = logging.getLogger("ai.agents")
+rag_logger = logging.getLogger("ai.rag")
+
+
+class AgentLogHandler(BaseCallbackHandler):
+    """에이전트가 고른 도구와 최종 응답을 DEBUG 로그로 남깁니다."""
+
+    run_inline = True
+
+    def on_agent_action(self, action, **kwargs: Any):
+        agent_logger.debug("도구 호출: %s(%s)\n%s", action.tool, action.tool_input, action.log)
+
+    def on_agent_finish(self, finish, **kwargs: Any):
+        agent_logger.debug("최종 응답: %s", finish.return_values.get("output"))
+
+
+def agent_callbacks() -> List[BaseCallbackHandler]:
+    """AgentExecutor에 붙일 로그 콜백 (DEBUG가 꺼져 있으면 핸들러를 붙이지 않아 비용이 없음)"""
+    return [AgentLogHandler()] if agent_logger.isEnabledFor(logging.DEBUG) else []
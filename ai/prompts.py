@@ -0,0 +1,42 @@
+from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
+
+# hub.pull("hwchase17/react")와 동일한 ReAct 프롬프트
+# 에이전트를 만들 때마다 네트워크로 받아오지 않도록 저장소에 포함
+REACT_TEMPLATE = """Answer the following questions as best you can. You have access to the following tools:
+
+{tools}
+
+Use the following format:
+
+Question: the input question you must answer
+Thought: you should always think about what to do
+Action: the action to take, should be one of [{tool_names}]
+Action Input: the input to the action
+Observation: the result of the action
+... (this Thought/Action/Action Input/Observation can repeat N times)
+Thought: I now know the final answer
+Final Answer: the final answer to the original input question
+
+Begin!
+
+Question: {input}
+Thought:{agent_scratchpad}"""
+
+REACT_PROMPT = PromptTemplate.from_template(REACT_TEMPLATE)
+
+# 캐시된 SQL을 다시 실행한 결과를 에이전트의 최종 답변처럼 자연어로 정리하는 프롬프트
+SQL_ANSWER_TEMPLATE = """Given the user question, the SQL query that answers it and the query result, answer the question in the same language as the question. Do not mention the SQL query.
+
+Question: {question}
+SQL Query: {query}
+SQL Result: {result}
+Answer:"""
+
+SQL_ANSWER_PROMPT = PromptTemplate.from_template(SQL_ANSWER_TEMPLATE)
+
+# 슈퍼 에이전트가 라우터 경로(RAG/직접 LLM)에서 답변을 만들 때 쓰는 프롬프트
+RESPONSE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "당신은 도움이 되는 AI 어시스턴트입니다. 주어진 컨텍스트를 기반으로 정확하고 도움되는 답변을 제공합니다."),
+    # 사용자 입력의 중괄호가 템플릿 변수로 해석되지 않도록 변수로 전달
+    ("user", "{prompt}")
+])
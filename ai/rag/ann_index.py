@@ -0,0 +1,298 @@
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """내적이 코사인 유사도가 되도록 각 행을 단위 벡터로 만듭니다."""
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class ANNIndex(ABC):
+    """로컬 근사 최근접 이웃(HNSW) 인덱스의 공통 부분
+
+    청크 ID(문자열)와 인덱스 내부의 정수 라벨을 매핑하고, 인덱스 파일과 매핑을
+    path 디렉토리에 저장합니다. 벡터는 정규화하여 내적(=코사인 유사도)으로 검색합니다.
+    """
+
+    index_file = "index.bin"
+    labels_file = "labels.json"
+
+    def __init__(self, path: str, m: int, ef_construction: int, ef_search: int):
+        self.path = path
+        self.m = m
+        self.ef_construction = ef_construction
+        self._ef_search = ef_search
+        self.dim: Optional[int] = None
+        self.labels: Dict[str, int] = {}
+        self.ids: Dict[int, str] = {}
+        self.next_label = 0
+        self.index = None
+        self._lock = threading.RLock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @property
+    def ef_search(self) -> int:
+        return self._ef_search
+
+    @ef_search.setter
+    def ef_search(self, value: int):
+        with self._lock:
+            self._ef_search = value
+            if self.index is not None:
+                self._apply_ef_search()
+
+    def _load(self):
+        labels_path = os.path.join(self.path, self.labels_file)
+        index_path = os.path.join(self.path, self.index_file)
+        if not (os.path.exists(labels_path) and os.path.exists(index_path)):
+            return
+        try:
+            with open(labels_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.dim = state["dim"]
+            self.next_label = state["next_label"]
+            self.labels = state["labels"]
+            self.ids = {label: chunk_id for chunk_id, label in self.labels.items()}
+            self._load_index(index_path, state)
+        except (OSError, ValueError, KeyError, RuntimeError) as e:
+            # 인덱스를 읽을 수 없으면 빈 인덱스에서 다시 구축
+            print(f"Warning: ANN 인덱스 로딩 중 오류 발생 - {str(e)}")
+            self.dim, self.next_label, self.index = None, 0, None
+            self.labels, self.ids = {}, {}
+
+    def _state(self) -> Dict:
+        return {"dim": self.dim, "next_label": self.next_label, "labels": self.labels}
+
+    def add(self, ids: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """청크를 추가합니다. 이미 있는 ID는 새 벡터로 교체합니다."""
+        if not ids:
+            return
+        matrix = normalize_rows(vectors)
+        with self._lock:
+            if self.index is None:
+                self.dim = matrix.shape[1]
+                self._create_index()
+            self.remove([chunk_id for chunk_id in ids if chunk_id in self.labels])
+            labels = np.arange(self.next_label, self.next_label + len(ids), dtype=np.int64)
+            self.next_label += len(ids)
+            self._add_items(matrix, labels)
+            for chunk_id, label in zip(ids, labels):
+                self.labels[chunk_id] = int(label)
+                self.ids[int(label)] = chunk_id
+
+    def remove(self, ids: Sequence[str]):
+        with self._lock:
+            labels = [self.labels.pop(chunk_id) for chunk_id in ids if chunk_id in self.labels]
+            for label in labels:
+                del self.ids[label]
+            if labels:
+                self._remove_items(labels)
+
+    def search(self, vector: Sequence[float], k: int) -> List[Tuple[str, float]]:
+        """쿼리 벡터와 가장 가까운 청크 k개의 (ID, 코사인 유사도)를 반환합니다."""
+        with self._lock:
+            if self.index is None or not self.labels:
+                return []
+            k = min(k, len(self.labels))
+            hits = self._search(normalize_rows(vector), k)
+            return [(self.ids[label], score) for label, score in hits if label in self.ids][:k]
+
+    def save(self):
+        """인덱스와 라벨 매핑을 임시 파일에 쓴 뒤 교체하여 저장합니다."""
+        with self._lock:
+            if self.index is None:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            index_path = os.path.join(self.path, self.index_file)
+            self._save_index(f"{index_path}.tmp")
+            os.replace(f"{index_path}.tmp", index_path)
+
+            labels_path = os.path.join(self.path, self.labels_file)
+            with open(f"{labels_path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(self._state(), f)
+            os.replace(f"{labels_path}.tmp", labels_path)
+
+    # 백엔드별 구현
+    @abstractmethod
+    def _create_index(self):
+        """self.dim 차원의 빈 인덱스를 self.index에 만듭니다."""
+
+    @abstractmethod
+    def _load_index(self, index_path: str, state: Dict):
+        """저장된 인덱스 파일을 self.index로 읽어 들입니다."""
+
+    @abstractmethod
+    def _save_index(self, index_path: str):
+        """self.index를 index_path에 씁니다."""
+
+    @abstractmethod
+    def _apply_ef_search(self):
+        """self._ef_search를 인덱스의 검색 파라미터에 반영합니다."""
+
+    @abstractmethod
+    def _add_items(self, matrix: np.ndarray, labels: np.ndarray):
+        """정규화된 벡터들을 주어진 정수 라벨로 추가합니다."""
+
+    @abstractmethod
+    def _remove_items(self, labels: List[int]):
+        """라벨들을 검색 결과에서 제외합니다."""
+
+    @abstractmethod
+    def _search(self, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """(라벨, 내적) 목록을 유사도 순으로 반환합니다."""
+
+
+class HnswlibIndex(ANNIndex):
+    """hnswlib 기반 인덱스. 삭제된 라벨의 자리는 새 항목이 재사용합니다."""
+
+    def __init__(self, *args, **kwargs):
+        import hnswlib
+        self._hnswlib = hnswlib
+        super().__init__(*args, **kwargs)
+
+    def _new_index(self):
+        return self._hnswlib.Index(space="ip", dim=self.dim)
+
+    def _create_index(self):
+        self.index = self._new_index()
+        self.index.init_index(
+            max_elements=1024, ef_construction=self.ef_construction, M=self.m,
+            allow_replace_deleted=True
+        )
+        self._apply_ef_search()
+
+    def _load_index(self, index_path: str, state: Dict):
+        self.index = self._new_index()
+        self.index.load_index(index_path, allow_replace_deleted=True)
+        self._apply_ef_search()
+
+    def _save_index(self, index_path: str):
+        self.index.save_index(index_path)
+
+    def _apply_ef_search(self):
+        self.index.set_ef(self._ef_search)
+
+    def _add_items(self, matrix: np.ndarray, labels: np.ndarray):
+        needed = self.index.get_current_count() + len(labels)
+        if needed > self.index.get_max_elements():
+            self.index.resize_index(max(needed, self.index.get_max_elements() * 2))
+        self.index.add_items(matrix, labels, replace_deleted=True)
+
+    def _remove_items(self, labels: List[int]):
+        for label in labels:
+            self.index.mark_deleted(label)
+
+    def _search(self, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        labels, distances = self.index.knn_query(query, k=k)
+        # ip 공간의 거리는 1 - 내적
+        return [(int(label), 1.0 - float(distance)) for label, distance in zip(labels[0], distances[0])]
+
+
+class FaissIndex(ANNIndex):
+    """faiss IndexHNSWFlat 기반 인덱스
+
+    저장된 인덱스는 메모리 맵으로 열어 검색하고, 처음 수정할 때만 메모리로 읽어
+    들입니다. HNSW는 개별 삭제를 지원하지 않으므로 삭제된 라벨은 묘비로 걸러내고,
+    묘비가 살아 있는 항목보다 많아지면 저장 시 인덱스를 다시 구축합니다.
+    """
+
+    def __init__(self, *args, **kwargs):
+        import faiss
+        self._faiss = faiss
+        self.tombstones: set = set()
+        self._mmapped = False
+        super().__init__(*args, **kwargs)
+
+    def _state(self) -> Dict:
+        state = super()._state()
+        state["tombstones"] = sorted(self.tombstones)
+        return state
+
+    def _create_index(self):
+        hnsw = self._faiss.IndexHNSWFlat(self.dim, self.m, self._faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efConstruction = self.ef_construction
+        self.index = self._faiss.IndexIDMap2(hnsw)
+        self._apply_ef_search()
+
+    def _load_index(self, index_path: str, state: Dict):
+        try:
+            self.index = self._faiss.read_index(index_path, self._faiss.IO_FLAG_MMAP)
+            self._mmapped = True
+        except RuntimeError:
+            # 메모리 맵을 지원하지 않는 faiss 버전은 전체를 읽어 들임
+            self.index = self._faiss.read_index(index_path)
+        self.tombstones = set(state.get("tombstones", []))
+        self._apply_ef_search()
+
+    def _writable(self):
+        if self._mmapped:
+            self.index = self._faiss.read_index(os.path.join(self.path, self.index_file))
+            self._mmapped = False
+            self._apply_ef_search()
+
+    def _save_index(self, index_path: str):
+        if self.tombstones and len(self.tombstones) > len(self.labels):
+            self._rebuild()
+        self._faiss.write_index(self.index, index_path)
+
+    def _rebuild(self):
+        """살아 있는 항목만으로 인덱스를 다시 만들어 묘비를 정리합니다."""
+        self._writable()
+        labels = np.array(sorted(self.labels.values()), dtype=np.int64)
+        vectors = np.stack([self.index.reconstruct(int(label)) for label in labels]) if len(labels) else None
+        self._create_index()
+        self.tombstones.clear()
+        if vectors is not None:
+            self.index.add_with_ids(vectors, labels)
+
+    def _apply_ef_search(self):
+        self._faiss.downcast_index(self.index.index).hnsw.efSearch = self._ef_search
+
+    def _add_items(self, matrix: np.ndarray, labels: np.ndarray):
+        self._writable()
+        self.index.add_with_ids(matrix, labels)
+
+    def _remove_items(self, labels: List[int]):
+        self.tombstones.update(labels)
+
+    def _search(self, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        # 묘비로 걸러질 항목만큼 더 가져옴
+        fetch = min(k + len(self.tombstones), self.index.ntotal)
+        scores, labels = self.index.search(query, fetch)
+        return [
+            (int(label), float(score)) for label, score in zip(labels[0], scores[0])
+            if label >= 0 and label not in self.tombstones
+        ]
+
+
+ANN_BACKENDS = {
+    "hnswlib": HnswlibIndex,
+    "faiss": FaissIndex,
+}
+
+
+def create_ann_index(backend: str, path: str, m: int, ef_construction: int,
+                     ef_search: int) -> Optional[ANNIndex]:
+    """설정된 로컬 ANN 백엔드를 생성합니다.
+
+    "chroma"이거나 라이브러리가 설치되어 있지 않으면 None을 반환하며, 이 경우
+    Chroma 컬렉션의 내장 HNSW 인덱스로 검색합니다.
+    """
+    if backend not in ANN_BACKENDS:
+        return None
+    try:
+        return ANN_BACKENDS[backend](path, m=m, ef_construction=ef_construction, ef_search=ef_search)
+    except ImportError:
+        print(f"Warning: {backend}가 설치되지 않아 Chroma 인덱스로 검색합니다.")
+        return None
@@ -0,0 +1,130 @@
+"""로컬 ANN 인덱스의 재현율과 검색 지연 시간을 측정합니다.
+
+사용 예:
+    python -m ai.rag.benchmark --backend hnswlib --n 100000 --dim 768 --ef-search 16,32,64,128
+    python -m ai.rag.benchmark --backend faiss --from-store
+"""
+import argparse
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ai.config import RAG_CONFIG
+from ai.rag.ann_index import ANN_BACKENDS, normalize_rows
+from ai.rag.collections import collection_paths, validate_collection_name
+from ai.rag.snapshots import SnapshotStore
+
+
+def brute_force_top_k(vectors: np.ndarray, queries: np.ndarray, k: int, block_size: int = 256) -> np.ndarray:
+    """정확한 코사인 유사도 top-k 라벨을 계산합니다 (정답 기준)."""
+    results = []
+    for start in range(0, len(queries), block_size):
+        scores = queries[start:start + block_size] @ vectors.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        results.append(np.take_along_axis(top, order, axis=1))
+    return np.vstack(results)
+
+
+def _percentiles(latencies: List[float]) -> Dict[str, float]:
+    millis = np.asarray(latencies) * 1000
+    return {"p50_ms": round(float(np.percentile(millis, 50)), 3),
+            "p99_ms": round(float(np.percentile(millis, 99)), 3)}
+
+
+def run_benchmark(backend: str, vectors: np.ndarray, queries: np.ndarray, k: int,
+                  ef_search_values: List[int], m: Optional[int] = None,
+                  ef_construction: Optional[int] = None) -> List[Dict]:
+    """ef_search 값별로 recall@k와 쿼리당 p50/p99 지연 시간을 측정합니다."""
+    vectors = normalize_rows(vectors)
+    queries = normalize_rows(queries)
+    ids = [str(i) for i in range(len(vectors))]
+
+    rows = []
+    latencies = []
+    truth = []
+    for query in queries:
+        started = time.perf_counter()
+        truth.append(brute_force_top_k(vectors, query[None, :], k)[0])
+        latencies.append(time.perf_counter() - started)
+    rows.append({"index": "brute_force", "recall_at_k": 1.0, **_percentiles(latencies)})
+
+    with tempfile.TemporaryDirectory() as path:
+        index = ANN_BACKENDS[backend](
+            path,
+            m=m or RAG_CONFIG["hnsw_m"],
+            ef_construction=ef_construction or RAG_CONFIG["hnsw_ef_construction"],
+            ef_search=ef_search_values[0]
+        )
+        started = time.perf_counter()
+        index.add(ids, vectors)
+        build_seconds = round(time.perf_counter() - started, 3)
+
+        for ef_search in ef_search_values:
+            index.ef_search = max(ef_search, k)
+            latencies = []
+            hits = 0
+            for query, expected in zip(queries, truth):
+                started = time.perf_counter()
+                found = index.search(query, k)
+                latencies.append(time.perf_counter() - started)
+                hits += len({int(chunk_id) for chunk_id, _ in found} & set(expected.tolist()))
+            rows.append({
+                "index": f"{backend}(ef_search={index.ef_search})",
+                "recall_at_k": round(hits / (len(queries) * k), 4),
+                "build_seconds": build_seconds,
+                **_percentiles(latencies),
+            })
+    return rows
+
+
+def load_store_vectors(collection: Optional[str] = None) -> np.ndarray:
+    """컬렉션의 현재 스냅샷에 저장된 청크 임베딩을 읽어옵니다."""
+    from langchain_community.vectorstores import Chroma
+    store_path, _ = collection_paths(validate_collection_name(collection))
+    snapshots = SnapshotStore(store_path, RAG_CONFIG["snapshot_keep"])
+    store = Chroma(persist_directory=snapshots.path(snapshots.current()))
+    return np.asarray(store._collection.get(include=["embeddings"])["embeddings"], dtype=np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ANN 인덱스 recall@k / 지연 시간 벤치마크")
+    parser.add_argument("--backend", choices=sorted(ANN_BACKENDS), default="hnswlib")
+    parser.add_argument("--from-store", action="store_true", help="벡터 스토어의 실제 임베딩 사용")
+    parser.add_argument("--collection", help="--from-store로 읽을 컬렉션 (없으면 기본 컬렉션)")
+    parser.add_argument("--n", type=int, default=100000, help="합성 벡터 수")
+    parser.add_argument("--dim", type=int, default=768, help="합성 벡터 차원")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef-search", default="16,32,64,128")
+    parser.add_argument("--m", type=int)
+    parser.add_argument("--ef-construction", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.from_store:
+        vectors = load_store_vectors(args.collection)
+        # 저장된 벡터에 잡음을 섞어 쿼리로 사용
+        picked = vectors[rng.integers(0, len(vectors), size=args.queries)]
+        queries = picked + rng.normal(scale=0.01, size=picked.shape).astype(np.float32)
+    else:
+        vectors = rng.normal(size=(args.n, args.dim)).astype(np.float32)
+        queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+
+    rows = run_benchmark(
+        args.backend, vectors, queries, args.k,
+        [int(value) for value in args.ef_search.split(",")],
+        m=args.m, ef_construction=args.ef_construction
+    )
+
+    print(f"vectors={len(vectors)} queries={len(queries)} k={args.k}")
+    print(f"{'index':<28}{'recall@k':>10}{'p50(ms)':>10}{'p99(ms)':>10}")
+    for row in rows:
+        print(f"{row['index']:<28}{row['recall_at_k']:>10}{row['p50_ms']:>10}{row['p99_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
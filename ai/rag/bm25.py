@@ -0,0 +1,135 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import List, Sequence, Set, Tuple
+
+# 영문/숫자 토큰은 제품 코드(AB-1234, v2.1 등)를 한 덩어리로 유지
+_TOKEN_PATTERN = re.compile(r"[0-9a-z]+(?:[-_./][0-9a-z]+)*|[가-힣]+")
+_CODE_SEPARATORS = re.compile(r"[-_./]")
+
+
+def tokenize(text: str) -> List[str]:
+    """BM25용 토큰을 만듭니다.
+
+    한글 어절은 조사가 붙어 있어 그대로는 잘 일치하지 않으므로 어절과 함께
+    음절 바이그램을 색인하고, 구분자가 있는 코드는 전체와 각 부분을 함께 색인합니다.
+    """
+    tokens = []
+    for word in _TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(word)
+        if "가" <= word[0] <= "힣":
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        elif _CODE_SEPARATORS.search(word):
+            tokens.extend(part for part in _CODE_SEPARATORS.split(word) if part)
+    return tokens
+
+
+class BM25Index:
+    """청크 ID별 역색인을 SQLite에 저장하는 BM25 검색기
+
+    인제스트 시 Chroma 컬렉션과 같은 청크 ID로 함께 갱신됩니다.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " chunk_id TEXT PRIMARY KEY,"
+            " length INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " term TEXT NOT NULL,"
+            " chunk_id TEXT NOT NULL,"
+            " tf INTEGER NOT NULL,"
+            " PRIMARY KEY (term, chunk_id))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_chunk ON postings (chunk_id)")
+        self._conn.commit()
+        self._doc_count, self._total_length = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs"
+        ).fetchone()
+
+    def __len__(self) -> int:
+        return self._doc_count
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def chunk_ids(self) -> Set[str]:
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT chunk_id FROM docs")}
+
+    def add(self, ids: Sequence[str], texts: Sequence[str]):
+        """청크를 색인합니다. 이미 있는 ID는 새 내용으로 교체합니다."""
+        if not ids:
+            return
+        with self._lock:
+            self._delete(ids)
+            docs, postings = [], []
+            for chunk_id, text in zip(ids, texts):
+                counts = Counter(tokenize(text))
+                length = sum(counts.values())
+                docs.append((chunk_id, length))
+                postings.extend((term, chunk_id, tf) for term, tf in counts.items())
+                self._doc_count += 1
+                self._total_length += length
+            self._conn.executemany("INSERT INTO docs (chunk_id, length) VALUES (?, ?)", docs)
+            self._conn.executemany("INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)", postings)
+            self._conn.commit()
+
+    def remove(self, ids: Sequence[str]):
+        if not ids:
+            return
+        with self._lock:
+            self._delete(ids)
+            self._conn.commit()
+
+    def _delete(self, ids: Sequence[str]):
+        for start in range(0, len(ids), 500):
+            batch = list(ids[start:start + 500])
+            placeholders = ",".join("?" * len(batch))
+            count, total = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs WHERE chunk_id IN ({placeholders})",
+                batch,
+            ).fetchone()
+            if not count:
+                continue
+            self._doc_count -= count
+            self._total_length -= total
+            self._conn.execute(f"DELETE FROM docs WHERE chunk_id IN ({placeholders})", batch)
+            self._conn.execute(f"DELETE FROM postings WHERE chunk_id IN ({placeholders})", batch)
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """BM25 점수가 높은 청크 k개의 (ID, 점수)를 반환합니다."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        scores: Counter = Counter()
+        with self._lock:
+            if not self._doc_count:
+                return []
+            avg_length = self._total_length / self._doc_count
+            for term in terms:
+                rows = self._conn.execute(
+                    "SELECT p.chunk_id, p.tf, d.length FROM postings p "
+                    "JOIN docs d ON d.chunk_id = p.chunk_id WHERE p.term = ?",
+                    (term,),
+                ).fetchall()
+                if not rows:
+                    continue
+                idf = math.log(1 + (self._doc_count - len(rows) + 0.5) / (len(rows) + 0.5))
+                for chunk_id, tf, length in rows:
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores.most_common(k)
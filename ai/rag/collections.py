@@ -0,0 +1,181 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ai.config import RAG_CONFIG
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 스레드 간 잠금만 사용
+    fcntl = None
+
+# 현재 요청이 사용할 컬렉션 (None이면 기본 컬렉션)
+current_collection: ContextVar[Optional[str]] = ContextVar("current_collection", default=None)
+
+_COLLECTION_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def validate_collection_name(name: Optional[str]) -> str:
+    """컬렉션 이름을 검사하고, 비어 있으면 기본 컬렉션 이름을 반환합니다."""
+    if not name:
+        return RAG_CONFIG["default_collection"]
+    if not _COLLECTION_NAME.match(name):
+        raise ValueError(f"잘못된 컬렉션 이름입니다: {name} (영문, 숫자, _, - 만 사용 가능)")
+    return name
+
+
+def collection_paths(name: str) -> Tuple[str, str]:
+    """컬렉션의 (벡터 스토어 경로, 문서 경로)를 반환합니다.
+
+    기본 컬렉션은 기존 경로를 그대로 사용합니다.
+    """
+    if name == RAG_CONFIG["default_collection"]:
+        return RAG_CONFIG["vector_store_path"], RAG_CONFIG["documents_path"]
+    return (
+        os.path.join(RAG_CONFIG["vector_store_path"], RAG_CONFIG["collections_dir"], name),
+        os.path.join(RAG_CONFIG["documents_path"], name),
+    )
+
+
+class CollectionWriteLock:
+    """한 컬렉션에 대한 쓰기를 스레드와 프로세스 사이에서 직렬화하는 잠금
+
+    프로세스 간에는 잠금 파일의 flock을 사용하므로, 같은 프로세스 안의 서로 다른
+    RAGTool 인스턴스끼리도 직렬화됩니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    @property
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    def acquire(self):
+        self._lock.acquire()
+        try:
+            self._file = open(self.path, "a")
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        except Exception:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._lock.release()
+            raise
+
+    def release(self):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+        finally:
+            self._file = None
+            self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class CollectionRegistry:
+    """컬렉션별 RAGTool을 처음 요청될 때 생성하고, 오래 쓰지 않으면 메모리에서 내립니다.
+
+    idle_seconds 동안 사용되지 않았거나 max_loaded개를 넘은 컬렉션은 LRU 순으로
+    제거되고 close()가 호출됩니다. acquire로 붙잡은(release 전인) 컬렉션과 쓰기 중인
+    컬렉션은 제거하지 않으며, 제거된 컬렉션은 다음 요청 때 디스크에서 다시 엽니다.
+    """
+
+    def __init__(self, factory: Callable[[str], object], idle_seconds: float, max_loaded: int):
+        self.factory = factory
+        self.idle_seconds = idle_seconds
+        self.max_loaded = max_loaded
+        self._tools: "OrderedDict[str, object]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._refs: Dict[str, int] = {}
+        self._creating: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: Optional[str] = None):
+        return self._get(validate_collection_name(name), acquire=False)
+
+    def acquire(self, name: Optional[str] = None):
+        """get과 같지만 같은 이름으로 release할 때까지 메모리에서 내리지 않습니다."""
+        return self._get(validate_collection_name(name), acquire=True)
+
+    def release(self, name: Optional[str] = None):
+        name = validate_collection_name(name)
+        with self._lock:
+            self._refs[name] -= 1
+            if self._refs[name]:
+                return
+            del self._refs[name]
+            # 사용 중이라 미뤄 둔 제거를 처리
+            evicted = self._evict(time.monotonic())
+        self._close(evicted)
+
+    def _get(self, name: str, acquire: bool):
+        with self._lock:
+            tool = self._tools.get(name)
+            if tool is not None:
+                evicted = self._touch(name, acquire)
+            else:
+                creating = self._creating.setdefault(name, threading.Lock())
+
+        if tool is None:
+            # 컬렉션 로딩은 오래 걸릴 수 있으므로 같은 이름끼리만 기다림
+            with creating:
+                with self._lock:
+                    tool = self._tools.get(name)
+                if tool is None:
+                    tool = self.factory(name)
+                with self._lock:
+                    self._tools[name] = tool
+                    self._creating.pop(name, None)
+                    evicted = self._touch(name, acquire)
+        self._close(evicted)
+        return tool
+
+    def loaded(self):
+        with self._lock:
+            return list(self._tools)
+
+    def _touch(self, name: str, acquire: bool) -> List[object]:
+        now = time.monotonic()
+        self._tools.move_to_end(name)
+        self._last_used[name] = now
+        if acquire:
+            self._refs[name] = self._refs.get(name, 0) + 1
+        return self._evict(now, keep=name)
+
+    def _evict(self, now: float, keep: Optional[str] = None) -> List[object]:
+        """(잠금 안에서) 제거할 컬렉션을 목록에서 빼고 반환합니다. 닫기는 잠금 밖에서 합니다."""
+        evicted = []
+        for name in list(self._tools):
+            if name == keep or name in self._refs or getattr(self._tools[name], "busy", False):
+                continue
+            idle = now - self._last_used[name] > self.idle_seconds
+            if idle or len(self._tools) > self.max_loaded:
+                evicted.append(self._tools.pop(name))
+                del self._last_used[name]
+        return evicted
+
+    @staticmethod
+    def _close(tools: List[object]):
+        for tool in tools:
+            close = getattr(tool, "close", None)
+            if close is None:
+                continue
+            try:
+                close()
+            except Exception as e:
+                print(f"Warning: 컬렉션 정리 중 오류 발생 - {str(e)}")
@@ -0,0 +1,132 @@
+import math
+import os
+import re
+from typing import Dict, List, Optional
+
+from langchain.schema import Document
+
+from ai.rag.bm25 import tokenize
+
+_HANGUL = re.compile(r"[가-힣]")
+_SENTENCE_END = re.compile(r"(?<=[.!?。])\s+|\n+")
+
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 호출 없이 토큰 수를 근사합니다 (한글 약 1.5자, 그 외 약 4자당 1토큰)."""
+    hangul = len(_HANGUL.findall(text))
+    return math.ceil(hangul / 1.5 + (len(text) - hangul) / 4)
+
+
+def _overlap(left: str, right: str, max_overlap: int, min_overlap: int) -> int:
+    """left의 끝과 right의 시작이 겹치는 길이를 찾습니다 (없으면 0)."""
+    for size in range(min(len(left), len(right), max_overlap), min_overlap - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _group_key(doc: Document):
+    return doc.metadata.get("source"), doc.metadata.get("page")
+
+
+class ContextAssembler:
+    """검색된 청크를 중복 제거/병합한 뒤 토큰 예산에 맞춰 컨텍스트로 조립합니다.
+
+    chunk_overlap 때문에 이웃한 청크는 앞뒤 텍스트가 겹치므로, 같은 출처의 청크 중
+    겹치는 것은 하나로 이어 붙이고 다른 청크에 포함된 청크는 버립니다. 블록은 가장
+    관련도가 높은 청크의 순위로 정렬되고, 예산을 넘는 블록은 질문과 관련된 문장만
+    남기도록 압축하거나 잘라냅니다.
+    """
+
+    def __init__(self, max_tokens: int, max_overlap: int, min_overlap: int = 20,
+                 min_block_tokens: int = 50):
+        self.max_tokens = max_tokens
+        self.max_overlap = max_overlap
+        self.min_overlap = min_overlap
+        self.min_block_tokens = min_block_tokens
+
+    def _merge(self, docs: List[Document]) -> List[Dict]:
+        """관련도 순 청크를 겹침/포함 관계에 따라 블록으로 합칩니다."""
+        blocks: List[Dict] = []
+        seen_texts = set()
+        for rank, doc in enumerate(docs):
+            text = doc.page_content.strip()
+            normalized = " ".join(text.split())
+            if not text or normalized in seen_texts:
+                continue
+            seen_texts.add(normalized)
+
+            key = _group_key(doc)
+            merged = False
+            for block in blocks:
+                if block["key"] != key:
+                    continue
+                if text in block["text"]:
+                    merged = True
+                elif block["text"] in text:
+                    block["text"] = text
+                    merged = True
+                else:
+                    size = _overlap(block["text"], text, self.max_overlap, self.min_overlap)
+                    if size:
+                        block["text"] += text[size:]
+                        merged = True
+                    else:
+                        size = _overlap(text, block["text"], self.max_overlap, self.min_overlap)
+                        if size:
+                            block["text"] = text + block["text"][size:]
+                            merged = True
+                if merged:
+                    break
+
+            if not merged:
+                blocks.append({"key": key, "rank": rank, "text": text, "source": doc.metadata.get("source")})
+        return blocks
+
+    def _compress(self, text: str, query: str, budget: int) -> Optional[str]:
+        """질문 키워드가 많이 포함된 문장부터 골라 원래 순서대로 budget 안에 담습니다."""
+        sentences = [s.strip() for s in _SENTENCE_END.split(text) if s.strip()]
+        keywords = set(tokenize(query))
+        ranked = sorted(
+            range(len(sentences)),
+            key=lambda i: len(keywords & set(tokenize(sentences[i]))),
+            reverse=True
+        )
+
+        chosen, used = set(), 0
+        for i in ranked:
+            cost = estimate_tokens(sentences[i]) + 1
+            if used + cost <= budget:
+                chosen.add(i)
+                used += cost
+        if chosen:
+            return " ".join(sentences[i] for i in sorted(chosen))
+
+        # 한 문장도 들어가지 않으면 가장 관련된 문장을 예산만큼 잘라냄
+        if not sentences:
+            return None
+        best = sentences[ranked[0]]
+        return best[:max(1, int(len(best) * budget / estimate_tokens(best)))]
+
+    def _format(self, block: Dict, text: str) -> str:
+        source = block["source"]
+        return f"[출처: {os.path.basename(source)}]\n{text}" if source else text
+
+    def assemble(self, query: str, docs: List[Document]) -> str:
+        parts = []
+        remaining = self.max_tokens
+        for block in sorted(self._merge(docs), key=lambda block: block["rank"]):
+            part = self._format(block, block["text"])
+            cost = estimate_tokens(part)
+            if cost > remaining:
+                if remaining < self.min_block_tokens:
+                    break
+                header_cost = cost - estimate_tokens(block["text"])
+                compressed = self._compress(block["text"], query, remaining - header_cost)
+                if not compressed:
+                    break
+                part = self._format(block, compressed)
+                cost = estimate_tokens(part)
+            parts.append(part)
+            remaining -= cost
+        return "\n\n".join(parts)
@@ -0,0 +1,174 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from ai.tracing import start_span
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    values = array("f")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+class EmbeddingStore:
+    """(모델, 텍스트 해시)를 키로 float32 벡터를 저장하는 SQLite 캐시
+
+    max_entries를 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " namespace TEXT NOT NULL,"
+            " text_hash TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_access REAL NOT NULL,"
+            " PRIMARY KEY (namespace, text_hash))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)"
+        )
+        self._conn.commit()
+        # put마다 COUNT(*)로 전체 테이블을 세지 않도록 항목 수를 따로 유지
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, namespace: str, hashes: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        if not hashes:
+            return found
+        now = time.time()
+        with self._lock:
+            # SQLite 변수 개수 제한을 피하기 위해 나누어 조회
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE namespace = ? AND text_hash IN ({placeholders})",
+                    [namespace, *batch],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = _unpack(blob)
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE namespace = ? AND text_hash = ?",
+                    [(now, namespace, text_hash) for text_hash in found],
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, namespace: str, items: Dict[str, List[float]]):
+        if not items:
+            return
+        now = time.time()
+        rows = [(namespace, text_hash, _pack(vector), now) for text_hash, vector in items.items()]
+        with self._lock:
+            inserted = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (namespace, text_hash, vector, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            ).rowcount
+            if inserted < len(rows):
+                # 이미 있던 항목은 벡터와 사용 시각만 갱신
+                self._conn.executemany(
+                    "UPDATE embeddings SET vector = ?, last_access = ? WHERE namespace = ? AND text_hash = ?",
+                    [(blob, access, ns, text_hash) for ns, text_hash, blob, access in rows],
+                )
+            self._count += inserted
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        overflow = self._count - self.max_entries
+        if overflow > 0:
+            self._count -= self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_access LIMIT ?)",
+                (overflow,),
+            ).rowcount
+
+
+class CachedEmbeddings(Embeddings):
+    """원격 임베딩 모델 앞단의 캐시
+
+    문서 임베딩은 디스크(SQLite) 캐시를, 쿼리 임베딩은 메모리 LRU와 디스크 캐시를
+    차례로 확인하고 없는 텍스트만 원격 API로 요청합니다.
+    """
+
+    def __init__(self, underlying: Embeddings, store: EmbeddingStore, query_cache_size: int = 1024):
+        self.underlying = underlying
+        self.store = store
+        self.query_cache_size = query_cache_size
+        self._query_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._query_lock = threading.Lock()
+        model = getattr(underlying, "model", None) or type(underlying).__name__
+        # 문서/쿼리 임베딩은 task type이 달라 벡터가 다르므로 네임스페이스를 분리
+        self._doc_namespace = f"{model}:document"
+        self._query_namespace = f"{model}:query"
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [self._hash(text) for text in texts]
+        cached = self.store.get_many(self._doc_namespace, list(set(hashes)))
+
+        # 캐시에 없는 텍스트만 중복 없이 원격 호출
+        missing: Dict[str, str] = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in cached and text_hash not in missing:
+                missing[text_hash] = text
+        if missing:
+            with start_span("embedding.documents", **{"embedding.texts": len(missing)}):
+                vectors = self.underlying.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self.store.put_many(self._doc_namespace, fresh)
+            cached.update(fresh)
+
+        return [cached[text_hash] for text_hash in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        text_hash = self._hash(text)
+        vector = self._get_hot(text_hash)
+        if vector is not None:
+            return vector
+
+        vector = self.store.get_many(self._query_namespace, [text_hash]).get(text_hash)
+        if vector is None:
+            with start_span("embedding.query"):
+                vector = self.underlying.embed_query(text)
+            self.store.put_many(self._query_namespace, {text_hash: vector})
+        self._put_hot(text_hash, vector)
+        return vector
+
+    def _get_hot(self, text_hash: str) -> Optional[List[float]]:
+        with self._query_lock:
+            vector = self._query_cache.get(text_hash)
+            if vector is not None:
+                self._query_cache.move_to_end(text_hash)
+            return vector
+
+    def _put_hot(self, text_hash: str, vector: List[float]):
+        with self._query_lock:
+            self._query_cache[text_hash] = vector
+            self._query_cache.move_to_end(text_hash)
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
@@ -0,0 +1,34 @@
+from typing import Dict, List, Sequence, Tuple
+
+from langchain.schema import Document
+
+from ai.rag.ann_index import normalize_rows
+from ai.rag.bm25 import tokenize
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """여러 검색 결과 순위를 RRF(1 / (k + 순위)) 점수 합으로 합칩니다."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def rerank(query: str, query_vector: Sequence[float], docs: List[Document],
+           doc_vectors: Sequence[Sequence[float]], keyword_weight: float) -> List[Document]:
+    """후보 청크를 코사인 유사도와 질문 키워드 포함 비율로 다시 정렬합니다.
+
+    청크 임베딩은 인제스트 때 저장된 것을 사용하므로 추가 모델 호출이 없습니다.
+    """
+    if not docs:
+        return docs
+    similarities = normalize_rows(doc_vectors) @ normalize_rows(query_vector)[0]
+
+    keywords = set(tokenize(query))
+    scored = []
+    for doc, similarity in zip(docs, similarities):
+        coverage = len(keywords & set(tokenize(doc.page_content))) / len(keywords) if keywords else 0.0
+        scored.append((float(similarity) + keyword_weight * coverage, doc))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [doc for _, doc in scored]
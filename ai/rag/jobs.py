@@ -0,0 +1,185 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+JOB_KINDS = ("sync", "reindex", "add")
+
+
+class JobError(Exception):
+    """작업을 취소할 수 없거나 찾을 수 없을 때 발생합니다."""
+
+
+class IngestionJobQueue:
+    """SQLite에 상태를 기록하는 백그라운드 인제스트 작업 큐
+
+    작업은 submit 즉시 기록되고 이벤트 루프 안의 워커 workers개가 순서대로
+    실행합니다. 서버가 재시작되면 대기 중이거나 실행 중이던 작업을 다시 실행하며,
+    같은 컬렉션에 대한 작업은 RAGTool의 쓰기 잠금으로 직렬화됩니다.
+
+    모든 작업은 새 스냅샷에 색인한 뒤 검증하고 교체하므로, 작업이 진행되는 동안
+    검색은 이전 코퍼스를 그대로 사용합니다 (변경되지 않은 청크의 임베딩은 캐시에서 재사용).
+    """
+
+    def __init__(self, path: str, workers: int, progress_interval: float = 0.5):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " collection TEXT NOT NULL,"
+            " file_path TEXT,"
+            " status TEXT NOT NULL,"
+            " progress TEXT NOT NULL DEFAULT '{}',"
+            " result TEXT,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        # 재시작 전에 실행 중이던 작업은 처음부터 다시 실행 (동기화는 증분이므로 안전)
+        self._conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+        self._conn.commit()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._last_progress: Dict[str, float] = {}
+
+    @staticmethod
+    def _row_to_job(row) -> Dict:
+        job_id, kind, collection, file_path, status, progress, result, error, created_at, updated_at = row
+        return {
+            "id": job_id,
+            "kind": kind,
+            "collection": collection,
+            "file_path": file_path,
+            "status": status,
+            "progress": json.loads(progress),
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+    def _update(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", [*fields.values(), job_id])
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list(self, limit: int = 50) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def _ensure_workers(self):
+        """첫 요청 때 현재 이벤트 루프에서 워커를 시작하고, 남아 있던 작업을 다시 넣습니다."""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        with self._lock:
+            pending = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at"
+            ).fetchall()
+        for (job_id,) in pending:
+            self._queue.put_nowait(job_id)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, kind: str, collection: str, file_path: Optional[str] = None) -> Dict:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"지원하지 않는 작업 종류입니다: {kind}")
+        if kind == "add" and not file_path:
+            raise ValueError("문서 추가 작업에는 file_path가 필요합니다.")
+
+        self._ensure_workers()
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, collection, file_path, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, collection, file_path, now, now),
+            )
+            self._conn.commit()
+        await self._queue.put(job_id)
+        return self.get(job_id)
+
+    def cancel(self, job_id: str) -> Dict:
+        """대기 중인 작업은 바로, 실행 중인 작업은 다음 await 지점에서 취소합니다.
+
+        작업 태스크는 워커의 이벤트 루프에 예약해 취소하므로 다른 스레드에서 호출해도 안전합니다.
+        """
+        job = self.get(job_id)
+        if job is None:
+            raise JobError("작업을 찾을 수 없습니다.")
+        if job["status"] == "queued":
+            self._update(job_id, status="cancelled")
+        elif job["status"] == "running":
+            task = self._running.get(job_id)
+            if task is not None:
+                task.get_loop().call_soon_threadsafe(task.cancel)
+        else:
+            raise JobError(f"이미 종료된 작업입니다 ({job['status']}).")
+        return self.get(job_id)
+
+    def _on_progress(self, job_id: str, stats: Dict):
+        now = time.monotonic()
+        if now - self._last_progress.get(job_id, 0.0) < self.progress_interval:
+            return
+        self._last_progress[job_id] = now
+        self._update(job_id, progress=json.dumps(stats))
+
+    async def _execute(self, job: Dict) -> Dict:
+        from ai.registry import ause_rag_tool
+        # 작업이 끝날 때까지 컬렉션이 메모리에서 내려가지 않도록 붙잡아 둠
+        async with ause_rag_tool(job["collection"]) as rag_tool:
+            on_progress = lambda stats: self._on_progress(job["id"], stats)
+            if job["kind"] == "add":
+                stats = await rag_tool.async_add_document(job["file_path"], on_progress=on_progress)
+                return {"added": os.path.basename(job["file_path"]), **stats}
+            # 동기화도 라이브 스냅샷을 고치지 않고 새 스냅샷을 만들어 교체
+            return await rag_tool.async_reindex(on_progress=on_progress)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self.get(job_id)
+                if job is None or job["status"] != "queued":
+                    continue
+                self._update(job_id, status="running")
+
+                task = asyncio.ensure_future(self._execute(job))
+                self._running[job_id] = task
+                # 워커 자신이 취소된 경우와 작업만 취소된 경우를 구분하기 위해 wait 사용
+                await asyncio.wait([task])
+
+                if task.cancelled():
+                    self._update(job_id, status="cancelled")
+                elif task.exception() is not None:
+                    print(f"Warning: 인제스트 작업 {job_id} 실패 - {str(task.exception())}")
+                    self._update(job_id, status="failed", error=str(task.exception()))
+                else:
+                    result = task.result()
+                    self._update(job_id, status="succeeded", progress=json.dumps(result),
+                                 result=json.dumps(result))
+            finally:
+                self._running.pop(job_id, None)
+                self._last_progress.pop(job_id, None)
+                self._queue.task_done()
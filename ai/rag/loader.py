@@ -0,0 +1,74 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.schema import Document
+from langchain.document_loaders import TextLoader, PyPDFLoader, Docx2txtLoader, UnstructuredMarkdownLoader
+
+# 하위 프로세스에서도 참조할 수 있도록 모듈 수준에 둠
+LOADER_MAP = {
+    ".txt": TextLoader,
+    ".pdf": PyPDFLoader,
+    ".docx": Docx2txtLoader,
+    ".md": UnstructuredMarkdownLoader
+}
+
+
+def resolve_workers(workers: int) -> int:
+    """0 이하이면 CPU 코어 수를 사용합니다."""
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def load_and_split(file_path: str, chunk_size: int, chunk_overlap: int) -> List[Document]:
+    """파일을 페이지 단위로 읽으면서 바로 청크로 분할합니다.
+
+    프로세스 풀에서 실행되므로 인자와 반환값은 모두 pickle 가능해야 합니다.
+    """
+    file_ext = os.path.splitext(file_path)[1].lower()
+    loader = LOADER_MAP[file_ext](file_path)
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+    )
+
+    chunks = []
+    for page in loader.lazy_load():
+        chunks.extend(text_splitter.split_documents([page]))
+    return chunks
+
+
+def iter_load_and_split(items: Iterable[Tuple], chunk_size: int, chunk_overlap: int,
+                        workers: int = 0) -> Iterator[Tuple[Tuple, Optional[List[Document]], Optional[Exception]]]:
+    """(file_path, ...) 항목들을 프로세스 풀에서 병렬로 로드/분할합니다.
+
+    동시에 처리 중인 파일 수를 workers * 2로 제한하여 메모리 사용량을 일정하게
+    유지하고, 끝나는 순서대로 (항목, 청크, 오류)를 돌려줍니다.
+    """
+    workers = resolve_workers(workers)
+    if workers == 1:
+        for item in items:
+            try:
+                yield item, load_and_split(item[0], chunk_size, chunk_overlap), None
+            except Exception as e:
+                yield item, None, e
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def drain(return_when):
+            done, _ = wait(list(pending), return_when=return_when)
+            for future in done:
+                item = pending.pop(future)
+                error = future.exception()
+                yield item, (None if error else future.result()), error
+
+        for item in items:
+            pending[pool.submit(load_and_split, item[0], chunk_size, chunk_overlap)] = item
+            if len(pending) >= workers * 2:
+                yield from drain(FIRST_COMPLETED)
+
+        while pending:
+            yield from drain(FIRST_COMPLETED)
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+
+def file_sha256(file_path: str) -> str:
+    """파일 내용의 SHA-256 해시를 계산합니다."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_sha256(texts: Iterable[str]) -> str:
+    """여러 텍스트를 이어붙인 내용의 SHA-256 해시를 계산합니다."""
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def make_chunk_ids(source: str, chunks) -> List[str]:
+    """청크 내용과 메타데이터로 결정적인 청크 ID를 만듭니다.
+
+    같은 내용의 청크가 한 문서에 여러 번 나오면 등장 순서로 구분합니다.
+    """
+    ids = []
+    occurrences: Dict[str, int] = {}
+    for chunk in chunks:
+        metadata = json.dumps(chunk.metadata, sort_keys=True, default=str)
+        key = f"{source}\0{metadata}\0{chunk.page_content}"
+        n = occurrences.get(key, 0)
+        occurrences[key] = n + 1
+        ids.append(hashlib.sha256(f"{key}\0{n}".encode("utf-8")).hexdigest())
+    return ids
+
+
+class IngestionManifest:
+    """파일 경로별 mtime, 내용 해시, 청크 ID를 기록하는 인제스트 매니페스트"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: 매니페스트 로딩 중 오류 발생 - {str(e)}")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def sources(self) -> List[str]:
+        return list(self.entries)
+
+    def get(self, source: str) -> Optional[Dict]:
+        return self.entries.get(source)
+
+    def update(self, source: str, mtime: Optional[float], content_hash: str, chunk_ids: List[str]):
+        self.entries[source] = {
+            "mtime": mtime,
+            "sha256": content_hash,
+            "chunk_ids": chunk_ids,
+        }
+
+    def touch(self, source: str, mtime: float):
+        """내용은 그대로이고 mtime만 바뀐 파일을 갱신합니다."""
+        self.entries[source]["mtime"] = mtime
+
+    def remove(self, source: str) -> List[str]:
+        """항목을 제거하고 해당 파일의 청크 ID를 반환합니다."""
+        entry = self.entries.pop(source, None)
+        return entry["chunk_ids"] if entry else []
+
+    def save(self):
+        """임시 파일에 쓴 뒤 교체하여 매니페스트를 원자적으로 저장합니다."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import random
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+from ai.config import RAG_CONFIG
+from ai.logs import rag_logger
+
+
+class IngestionPipeline:
+    """비동기 문서 인제스트 파이프라인
+
+    변경된 파일을 프로세스 풀에서 로드/분할한 뒤, 새 청크를 batch_size 단위로 나누어
+    최대 concurrency개의 임베딩 요청을 동시에 보내고 결과를 일괄 upsert합니다.
+    파일 I/O, 분할, 벡터 스토어 쓰기는 모두 스레드에서 실행되어 이벤트 루프를
+    막지 않습니다. on_progress가 있으면 파일 계획과 배치 임베딩이 끝날 때마다
+    현재 통계로 호출합니다.
+    """
+
+    def __init__(self, rag_tool, batch_size: Optional[int] = None, concurrency: Optional[int] = None,
+                 max_retries: Optional[int] = None, retry_base_delay: Optional[float] = None,
+                 on_progress: Optional[Callable[[Dict], None]] = None):
+        self.rag_tool = rag_tool
+        self.on_progress = on_progress
+        self.batch_size = batch_size or RAG_CONFIG["embed_batch_size"]
+        self.concurrency = concurrency or RAG_CONFIG["embed_concurrency"]
+        self.max_retries = max_retries if max_retries is not None else RAG_CONFIG["embed_max_retries"]
+        self.retry_base_delay = retry_base_delay or RAG_CONFIG["embed_retry_base_delay"]
+
+    async def _embed_with_retry(self, texts: List[str]) -> List[List[float]]:
+        """지수 백오프와 지터를 적용하여 배치 임베딩을 재시도합니다."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await asyncio.to_thread(self.rag_tool.embeddings.embed_documents, texts)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.retry_base_delay * (2 ** attempt) + random.uniform(0, self.retry_base_delay)
+                print(f"Warning: 임베딩 요청 실패, {delay:.1f}초 후 재시도 ({attempt + 1}/{self.max_retries}) - {str(e)}")
+                await asyncio.sleep(delay)
+
+    async def _worker(self, queue: asyncio.Queue, stats: Dict):
+        while True:
+            plan, ids, chunks = await queue.get()
+            try:
+                if not plan["failed"]:
+                    vectors = await self._embed_with_retry([chunk.page_content for chunk in chunks])
+                    await asyncio.to_thread(self.rag_tool._upsert_chunks, ids, chunks, vectors)
+                    stats["chunks_added"] += len(ids)
+            except Exception as e:
+                # 실패한 파일은 매니페스트에 반영하지 않으므로 다음 동기화 때 다시 처리됨
+                plan["failed"] = True
+                print(f"Warning: {os.path.basename(plan['source'])} 임베딩 중 오류 발생 - {str(e)}")
+            finally:
+                plan["pending"] -= 1
+                if plan["pending"] == 0 and not plan["failed"]:
+                    await self._commit(plan, stats)
+                self._report(stats)
+                queue.task_done()
+
+    def _report(self, stats: Dict):
+        if self.on_progress is not None:
+            self.on_progress(stats)
+
+    async def _commit(self, plan: Dict, stats: Dict):
+        await asyncio.to_thread(self.rag_tool._commit_plan, plan)
+        stats["indexed"] += 1
+        stats["chunks_removed"] += len(plan["stale_ids"])
+
+    async def run(self) -> Dict:
+        stats = self.rag_tool._new_sync_stats()
+        stats["chunks_planned"] = 0
+        seen: Set[str] = set()
+        started = time.perf_counter()
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [asyncio.create_task(self._worker(queue, stats)) for _ in range(self.concurrency)]
+        # 파일 로드/분할은 프로세스 풀에서 병렬로 진행되고, 끝난 파일부터 차례로 받음
+        changed = self.rag_tool._iter_load_and_split(self.rag_tool._scan_documents(stats, seen))
+        try:
+            while True:
+                loaded = await asyncio.to_thread(next, changed, None)
+                if loaded is None:
+                    break
+
+                (file_path, mtime, content_hash), chunks, error = loaded
+                if error is not None:
+                    print(f"Warning: {os.path.basename(file_path)} 로딩 중 오류 발생 - {str(error)}")
+                    continue
+                plan = await asyncio.to_thread(self.rag_tool._plan_chunks, file_path, chunks, mtime, content_hash)
+
+                ids, chunks = plan["added_ids"], plan["added_chunks"]
+                stats["chunks_planned"] += len(ids)
+                self._report(stats)
+                if not ids:
+                    await self._commit(plan, stats)
+                    continue
+
+                plan["failed"] = False
+                plan["pending"] = (len(ids) + self.batch_size - 1) // self.batch_size
+                for start in range(0, len(ids), self.batch_size):
+                    end = start + self.batch_size
+                    await queue.put((plan, ids[start:end], chunks[start:end]))
+
+            await queue.join()
+        finally:
+            try:
+                await asyncio.to_thread(changed.close)
+            except ValueError:
+                # 취소 시점에 다른 스레드에서 아직 next()가 실행 중인 경우
+                pass
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        await asyncio.to_thread(self.rag_tool._finish_sync, stats, seen)
+
+        elapsed = time.perf_counter() - started
+        stats["elapsed"] = round(elapsed, 3)
+        stats["chunks_per_sec"] = round(stats["chunks_added"] / elapsed, 2) if elapsed > 0 else 0.0
+        rag_logger.info("인제스트 완료: 청크 %d개, %s chunks/sec", stats["chunks_added"], stats["chunks_per_sec"])
+        self._report(stats)
+        return stats
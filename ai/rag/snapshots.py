@@ -0,0 +1,223 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Callable, Iterable, Optional, Set, Tuple
+
+from ai.config import RAG_CONFIG
+from ai.rag.ann_index import create_ann_index
+from ai.rag.bm25 import BM25Index
+from ai.rag.manifest import IngestionManifest
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class IndexSnapshot:
+    """한 스냅샷 디렉토리의 벡터 스토어, 매니페스트, 로컬 ANN/BM25 인덱스 묶음
+
+    검색은 acquire/release로 참조 수를 세고, 새 스냅샷으로 교체된(retire) 뒤
+    마지막 검색이 끝나면 on_idle 콜백이 호출되어 정리됩니다.
+    """
+
+    def __init__(self, snapshot_id: str, path: str, open_vector_store: Callable[[str], object]):
+        self.id = snapshot_id
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._open_vector_store = open_vector_store
+        self.manifest_path = os.path.join(path, RAG_CONFIG["manifest_file"])
+        self.manifest = IngestionManifest(self.manifest_path)
+        self.manifest_stamp = _stat(self.manifest_path)
+        # 로컬 ANN 인덱스 (index_backend가 chroma이면 None)
+        self.ann_index = self._create_ann_index()
+        # 키워드(제품명, 코드 등) 검색용 BM25 역색인
+        self.bm25 = None
+        if RAG_CONFIG["hybrid_search"]:
+            self.bm25 = BM25Index(
+                os.path.join(path, RAG_CONFIG["bm25_index_file"]),
+                k1=RAG_CONFIG["bm25_k1"],
+                b=RAG_CONFIG["bm25_b"]
+            )
+        self.vector_store = None
+        # 이전에 인덱싱된 컬렉션이 있으면 그대로 이어서 사용
+        if len(self.manifest):
+            self.get_vector_store()
+            self.rebuild_missing_indexes()
+
+        self._refs = 0
+        self._on_idle: Optional[Callable[["IndexSnapshot"], None]] = None
+        self._lock = threading.Lock()
+
+    def _create_ann_index(self):
+        return create_ann_index(
+            RAG_CONFIG["index_backend"],
+            os.path.join(self.path, RAG_CONFIG["ann_index_dir"]),
+            m=RAG_CONFIG["hnsw_m"],
+            ef_construction=RAG_CONFIG["hnsw_ef_construction"],
+            ef_search=RAG_CONFIG["hnsw_ef_search"]
+        )
+
+    def get_vector_store(self):
+        if self.vector_store is None:
+            self.vector_store = self._open_vector_store(self.path)
+        return self.vector_store
+
+    def manifest_changed(self) -> bool:
+        return _stat(self.manifest_path) != self.manifest_stamp
+
+    def reload(self):
+        """다른 프로세스나 인스턴스가 쓴 매니페스트와 ANN 인덱스를 다시 읽습니다."""
+        self.manifest_stamp = _stat(self.manifest_path)
+        self.manifest = IngestionManifest(self.manifest_path)
+        if self.ann_index is not None:
+            self.ann_index = self._create_ann_index()
+        if len(self.manifest):
+            self.get_vector_store()
+
+    def save(self):
+        self.manifest.save()
+        if self.ann_index is not None:
+            self.ann_index.save()
+        self.manifest_stamp = _stat(self.manifest_path)
+
+    def rebuild_missing_indexes(self, batch_size: int = 5000):
+        """비어 있는 로컬 ANN/BM25 인덱스를 Chroma 컬렉션에 저장된 청크로 다시 구축합니다."""
+        rebuild_ann = self.ann_index is not None and not len(self.ann_index)
+        rebuild_bm25 = self.bm25 is not None and not len(self.bm25)
+        if not (rebuild_ann or rebuild_bm25):
+            return
+
+        include = (["embeddings"] if rebuild_ann else []) + (["documents"] if rebuild_bm25 else [])
+        collection = self.get_vector_store()._collection
+        offset = 0
+        while True:
+            batch = collection.get(include=include, limit=batch_size, offset=offset)
+            if not batch["ids"]:
+                break
+            if rebuild_ann:
+                self.ann_index.add(batch["ids"], batch["embeddings"])
+            if rebuild_bm25:
+                self.bm25.add(batch["ids"], batch["documents"])
+            offset += len(batch["ids"])
+        if rebuild_ann:
+            self.ann_index.save()
+
+    def chunk_ids(self) -> Set[str]:
+        """매니페스트에 기록된(반영이 끝난) 청크 ID 전체"""
+        return {
+            chunk_id for source in self.manifest.sources() for chunk_id in self.manifest.get(source)["chunk_ids"]
+        }
+
+    def stored_ids(self, batch_size: int = 5000) -> Set[str]:
+        """Chroma 컬렉션에 실제로 저장된 청크 ID 전체"""
+        if self.vector_store is None:
+            return set()
+        collection = self.vector_store._collection
+        ids: Set[str] = set()
+        offset = 0
+        while True:
+            batch = collection.get(include=[], limit=batch_size, offset=offset)["ids"]
+            if not batch:
+                return ids
+            ids.update(batch)
+            offset += len(batch)
+
+    @property
+    def in_use(self) -> bool:
+        return self._refs > 0
+
+    def acquire(self):
+        with self._lock:
+            self._refs += 1
+
+    def release(self):
+        with self._lock:
+            self._refs -= 1
+            on_idle = self._on_idle if self._refs == 0 else None
+        if on_idle is not None:
+            on_idle(self)
+
+    def retire(self, on_idle: Callable[["IndexSnapshot"], None]):
+        """더 이상 새 검색에 쓰이지 않는 스냅샷으로 표시하고, 진행 중인 검색이 없으면 바로 정리합니다."""
+        with self._lock:
+            self._on_idle = on_idle
+            idle = self._refs == 0
+        if idle:
+            on_idle(self)
+
+    def close(self):
+        if self.bm25 is not None:
+            self.bm25.close()
+
+
+class SnapshotStore:
+    """vector_store_path 아래의 버전별 스냅샷 디렉토리와 현재 스냅샷 포인터
+
+    포인터 파일(CURRENT)은 임시 파일에 쓴 뒤 교체하므로 다른 프로세스는 항상
+    완성된 스냅샷만 보게 됩니다. 포인터가 없으면 기존처럼 루트 디렉토리를
+    스냅샷("")으로 사용하며, 이 디렉토리는 정리 대상이 아닙니다.
+    """
+
+    pointer_file = "CURRENT"
+    snapshots_dir = "snapshots"
+
+    def __init__(self, root: str, keep: int):
+        self.root = root
+        self.keep = max(1, keep)
+        self.pointer_path = os.path.join(root, self.pointer_file)
+
+    def current(self) -> str:
+        try:
+            with open(self.pointer_path, "r", encoding="utf-8") as f:
+                return json.load(f)["snapshot"]
+        except FileNotFoundError:
+            return ""
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: 스냅샷 포인터 로딩 중 오류 발생 - {str(e)}")
+            return ""
+
+    def stamp(self) -> Optional[Tuple[int, int]]:
+        return _stat(self.pointer_path)
+
+    def path(self, snapshot_id: str) -> str:
+        if not snapshot_id:
+            return self.root
+        return os.path.join(self.root, self.snapshots_dir, snapshot_id)
+
+    def create(self) -> str:
+        """정렬하면 생성 순서가 되는 새 스냅샷 ID를 만듭니다."""
+        now = time.time()
+        return f"{time.strftime('%Y%m%d%H%M%S', time.localtime(now))}{int(now % 1 * 1e6):06d}-{uuid.uuid4().hex[:8]}"
+
+    def publish(self, snapshot_id: str):
+        tmp_path = f"{self.pointer_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"snapshot": snapshot_id}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.pointer_path)
+
+    def discard(self, snapshot_id: str):
+        if snapshot_id:
+            shutil.rmtree(self.path(snapshot_id), ignore_errors=True)
+
+    def collect(self, in_use: Iterable[str]):
+        """현재 스냅샷과 최근 keep개를 남기고, 이 프로세스에서 사용 중이 아닌 스냅샷을 지웁니다.
+
+        다른 프로세스가 아직 이전 스냅샷을 읽고 있을 수 있으므로 바로 이전 것들은 남겨 둡니다.
+        """
+        snapshots_path = os.path.join(self.root, self.snapshots_dir)
+        if not os.path.isdir(snapshots_path):
+            return
+        keep = {self.current(), *in_use}
+        keep.update(sorted(os.listdir(snapshots_path), reverse=True)[:self.keep])
+        for snapshot_id in os.listdir(snapshots_path):
+            if snapshot_id not in keep:
+                self.discard(snapshot_id)
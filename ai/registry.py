@@ -0,0 +1,150 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+
+from ai.config import DEFAULT_MODEL
+
+# 프로세스 안에서 공유하는 구성 요소 (처음 사용할 때 한 번만 생성)
+_components: Dict[Tuple, Any] = {}
+_lock = threading.RLock()
+
+
+def _get_or_create(key: Tuple, factory: Callable[[], Any]) -> Any:
+    component = _components.get(key)
+    if component is None:
+        with _lock:
+            component = _components.get(key)
+            if component is None:
+                component = factory()
+                _components[key] = component
+    return component
+
+
+def get_llm(model_name: str = DEFAULT_MODEL):
+    def factory():
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(model=model_name)
+    return _get_or_create(("llm", model_name), factory)
+
+
+def get_db_agent(model_name: str = DEFAULT_MODEL):
+    def factory():
+        from ai.agents.db_agent import DBAgent
+        return DBAgent(get_llm(model_name))
+    return _get_or_create(("db_agent", model_name), factory)
+
+
+def get_doc_agent(model_name: str = DEFAULT_MODEL):
+    def factory():
+        from ai.agents.document_agent import DocumentAnalysisAgent
+        return DocumentAnalysisAgent(get_llm(model_name))
+    return _get_or_create(("doc_agent", model_name), factory)
+
+
+def get_search_agent(model_name: str = DEFAULT_MODEL):
+    def factory():
+        from ai.agents.search_agent import SearchAgent
+        return SearchAgent(get_llm(model_name))
+    return _get_or_create(("search_agent", model_name), factory)
+
+
+def get_embeddings():
+    def factory():
+        from ai.agents.rag_agent import create_embeddings
+        return create_embeddings()
+    return _get_or_create(("embeddings",), factory)
+
+
+def get_rag_collections():
+    def factory():
+        from ai.agents.rag_agent import RAGTool
+        from ai.config import RAG_CONFIG
+        from ai.rag.collections import CollectionRegistry
+        return CollectionRegistry(
+            lambda name: RAGTool(name, embeddings=get_embeddings()),
+            idle_seconds=RAG_CONFIG["collection_idle_seconds"],
+            max_loaded=RAG_CONFIG["max_loaded_collections"]
+        )
+    return _get_or_create(("rag_collections",), factory)
+
+
+def _collection_name(collection: Optional[str]) -> Optional[str]:
+    if collection is None:
+        from ai.rag.collections import current_collection
+        collection = current_collection.get()
+    return collection
+
+
+def get_rag_tool(collection: Optional[str] = None):
+    """컬렉션의 RAGTool을 반환합니다. 지정하지 않으면 현재 요청의 컬렉션을 사용합니다."""
+    return get_rag_collections().get(_collection_name(collection))
+
+
+@contextmanager
+def use_rag_tool(collection: Optional[str] = None) -> Iterator[Any]:
+    """블록이 끝날 때까지 컬렉션이 메모리에서 내려가지(닫히지) 않도록 RAGTool을 붙잡아 둡니다."""
+    collection = _collection_name(collection)
+    tool = get_rag_collections().acquire(collection)
+    try:
+        yield tool
+    finally:
+        get_rag_collections().release(collection)
+
+
+@asynccontextmanager
+async def ause_rag_tool(collection: Optional[str] = None) -> AsyncIterator[Any]:
+    """use_rag_tool의 비동기 버전입니다.
+
+    컬렉션을 처음 열 때의 Chroma 로딩과 BM25/ANN 인덱스 재구축이 이벤트 루프를
+    막지 않도록 스레드에서 실행합니다.
+    """
+    collection = _collection_name(collection)
+    acquiring = asyncio.ensure_future(asyncio.to_thread(lambda: get_rag_collections().acquire(collection)))
+    try:
+        tool = await asyncio.shield(acquiring)
+    except asyncio.CancelledError:
+        # 기다리던 쪽이 취소되어도 스레드는 컬렉션을 붙잡으므로, 끝나는 즉시 놓아줌
+        acquiring.add_done_callback(
+            lambda future: future.cancelled() or future.exception()
+            or get_rag_collections().release(collection)
+        )
+        raise
+    try:
+        yield tool
+    finally:
+        get_rag_collections().release(collection)
+
+
+def get_ingestion_jobs():
+    def factory():
+        from ai.config import RAG_CONFIG
+        from ai.rag.jobs import IngestionJobQueue
+        return IngestionJobQueue(RAG_CONFIG["jobs_db_path"], workers=RAG_CONFIG["ingestion_workers"])
+    return _get_or_create(("ingestion_jobs",), factory)
+
+
+def get_intent_router():
+    def factory():
+        from ai.config import ROUTER_CONFIG
+        from ai.router import DEFAULT_EXAMPLES, IntentRouter
+        return IntentRouter(
+            DEFAULT_EXAMPLES + IntentRouter.load_examples(ROUTER_CONFIG["examples_path"]),
+            confidence_threshold=ROUTER_CONFIG["confidence_threshold"],
+            fan_out_min_score=ROUTER_CONFIG["fan_out_min_score"]
+        )
+    return _get_or_create(("intent_router",), factory)
+
+
+def get_super_agent(model_name: str = DEFAULT_MODEL):
+    def factory():
+        from ai.super_agent import SuperAgent
+        return SuperAgent(model_name)
+    return _get_or_create(("super_agent", model_name), factory)
+
+
+def get_graph_super_agent(model_name: str = DEFAULT_MODEL):
+    def factory():
+        from ai.graph_super_agent import GraphSuperAgent
+        return GraphSuperAgent(model_name)
+    return _get_or_create(("graph_super_agent", model_name), factory)
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class ResponseCache:
+    """정확 일치 + 의미 유사도 2단계 응답 캐시
+
+    1단계는 정규화된 질문 문자열로, 2단계는 질문 임베딩의 코사인 유사도가
+    similarity_threshold 이상인 항목으로 조회합니다. 항목은 TTL이 지나거나
+    코퍼스 버전이 바뀌면 무효가 되고, max_entries를 넘으면 LRU로 제거됩니다.
+    namespace(RAG 컬렉션 등)가 다른 항목끼리는 서로 조회되거나 무효화되지 않습니다.
+    semantic=False로 저장/조회한 항목은 정확 일치로만 찾습니다.
+    """
+
+    def __init__(self, embeddings: Embeddings, ttl_seconds: float, max_entries: int,
+                 similarity_threshold: float):
+        self.embeddings = embeddings
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(message: str) -> str:
+        return " ".join(message.lower().split()).rstrip("?!. ")
+
+    def _is_valid(self, entry: Dict, version: int, now: float) -> bool:
+        return entry["version"] == version and entry["expires"] > now
+
+    def _key(self, message: str, namespace: str) -> str:
+        return f"{namespace}\0{self.normalize(message)}"
+
+    async def _embed(self, text: str) -> Optional[np.ndarray]:
+        """임베딩에 실패하면 의미 유사도 조회 없이 동작하도록 None을 반환합니다."""
+        try:
+            vector = np.asarray(await self.embeddings.aembed_query(text), dtype=np.float32)
+        except Exception as e:
+            print(f"Warning: 응답 캐시 임베딩 중 오류 발생 - {str(e)}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def get(self, message: str, version: int, namespace: str = "",
+                  semantic: bool = True) -> Optional[str]:
+        key = self._key(message, namespace)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_valid(entry, version, now):
+                    self._entries.move_to_end(key)
+                    return entry["response"]
+                del self._entries[key]
+
+        if not semantic or self.similarity_threshold >= 1.0:
+            return None
+
+        query = await self._embed(self.normalize(message))
+        if query is None:
+            return None
+        with self._lock:
+            self._purge(version, now, namespace)
+            keys = [
+                k for k, entry in self._entries.items()
+                if entry["namespace"] == namespace and entry["vector"] is not None
+            ]
+            if not keys:
+                return None
+            matrix = np.stack([self._entries[k]["vector"] for k in keys])
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                return None
+            self._entries.move_to_end(keys[best])
+            return self._entries[keys[best]]["response"]
+
+    async def set(self, message: str, response: str, version: int, namespace: str = "",
+                  semantic: bool = True):
+        key = self._key(message, namespace)
+        use_vector = semantic and self.similarity_threshold < 1.0
+        vector = await self._embed(self.normalize(message)) if use_vector else None
+        with self._lock:
+            self._entries[key] = {
+                "response": response,
+                "vector": vector,
+                "namespace": namespace,
+                "version": version,
+                "expires": time.monotonic() + self.ttl_seconds,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _purge(self, version: int, now: float, namespace: str):
+        stale = [
+            k for k, entry in self._entries.items()
+            if entry["namespace"] == namespace and not self._is_valid(entry, version, now)
+        ]
+        for k in stale:
+            del self._entries[k]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,277 @@
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ai.rag.bm25 import tokenize
+
+ROUTES = ("rag", "db", "doc", "search", "llm")
+# 읽기만 하는 라우트 (동시에 들어온 같은 질문을 한 번만 실행해 결과를 나눠도 됨)
+# DB 경로와 라우터가 확정하지 못한 ReAct 경로는 쓰기 요청일 수 있으므로 제외
+IDEMPOTENT_ROUTES = ("rag", "doc", "search", "llm")
+
+# 라우트별 키워드 규칙 (소문자로 비교, 같은 위치에서는 더 긴 키워드가 우선)
+KEYWORD_RULES: Dict[str, List[str]] = {
+    "rag": ["찾아줘", "검색해줘", "관련 정보", "문서에서", "문서 검색", "문서 내용", "저장된 문서", "사내 문서",
+            "자료에서", "매뉴얼에서", "규정에서"],
+    "db": ["데이터베이스", "db", "테이블", "sql", "쿼리", "레코드", "컬럼", "저장해줘", "저장해 줘", "삽입",
+           "조회해줘", "몇 명", "몇 개", "사용자 목록", "소수 목록", "매출"],
+    "doc": ["파일", "문서 분석", "문서를 분석", "문서를 읽", "읽어줘", "읽어서", "디렉토리"],
+    "search": ["검색", "검색해서", "웹에서", "웹 검색", "인터넷", "위키", "최신", "뉴스", "찾아봐"],
+    "llm": ["번역해", "요약해", "안녕", "고마워", "감사합니다"],
+}
+
+# 키워드로 표현하기 어려운 규칙 (정규식, 라우트)
+PATTERN_RULES: List[Tuple[str, str]] = [
+    (r"[\w-]+\.(?:txt|pdf|docx|md|csv|json)\b", "doc"),
+    (r"\b(?:select|insert|update|delete)\b.+\b(?:from|into|set)\b", "db"),
+    (r"^(?:hi|hello|hey)\b", "llm"),
+]
+
+# 함께 일치하면 앞 라우트가 우선하는 규칙 (라우트, 양보하는 라우트들)
+# 예: "sample.txt 문서에서 ... 찾아줘"는 파일명이 있어도 문서 내용 검색(rag)으로 확정
+ROUTE_PRECEDENCE: Dict[str, List[str]] = {
+    "rag": ["doc"],
+}
+
+# 분류기 학습용 기본 예문 (examples_path의 예문이 추가됨)
+DEFAULT_EXAMPLES: List[Tuple[str, str]] = [
+    ("휴가 규정에 대해 알려줘", "rag"),
+    ("보안 정책 문서 내용이 뭐야", "rag"),
+    ("회사 복지 제도는 어떻게 돼", "rag"),
+    ("제품 사양서에 나온 최대 전력은", "rag"),
+    ("온보딩 가이드에서 첫 주 일정 알려줘", "rag"),
+    ("계약서 해지 조항 요약", "rag"),
+    ("사용자 수를 알려줘", "db"),
+    ("가장 최근에 가입한 사용자는 누구야", "db"),
+    ("이메일이 gmail인 사용자 목록", "db"),
+    ("100보다 작은 소수를 저장해줘", "db"),
+    ("주문 건수를 월별로 집계해줘", "db"),
+    ("이름이 김으로 시작하는 회원 찾기", "db"),
+    ("이 파일 내용을 분석해줘", "doc"),
+    ("현재 디렉토리의 파일들을 분석해서 주제를 파악해줘", "doc"),
+    ("보고서 파일을 읽고 핵심을 정리해줘", "doc"),
+    ("텍스트 파일에 적힌 내용 확인", "doc"),
+    ("인공지능과 머신러닝의 차이점을 검색해서 알려줘", "search"),
+    ("오늘 서울 날씨 어때", "search"),
+    ("최근 발표된 AI 모델 소식", "search"),
+    ("파이썬 최신 버전이 뭐야", "search"),
+    ("이순신 장군에 대해 위키에서 찾아봐", "search"),
+    ("환율 지금 얼마야", "search"),
+    ("안녕하세요", "llm"),
+    ("이 문장을 영어로 번역해줘", "llm"),
+    ("재귀 함수가 뭔지 쉽게 설명해줘", "llm"),
+    ("시 한 편 써줘", "llm"),
+    ("고마워 도움이 됐어", "llm"),
+    ("퀵소트를 파이썬으로 구현해줘", "llm"),
+]
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """키워드 트라이를 접두사를 공유하는 정규식으로 컴파일합니다.
+
+    분기가 첫 글자로 갈리고 선택적 접미사는 탐욕적으로 일치하므로
+    같은 위치에서는 가장 긴 키워드가 선택됩니다.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if "" in node:
+            return f"(?:{'|'.join(branches)})?"
+        if len(branches) == 1:
+            return branches[0]
+        return f"(?:{'|'.join(branches)})"
+
+    return build(trie)
+
+
+def _is_ascii_word_char(char: str) -> bool:
+    return char.isascii() and char.isalnum()
+
+
+def _on_word_boundary(text: str, start: int, end: int) -> bool:
+    """영문/숫자로 시작하거나 끝나는 키워드가 더 긴 영단어의 일부가 아닌지 확인합니다.
+
+    ("feedback"의 "db"는 제외하고 "DB에서"처럼 한글이 바로 붙는 경우는 허용)
+    """
+    if _is_ascii_word_char(text[start]) and start > 0 and _is_ascii_word_char(text[start - 1]):
+        return False
+    if _is_ascii_word_char(text[end - 1]) and end < len(text) and _is_ascii_word_char(text[end]):
+        return False
+    return True
+
+
+class NaiveBayesClassifier:
+    """토큰(어절 + 한글 바이그램) 기반 다항 나이브 베이즈 의도 분류기
+
+    예문 수백 개 정도는 즉시 학습되고, 예측은 질문 토큰 수에 비례하는 사전 조회뿐입니다.
+    """
+
+    def __init__(self, alpha: float = 0.5):
+        self.alpha = alpha
+        self.labels: List[str] = []
+        self._log_prior: Dict[str, float] = {}
+        self._log_likelihood: Dict[str, Dict[str, float]] = {}
+        self._log_unseen: Dict[str, float] = {}
+        self._vocabulary = set()
+
+    def fit(self, examples: Sequence[Tuple[str, str]]):
+        counts: Dict[str, Counter] = defaultdict(Counter)
+        docs = Counter()
+        for text, label in examples:
+            counts[label].update(tokenize(text))
+            docs[label] += 1
+
+        self.labels = sorted(docs)
+        self._vocabulary = set().union(*counts.values()) if counts else set()
+        total_docs = sum(docs.values())
+        vocabulary_size = len(self._vocabulary)
+        for label in self.labels:
+            total = sum(counts[label].values()) + self.alpha * vocabulary_size
+            self._log_prior[label] = math.log(docs[label] / total_docs)
+            self._log_likelihood[label] = {
+                token: math.log((count + self.alpha) / total) for token, count in counts[label].items()
+            }
+            self._log_unseen[label] = math.log(self.alpha / total)
+        return self
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """라벨별 확률을 반환합니다. 학습 어휘와 겹치는 토큰이 없으면 빈 dict를 반환합니다."""
+        tokens = [token for token in tokenize(text) if token in self._vocabulary]
+        if not tokens or not self.labels:
+            return {}
+        scores = {}
+        for label in self.labels:
+            likelihood = self._log_likelihood[label]
+            unseen = self._log_unseen[label]
+            scores[label] = self._log_prior[label] + sum(likelihood.get(token, unseen) for token in tokens)
+        best = max(scores.values())
+        exp_scores = {label: math.exp(score - best) for label, score in scores.items()}
+        total = sum(exp_scores.values())
+        return {label: score / total for label, score in exp_scores.items()}
+
+
+class IntentRouter:
+    """질문을 DB/문서/검색/RAG/일반 LLM 경로 중 하나로 보내는 빠른 라우터
+
+    1. 키워드 트라이와 정규식 규칙이 한 라우트만 가리키면 바로 확정합니다.
+       (route_precedence에 따라 우선하는 라우트와 함께 일치한 라우트는 제외)
+    2. 규칙이 여러 라우트를 가리키면 여러 도구가 필요한 요청으로 보고 확정하지 않습니다.
+    3. 규칙이 일치하지 않으면 분류기 확률이 confidence_threshold 이상일 때만 확정합니다.
+
+    확정하지 못한 질문은 호출 측에서 ReAct 에이전트로 처리합니다.
+    """
+
+    def __init__(self, examples: Optional[Sequence[Tuple[str, str]]] = None,
+                 keyword_rules: Optional[Dict[str, List[str]]] = None,
+                 pattern_rules: Optional[List[Tuple[str, str]]] = None,
+                 route_precedence: Optional[Dict[str, List[str]]] = None,
+                 confidence_threshold: float = 0.8, fan_out_min_score: float = 0.25):
+        self.confidence_threshold = confidence_threshold
+        self.fan_out_min_score = fan_out_min_score
+        keyword_rules = KEYWORD_RULES if keyword_rules is None else keyword_rules
+        pattern_rules = PATTERN_RULES if pattern_rules is None else pattern_rules
+        self.route_precedence = ROUTE_PRECEDENCE if route_precedence is None else route_precedence
+
+        self._keyword_routes = {
+            keyword.lower(): route for route, keywords in keyword_rules.items() for keyword in keywords
+        }
+        self._keyword_pattern = re.compile(_trie_pattern(self._keyword_routes)) if self._keyword_routes else None
+        self._patterns = [(re.compile(pattern, re.IGNORECASE), route) for pattern, route in pattern_rules]
+        self.classifier = NaiveBayesClassifier()
+        self.fit(DEFAULT_EXAMPLES if examples is None else examples)
+
+    @staticmethod
+    def load_examples(path: str) -> List[Tuple[str, str]]:
+        """{"text": ..., "route": ...} 형식의 JSONL 예문 파일을 읽습니다."""
+        examples = []
+        if not os.path.exists(path):
+            return examples
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    example = json.loads(line)
+                    if example["route"] not in ROUTES:
+                        print(f"Warning: 알 수 없는 라우트의 예문을 건너뜁니다 - {example['route']}")
+                        continue
+                    examples.append((example["text"], example["route"]))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: 라우터 예문 로딩 중 오류 발생 - {str(e)}")
+        return examples
+
+    def fit(self, examples: Sequence[Tuple[str, str]]):
+        self.examples = list(examples)
+        self.classifier.fit(self.examples)
+        return self
+
+    def _match_rules(self, message: str) -> Counter:
+        hits: Counter = Counter()
+        if self._keyword_pattern is not None:
+            text = message.lower()
+            for match in self._keyword_pattern.finditer(text):
+                if _on_word_boundary(text, match.start(), match.end()):
+                    hits[self._keyword_routes[match.group()]] += 1
+        for pattern, route in self._patterns:
+            if pattern.search(message):
+                hits[route] += 1
+        for route, yielded in self.route_precedence.items():
+            if route in hits:
+                for other in yielded:
+                    hits.pop(other, None)
+        return hits
+
+    def route(self, message: str) -> Dict:
+        """{"route", "confident", "source", "score"}를 반환합니다.
+
+        route는 확정하지 못한 경우에도 가장 가능성이 높은 라우트(없으면 None)입니다.
+        """
+        hits = self._match_rules(message)
+        if len(hits) == 1:
+            route, count = hits.most_common(1)[0]
+            return {"route": route, "confident": True, "source": "keyword", "score": float(count)}
+        if hits:
+            route, count = hits.most_common(1)[0]
+            return {"route": route, "confident": False, "source": "keyword", "score": float(count)}
+
+        proba = self.classifier.predict_proba(message)
+        if not proba:
+            return {"route": None, "confident": False, "source": "none", "score": 0.0}
+        route = max(proba, key=proba.get)
+        return {
+            "route": route,
+            "confident": proba[route] >= self.confidence_threshold,
+            "source": "classifier",
+            "score": proba[route],
+        }
+
+    def select(self, message: str, max_routes: int = 3) -> List[str]:
+        """함께 조회할 라우트 목록을 관련도 순으로 반환합니다 (여러 출처를 병렬로 조회할 때 사용).
+
+        규칙이 일치한 라우트 전부, 규칙이 없으면 분류기 확률이 fan_out_min_score 이상인
+        라우트를 고릅니다. 여러 출처를 고른 경우 일반 LLM 경로는 결과를 합치는 단계가
+        대신하므로 제외하고, 고를 것이 없으면 ["llm"]을 반환합니다.
+        """
+        hits = self._match_rules(message)
+        if hits:
+            routes = [route for route, _ in hits.most_common()]
+        else:
+            proba = self.classifier.predict_proba(message)
+            routes = [
+                route for route in sorted(proba, key=proba.get, reverse=True)
+                if proba[route] >= self.fan_out_min_score
+            ]
+        if len(routes) > 1:
+            routes = [route for route in routes if route != "llm"]
+        return routes[:max_routes] or ["llm"]
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from ai.config import CONCURRENCY_CONFIG
+
+
+class SingleFlight:
+    """같은 키로 동시에 진행 중인 호출을 한 번만 실행하고, 기다리는 호출들이 결과를 공유합니다.
+
+    완료된 결과는 보관하지 않으므로 캐시와 달리 오래된 값을 돌려주지 않습니다.
+    동기 호출(do)은 스레드 사이에서, 비동기 호출(ado)은 이벤트 루프 안에서 합쳐집니다.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        self.enabled = CONCURRENCY_CONFIG["single_flight"] if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._tasks: Dict[Hashable, Dict] = {}
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        if not self.enabled:
+            return func(*args, **kwargs)
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self, key: Hashable) -> bool:
+        """ado(key, ...)가 지금 호출되면 진행 중인 작업의 결과를 나눠 받는지 여부"""
+        call = self._tasks.get(key)
+        return self.enabled and call is not None and call["task"].get_loop() is asyncio.get_running_loop()
+
+    async def ado(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        if not self.enabled:
+            return await func(*args, **kwargs)
+        if self.in_flight(key):
+            call = self._tasks[key]
+        else:
+            # 공유 작업은 첫 호출의 컨텍스트(현재 컬렉션 등)를 복사해 실행됨
+            call = {"task": asyncio.ensure_future(func(*args, **kwargs)), "waiters": 0}
+            self._tasks[key] = call
+            call["task"].add_done_callback(lambda _: self._forget(key, call))
+
+        call["waiters"] += 1
+        try:
+            # 한 호출이 취소되어도 다른 호출이 기다리는 공유 작업은 계속 실행
+            return await asyncio.shield(call["task"])
+        except asyncio.CancelledError:
+            if call["waiters"] == 1:
+                call["task"].cancel()
+            raise
+        finally:
+            call["waiters"] -= 1
+
+    def _forget(self, key: Hashable, call: Dict):
+        if self._tasks.get(key) is call:
+            del self._tasks[key]
@@ -1,112 +1,318 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.tools import Tool
-from langchain import hub
 from langchain.agents import create_react_agent, AgentExecutor
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional
 from langchain.schema import Document
-from langchain.prompts import ChatPromptTemplate
+import asyncio
 import os
 
-from ai.config import DEFAULT_MODEL
-from ai.agents.db_agent import DBAgent
-from ai.agents.document_agent import DocumentAnalysisAgent
-from ai.agents.search_agent import SearchAgent
-from ai.agents.rag_agent import RAGTool
+from ai.config import DEFAULT_MODEL, RESPONSE_CACHE_CONFIG, ROUTER_CONFIG
+from ai.logs import agent_callbacks
+from ai.prompts import REACT_PROMPT, RESPONSE_PROMPT
+from ai.registry import (
+    ause_rag_tool, get_llm, get_db_agent, get_doc_agent, get_search_agent, get_rag_tool, get_embeddings,
+    get_intent_router, use_rag_tool
+)
+from ai.rag.collections import current_collection
+from ai.response_cache import ResponseCache
+from ai.router import IDEMPOTENT_ROUTES
+from ai.singleflight import SingleFlight
+from ai.tracing import start_span
+from ai.usage import record_cache_hit, record_tool_call
+
+# 응답을 캐시할 수 있는 라우트 (결과가 RAG 코퍼스 버전과 질문에만 의존)
+CACHEABLE_ROUTES = ("rag", "llm")
+# 의미 유사도로 조회할 수 있는 라우트 (직접 LLM 답변은 질문 표현이 조금만 달라도 답이 달라지므로 정확 일치만 사용)
+SEMANTIC_CACHE_ROUTES = ("rag",)
 
 class SuperAgent:
     def __init__(self, model_name: str = DEFAULT_MODEL):
-        self.llm = ChatGoogleGenerativeAI(model=model_name)
+        self.llm = get_llm(model_name)
+        self.response_chain = RESPONSE_PROMPT | self.llm
+        
+        # 서브 에이전트들은 레지스트리에서 공유 인스턴스를 가져옴
+        self.db_agent = get_db_agent(model_name)
+        self.doc_agent = get_doc_agent(model_name)
+        self.search_agent = get_search_agent(model_name)
+        
+        # 동일/유사 질문 응답 캐시 (RAG 코퍼스가 바뀌면 무효화)
+        self.response_cache = None
+        if RESPONSE_CACHE_CONFIG["enabled"]:
+            self.response_cache = ResponseCache(
+                get_embeddings(),
+                ttl_seconds=RESPONSE_CACHE_CONFIG["ttl_seconds"],
+                max_entries=RESPONSE_CACHE_CONFIG["max_entries"],
+                similarity_threshold=RESPONSE_CACHE_CONFIG["similarity_threshold"]
+            )
+        
+        # 동시에 들어온 같은 질문은 한 번만 처리 (읽기 경로만)
+        self._flight = SingleFlight()
         
-        # 서브 에이전트들 초기화
-        self.db_agent = DBAgent(self.llm)
-        self.doc_agent = DocumentAnalysisAgent(self.llm)
-        self.search_agent = SearchAgent(self.llm)
-        self.rag_tool = RAGTool()
+        # 확실한 질문은 ReAct의 도구 선택 LLM 호출 없이 바로 처리
+        self.router = get_intent_router() if ROUTER_CONFIG["enabled"] else None
         
         # 슈퍼 에이전트용 도구 설정
         self.tools = [
             Tool(
                 name="DB_작업",
                 func=self.db_agent.run,
+                coroutine=self.db_agent.arun,
                 description="데이터베이스 관련 작업이 필요할 때 사용"
             ),
             Tool(
                 name="문서_분석",
                 func=self.doc_agent.run,
+                coroutine=self.doc_agent.arun,
                 description="문서를 읽고 분석해야 할 때 사용"
             ),
             Tool(
                 name="정보_검색",
                 func=self.search_agent.run,
+                coroutine=self.search_agent.arun,
                 description="웹에서 정보를 검색해야 할 때 사용"
             ),
             Tool(
                 name="문서_검색(RAG)",
-                func=self.rag_tool._run,
+                func=self._rag_run,
+                coroutine=self._rag_arun,
                 description="저장된 문서에서 관련 정보를 검색할 때 사용"
             )
         ]
         
         # 슈퍼 에이전트 생성
-        prompt = hub.pull("hwchase17/react")
-        self.agent = create_react_agent(self.llm, self.tools, prompt)
-        self.agent_executor = AgentExecutor(agent=self.agent, tools=self.tools, verbose=True)
+        self.agent = create_react_agent(self.llm, self.tools, REACT_PROMPT)
+        self.agent_executor = AgentExecutor(agent=self.agent, tools=self.tools, callbacks=agent_callbacks())
 
-    def initialize_rag(self, documents: List[Document]):
+    @property
+    def rag_tool(self):
+        """현재 요청의 컬렉션에 해당하는 RAG 도구 (요청 처리 중에는 ause_rag_tool로 이미 열려 있음)"""
+        return get_rag_tool()
+
+    def _rag_run(self, query: str) -> str:
+        return self.rag_tool._run(query)
+
+    async def _rag_arun(self, query: str) -> str:
+        return await self.rag_tool._arun(query)
+
+    def initialize_rag(self, documents: List[Document], collection: Optional[str] = None):
         """RAG 도구 초기화"""
-        self.rag_tool.initialize_vector_store(documents)
+        with use_rag_tool(collection) as rag_tool:
+            rag_tool.initialize_vector_store(documents)
     
     async def _generate_response(self, prompt: str) -> str:
         """LLM을 사용하여 응답을 생성합니다."""
-        chat_prompt = ChatPromptTemplate.from_messages([
-            ("system", "당신은 도움이 되는 AI 어시스턴트입니다. 주어진 컨텍스트를 기반으로 정확하고 도움되는 답변을 제공합니다."),
-            ("user", prompt)
-        ])
-        
-        chain = chat_prompt | self.llm
-        response = await chain.ainvoke({})
+        response = await self.response_chain.ainvoke({"prompt": prompt})
         return response.content
     
-    async def process_message(self, message: str) -> str:
-        """메시지 처리 및 응답 생성"""
-        # RAG 관련 키워드 확인
-        rag_keywords = ["찾아줘", "검색해줘", "관련 정보", "문서에서", "문서 검색"]
-        
-        try:
-            if any(keyword in message for keyword in rag_keywords):
-                # RAG 도구 사용
-                context = self.rag_tool._run(message)
-                prompt = f"""다음 컨텍스트를 기반으로 질문에 답변해주세요:
-                
-                컨텍스트:
-                {context}
-                
-                질문: {message}
-                """
-                return await self._generate_response(prompt)
+    async def _stream_response(self, prompt: str) -> AsyncIterator[str]:
+        """LLM 응답을 토큰 단위로 스트리밍합니다."""
+        async for chunk in self.response_chain.astream({"prompt": prompt}):
+            if chunk.content:
+                yield chunk.content
+    
+    def _route(self, message: str) -> Optional[str]:
+        """라우터가 확정한 경로(rag/db/doc/search/llm)를 반환하고, 확실하지 않으면 None을 반환합니다."""
+        if self.router is None:
+            return None
+        with start_span("route") as span:
+            decision = self.router.route(message)
+            span.set("route", decision["route"] or "")
+            span.set("route.source", decision["source"])
+            span.set("route.confident", decision["confident"])
+        return decision["route"] if decision["confident"] else None
+    
+    def _sub_agent(self, route: str):
+        """라우트에 해당하는 (도구 이름, 서브 에이전트)"""
+        return {
+            "db": ("DB_작업", self.db_agent),
+            "doc": ("문서_분석", self.doc_agent),
+            "search": ("정보_검색", self.search_agent),
+        }[route]
+    
+    def _build_rag_prompt(self, message: str, context: str) -> str:
+        return f"""다음 컨텍스트를 기반으로 질문에 답변해주세요:
             
-            # 일반적인 에이전트 실행
-            result = await self.agent_executor.ainvoke({"input": message})
-            return result["output"]
+            컨텍스트:
+            {context}
             
+            질문: {message}
+            """
+    
+    async def process_message(self, message: str, collection: Optional[str] = None) -> str:
+        """메시지 처리 및 응답 생성 (collection: 검색할 RAG 컬렉션, 없으면 기본 컬렉션)"""
+        token = current_collection.set(collection)
+        try:
+            # 컬렉션을 처음 여는 작업은 스레드에서 하고, 처리하는 동안 메모리에서 내려가지 않게 붙잡아 둠
+            async with ause_rag_tool() as rag_tool:
+                route = self._route(message)
+                if route not in IDEMPOTENT_ROUTES:
+                    # 같은 쓰기 요청이 동시에 두 번 오면 두 번 모두 실행해야 함
+                    return await self._process_message(message, route)
+                key = (message, rag_tool.collection)
+                if self._flight.in_flight(key):
+                    record_cache_hit()
+                return await self._flight.ado(key, self._process_message, message, route)
         except Exception as e:
             return f"죄송합니다. 오류가 발생했습니다: {str(e)}"
+        finally:
+            current_collection.reset(token)
+    
+    async def _process_message(self, message: str, route: Optional[str]) -> str:
+        # 응답이 검색된 문서/LLM에만 의존하는 경로만 캐시 (DB/웹 검색 결과는 금방 바뀌고, 쓰기 요청은 매번 실행해야 함)
+        cacheable = self.response_cache is not None and route in CACHEABLE_ROUTES
+        semantic = route in SEMANTIC_CACHE_ROUTES
+        if cacheable:
+            rag_tool = self.rag_tool
+            version = rag_tool.corpus_version
+            cached = await self.response_cache.get(message, version, rag_tool.collection, semantic)
+            if cached is not None:
+                record_cache_hit()
+                return cached
+        
+        response = await self._process_uncached(message, route)
+        
+        if cacheable:
+            await self.response_cache.set(message, response, version, rag_tool.collection, semantic)
+        return response
+    
+    async def _process_uncached(self, message: str, route: Optional[str]) -> str:
+        """캐시를 거치지 않고 라우터가 정한 경로(None이면 ReAct 에이전트)로 메시지를 처리합니다."""
+        if route == "rag":
+            # RAG 도구 사용
+            record_tool_call("문서_검색(RAG)")
+            context = await self.rag_tool._arun(message)
+            return await self._generate_response(self._build_rag_prompt(message, context))
+        if route == "llm":
+            return await self._generate_response(message)
+        if route is not None:
+            tool_name, agent = self._sub_agent(route)
+            record_tool_call(tool_name)
+            return await agent.arun(message)
+        
+        # 라우터가 확정하지 못한 경우에만 ReAct 에이전트 실행
+        result = await self.agent_executor.ainvoke({"input": message})
+        return result["output"]
+    
+    async def stream_message(self, message: str, collection: Optional[str] = None) -> AsyncIterator[Dict]:
+        """process_message의 스트리밍 버전입니다.
+        
+        도구 실행 이벤트(tool_start/tool_end)와 응답 토큰(token)을 생성되는 대로
+        돌려주고, 마지막에 전체 응답을 담은 done 이벤트를 보냅니다.
+        """
+        token = current_collection.set(collection)
+        try:
+            async with ause_rag_tool() as rag_tool:
+                async for event in self._stream_message(message, rag_tool):
+                    yield event
+        except Exception as e:
+            yield {"type": "error", "message": f"죄송합니다. 오류가 발생했습니다: {str(e)}"}
+        finally:
+            current_collection.reset(token)
+    
+    async def _stream_message(self, message: str, rag_tool) -> AsyncIterator[Dict]:
+        route = self._route(message)
+        cacheable = self.response_cache is not None and route in CACHEABLE_ROUTES
+        semantic = route in SEMANTIC_CACHE_ROUTES
+        if cacheable:
+            version = rag_tool.corpus_version
+            cached = await self.response_cache.get(message, version, rag_tool.collection, semantic)
+            if cached is not None:
+                record_cache_hit()
+                yield {"type": "token", "content": cached}
+                yield {"type": "done", "response": cached, "cached": True}
+                return
+        
+        tokens = []
+        async for event in self._stream_uncached(message, route):
+            if event["type"] == "token":
+                tokens.append(event["content"])
+            yield event
+        response = "".join(tokens)
+        
+        if cacheable:
+            await self.response_cache.set(message, response, version, rag_tool.collection, semantic)
+        yield {"type": "done", "response": response, "cached": False}
+    
+    async def _stream_uncached(self, message: str, route: Optional[str]) -> AsyncIterator[Dict]:
+        yield {"type": "route", "route": route or "agent"}
+        if route in ("rag", "llm"):
+            prompt = message
+            if route == "rag":
+                yield {"type": "tool_start", "tool": "문서_검색(RAG)", "input": message}
+                record_tool_call("문서_검색(RAG)")
+                context = await self.rag_tool._arun(message)
+                yield {"type": "tool_end", "tool": "문서_검색(RAG)", "output": context}
+                prompt = self._build_rag_prompt(message, context)
+            async for token in self._stream_response(prompt):
+                yield {"type": "token", "content": token}
+            return
+        if route is not None:
+            tool_name, agent = self._sub_agent(route)
+            yield {"type": "tool_start", "tool": tool_name, "input": message}
+            record_tool_call(tool_name)
+            response = await agent.arun(message)
+            yield {"type": "tool_end", "tool": tool_name, "output": response}
+            yield {"type": "token", "content": response}
+            return
+        
+        async for event in self._stream_agent(message):
+            yield event
+    
+    async def _stream_agent(self, message: str) -> AsyncIterator[Dict]:
+        """ReAct 에이전트 실행 중 도구 호출과 'Final Answer:' 이후의 토큰을 스트리밍합니다."""
+        marker = "Final Answer:"
+        buffers: Dict[str, str] = {}
+        streamed = False
+        output = None
+        
+        async for event in self.agent_executor.astream_events({"input": message}, version="v1"):
+            kind = event["event"]
+            if kind == "on_tool_start":
+                yield {"type": "tool_start", "tool": event["name"], "input": event["data"].get("input")}
+            elif kind == "on_tool_end":
+                yield {"type": "tool_end", "tool": event["name"], "output": str(event["data"].get("output"))}
+            elif kind == "on_chat_model_stream":
+                run_id = str(event["run_id"])
+                previous = buffers.get(run_id, "")
+                current = previous + event["data"]["chunk"].content
+                buffers[run_id] = current
+                if marker in previous:
+                    token = current[len(previous):]
+                elif marker in current:
+                    token = current.split(marker, 1)[1].lstrip()
+                else:
+                    token = ""
+                if token:
+                    streamed = True
+                    yield {"type": "token", "content": token}
+            elif kind == "on_chain_end" and event["name"] == "AgentExecutor":
+                output = (event["data"].get("output") or {}).get("output")
+        
+        # 최대 반복 도달 등으로 'Final Answer:' 없이 끝난 경우 최종 출력을 한 번에 전달
+        if not streamed and output:
+            yield {"type": "token", "content": output}
     
     async def run(self, input_text: str) -> str:
         """비동기 실행을 위한 메서드"""
         return await self.process_message(input_text)
 
-    async def load_all_documents(self):
-        """모든 문서를 로드하고 RAG 시스템을 초기화합니다."""
-        documents = self.rag_tool.load_documents()
-        if documents:
-            self.rag_tool.initialize_vector_store(documents)
-            return f"{len(documents)}개의 문서가 로드되었습니다."
+    async def load_all_documents(self, collection: Optional[str] = None):
+        """컬렉션의 모든 문서를 로드하고 RAG 시스템을 초기화합니다."""
+        async with ause_rag_tool(collection) as rag_tool:
+            stats = await rag_tool.async_sync_documents()
+        if stats["files"] or stats["deleted"]:
+            return (
+                f"{stats['files']}개의 문서가 동기화되었습니다. "
+                f"(변경 {stats['indexed']}개, 유지 {stats['unchanged']}개, 삭제 {stats['deleted']}개, "
+                f"청크 추가 {stats['chunks_added']}개, 청크 제거 {stats['chunks_removed']}개, "
+                f"{stats['chunks_per_sec']} chunks/sec)"
+            )
         return "로드할 문서가 없습니다."
 
-    async def add_document(self, file_path: str):
-        """새로운 문서를 추가합니다."""
-        if self.rag_tool.add_document(file_path):
+    async def add_document(self, file_path: str, collection: Optional[str] = None):
+        """컬렉션에 새로운 문서를 추가합니다."""
+        async with ause_rag_tool(collection) as rag_tool:
+            added = await asyncio.to_thread(rag_tool.add_document, file_path)
+        if added:
             return f"{os.path.basename(file_path)}가 성공적으로 추가되었습니다."
         return "문서 추가에 실패했습니다."
 
@@ -0,0 +1,356 @@
+import bisect
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+from ai.config import TRACING_CONFIG
+
+
+class Span:
+    """한 작업 구간 (OTLP 스팬과 같은 필드를 가짐)"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict] = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes) if attributes else {}
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def fail(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            tracer.on_end(self)
+
+    @property
+    def duration(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def to_otlp(self) -> Dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """트레이싱이 꺼져 있을 때 쓰는 아무 일도 하지 않는 스팬"""
+
+    def set(self, key: str, value: Any):
+        pass
+
+    def fail(self, error: BaseException):
+        pass
+
+    def end(self):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    text = str(value)
+    limit = TRACING_CONFIG["max_attribute_length"]
+    return {"key": key, "value": {"stringValue": text if len(text) <= limit else text[:limit] + "..."}}
+
+
+class SpanFileExporter:
+    """끝난 스팬을 OTLP/JSON 형식(한 줄에 ExportTraceServiceRequest 하나)으로 파일에 씁니다.
+
+    요청 경로에서는 큐에 넣기만 하고 파일 쓰기는 백그라운드 스레드가 묶어서 처리합니다.
+    큐가 가득 차면 스팬을 버리고, 파일이 max_file_bytes를 넘으면 .1로 교체합니다.
+    """
+
+    def __init__(self, path: str, max_queue: int, batch_size: int, max_file_bytes: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.max_file_bytes = max_file_bytes
+        self.dropped = 0
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                print(f"Warning: 트레이스 내보내기 중 오류 발생 - {str(e)}")
+
+    def _write(self, spans: List[Span]):
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", TRACING_CONFIG["service_name"])]},
+                "scopeSpans": [{"scope": {"name": "ai.tracing"}, "spans": [span.to_otlp() for span in spans]}],
+            }]
+        }
+        if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_file_bytes:
+            os.replace(self.path, f"{self.path}.1")
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(request, ensure_ascii=False, default=str) + "\n")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class Metrics:
+    """스팬 이름별 지연 시간 히스토그램과 카운터 (Prometheus 텍스트 형식으로 출력)"""
+
+    def __init__(self, buckets: List[float]):
+        self.buckets = sorted(buckets)
+        self._histograms: Dict[str, Dict] = {}
+        self._counters: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0}
+            histogram["counts"][index] += 1
+            histogram["sum"] += seconds
+
+    def increment(self, name: str, labels: Dict[str, str], value: float = 1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self) -> str:
+        with self._lock:
+            histograms = {name: (list(h["counts"]), h["sum"]) for name, h in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = [
+            "# HELP agent_span_duration_seconds Duration of traced operations.",
+            "# TYPE agent_span_duration_seconds histogram",
+        ]
+        for name in sorted(histograms):
+            counts, total = histograms[name]
+            label = f'span="{_escape_label(name)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + [float("inf")], counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'agent_span_duration_seconds_bucket{{{label},le="{le}"}} {cumulative}')
+            lines.append(f"agent_span_duration_seconds_sum{{{label}}} {total}")
+            lines.append(f"agent_span_duration_seconds_count{{{label}}} {cumulative}")
+
+        for metric in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {metric} counter")
+            for (name, labels), value in sorted(counters.items()):
+                if name != metric:
+                    continue
+                rendered = ",".join(f'{key}="{_escape_label(str(val))}"' for key, val in labels)
+                lines.append(f"{metric}{{{rendered}}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = TRACING_CONFIG["enabled"]
+        self.metrics = Metrics(TRACING_CONFIG["latency_buckets"])
+        self.exporter = None
+        if self.enabled and TRACING_CONFIG["export_path"]:
+            self.exporter = SpanFileExporter(
+                TRACING_CONFIG["export_path"],
+                max_queue=TRACING_CONFIG["export_max_queue"],
+                batch_size=TRACING_CONFIG["export_batch_size"],
+                max_file_bytes=TRACING_CONFIG["export_max_file_bytes"]
+            )
+
+    def on_end(self, span: Span):
+        self.metrics.observe(span.name, span.duration)
+        if span.error:
+            self.metrics.increment("agent_span_errors_total", {"span": span.name})
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+
+tracer = Tracer()
+
+# 현재 실행 중인 스팬 (새 스팬의 부모)
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def start_span(name: str, **attributes) -> Iterator[Any]:
+    """name 스팬을 현재 스팬의 자식으로 시작하고, 블록이 끝나면 종료합니다.
+
+    트레이싱이 꺼져 있으면 아무 일도 하지 않는 스팬을 돌려줍니다.
+    """
+    if not tracer.enabled:
+        yield _NOOP_SPAN
+        return
+    span = Span(name, current_span.get(), attributes)
+    token = current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.fail(e)
+        raise
+    finally:
+        current_span.reset(token)
+        span.end()
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """LangChain의 LLM/도구 실행을 스팬으로 기록합니다.
+
+    LangChain 실행 ID로 부모 스팬을 찾고, 모르는 부모(체인 등)면 콜백이 호출된
+    컨텍스트의 현재 스팬을 부모로 사용합니다.
+    """
+
+    # 큐에 넣기만 하는 가벼운 핸들러이므로 이벤트 루프에서 바로 실행
+    run_inline = True
+
+    def __init__(self):
+        self._spans: Dict[UUID, Span] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, name: str, run_id: UUID, parent_run_id: Optional[UUID], attributes: Dict):
+        with self._lock:
+            parent = self._spans.get(parent_run_id) if parent_run_id else None
+            self._spans[run_id] = Span(name, parent or current_span.get(), attributes)
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None) -> Optional[Span]:
+        with self._lock:
+            span = self._spans.pop(run_id, None)
+        if span is not None:
+            if error is not None:
+                span.fail(error)
+            span.end()
+        return span
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, parent_run_id: Optional[UUID] = None,
+                            **kwargs: Any):
+        params = kwargs.get("invocation_params") or {}
+        self._start("llm", run_id, parent_run_id, {"llm.model": params.get("model") or params.get("model_name") or ""})
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, parent_run_id: Optional[UUID] = None,
+                     **kwargs: Any):
+        params = kwargs.get("invocation_params") or {}
+        self._start("llm", run_id, parent_run_id, {"llm.model": params.get("model") or params.get("model_name") or ""})
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        prompt_tokens = completion_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    prompt_tokens += usage.get("input_tokens", 0)
+                    completion_tokens += usage.get("output_tokens", 0)
+        if not (prompt_tokens or completion_tokens):
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0)
+
+        with self._lock:
+            span = self._spans.get(run_id)
+        if span is not None:
+            span.set("llm.prompt_tokens", prompt_tokens)
+            span.set("llm.completion_tokens", completion_tokens)
+        tracer.metrics.increment("agent_llm_tokens_total", {"type": "prompt"}, prompt_tokens)
+        tracer.metrics.increment("agent_llm_tokens_total", {"type": "completion"}, completion_tokens)
+        self._end(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str: str, *, run_id: UUID, parent_run_id: Optional[UUID] = None,
+                      **kwargs: Any):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._start(f"tool:{name}", run_id, parent_run_id, {"tool.input": input_str})
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, error)
+
+
+# 트레이싱이 켜져 있으면 모든 컨텍스트의 LangChain 실행에 콜백 핸들러를 연결 (기본값으로 지정)
+_callback_handler: ContextVar[Optional[TracingCallbackHandler]] = ContextVar(
+    "tracing_callback_handler", default=TracingCallbackHandler() if tracer.enabled else None
+)
+register_configure_hook(_callback_handler, inheritable=True)
+
+
+class TracingMiddleware:
+    """HTTP 요청마다 루트 스팬을 만드는 ASGI 미들웨어 (스트리밍 응답은 본문 전송이 끝날 때 종료)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        with start_span("http", **{"http.method": scope["method"], "http.target": scope["path"]}) as span:
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    span.set("http.status_code", message["status"])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                # 히스토그램 레이블이 늘어나지 않도록 실제 경로 대신 라우트 템플릿을 사용
+                route = getattr(scope.get("route"), "path", None) or "unmatched"
+                span.name = f"http {scope['method']} {route}"
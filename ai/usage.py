@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+
+class UsageTracker(BaseCallbackHandler):
+    """한 요청 안에서 일어난 LLM 호출/토큰 수/도구 호출을 집계하는 콜백 핸들러
+
+    current_usage에 설정되어 있으면 같은 컨텍스트의 모든 LangChain 실행(중첩된
+    서브 에이전트 포함)에 자동으로 연결됩니다.
+    """
+
+    def __init__(self):
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.llm_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.tools: Counter = Counter()
+        # 응답 캐시나 진행 중인 같은 요청(single-flight)의 결과를 받은 경우 True (사용량은 원래 요청에 집계됨)
+        self.cached = False
+        self._lock = threading.Lock()
+
+    def on_llm_end(self, response, **kwargs: Any):
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    input_tokens += usage.get("input_tokens", 0)
+                    output_tokens += usage.get("output_tokens", 0)
+        if not (input_tokens or output_tokens):
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            input_tokens = usage.get("prompt_tokens", 0)
+            output_tokens = usage.get("completion_tokens", 0)
+
+        with self._lock:
+            self.llm_calls += 1
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, **kwargs: Any):
+        self.record_tool((serialized or {}).get("name") or kwargs.get("name") or "unknown")
+
+    def record_tool(self, name: str):
+        with self._lock:
+            self.tools[name] += 1
+
+    def summary(self) -> Dict:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        with self._lock:
+            return {
+                "latency_ms": round((end - self.started) * 1000, 1) if self.started is not None else None,
+                "llm_calls": self.llm_calls,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "total_tokens": self.input_tokens + self.output_tokens,
+                "tool_calls": sum(self.tools.values()),
+                "tools": dict(self.tools),
+                "cached": self.cached,
+            }
+
+
+# 현재 요청의 사용량 집계기 (없으면 집계하지 않음)
+current_usage: ContextVar[Optional[UsageTracker]] = ContextVar("current_usage", default=None)
+register_configure_hook(current_usage, inheritable=True)
+
+
+def record_tool_call(name: str):
+    """LangChain Tool을 거치지 않고 바로 실행한 도구 호출(라우터 빠른 경로 등)을 기록합니다."""
+    tracker = current_usage.get()
+    if tracker is not None:
+        tracker.record_tool(name)
+
+
+def record_cache_hit():
+    """현재 요청이 LLM/도구를 실행하지 않고 캐시되거나 공유된 결과를 받았음을 기록합니다."""
+    tracker = current_usage.get()
+    if tracker is not None:
+        tracker.cached = True
+
+
+async def track_usage(tracker: UsageTracker, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+    """tracker를 현재 사용량 집계기로 설정하고 func를 실행합니다 (별도 태스크에서 실행해야 다른 요청과 섞이지 않음)."""
+    token = current_usage.set(tracker)
+    tracker.started = time.perf_counter()
+    try:
+        return await func(*args, **kwargs)
+    finally:
+        tracker.finished = time.perf_counter()
+        current_usage.reset(token)
@@ -0,0 +1,28 @@
+from ai.registry import get_super_agent, get_graph_super_agent, get_db_agent, get_ingestion_jobs
+from ai.rag.jobs import IngestionJobQueue
+from ai.agents.db_agent import DBAgent
+from ai.super_agent import SuperAgent
+from ai.graph_super_agent import GraphSuperAgent
+from database import AGENT_DATABASE_URL, get_engine
+
+
+# 동기 의존성은 FastAPI 스레드 풀에서 실행되므로 첫 생성 비용이 이벤트 루프를 막지 않음
+def get_langchain_agent() -> SuperAgent:
+    return get_super_agent()
+
+
+def get_langgraph_agent() -> GraphSuperAgent:
+    return get_graph_super_agent()
+
+
+def get_database_agent() -> DBAgent:
+    return get_db_agent()
+
+
+def get_agent_engine():
+    """DB 에이전트와 같은 데이터베이스의 공유 엔진 (에이전트를 만들지 않음)"""
+    return get_engine(AGENT_DATABASE_URL)
+
+
+def get_job_queue() -> IngestionJobQueue:
+    return get_ingestion_jobs()
@@ -1,14 +1,21 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from ai.config import COMPARE_CONFIG
 from ai.super_agent import SuperAgent
 from ai.graph_super_agent import GraphSuperAgent
+from ai.usage import UsageTracker, track_usage
+from api.dependencies import get_langchain_agent, get_langgraph_agent
+from api.sse import sse_response
 
 router = APIRouter()
 
-langchain_agent = SuperAgent()
-langgraph_agent = GraphSuperAgent()
+# 에이전트는 첫 요청 때 레지스트리에서 한 번 생성되어 main.py와 공유됨
 
 @router.post("/langchain/chat")
-async def chat_langchain(message: str):
+async def chat_langchain(message: str, langchain_agent: SuperAgent = Depends(get_langchain_agent)):
     try:
         response = await langchain_agent.run(message)
         return {"response": response, "type": "langchain"}
@@ -16,22 +23,65 @@ async def chat_langchain(message: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/langgraph/chat")
-async def chat_langgraph(message: str):
+async def chat_langgraph(message: str, langgraph_agent: GraphSuperAgent = Depends(get_langgraph_agent)):
     try:
         response = await langgraph_agent.run(message)
         return {"response": response, "type": "langgraph"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/langchain/chat/stream")
+async def chat_langchain_stream(message: str, langchain_agent: SuperAgent = Depends(get_langchain_agent)):
+    return sse_response(langchain_agent.stream_message(message))
+
+@router.post("/langgraph/chat/stream")
+async def chat_langgraph_stream(message: str, langgraph_agent: GraphSuperAgent = Depends(get_langgraph_agent)):
+    return sse_response(langgraph_agent.stream(message))
+
 @router.post("/compare/chat")
-async def compare_agents(message: str):
+async def compare_agents(
+    message: str,
+    deadline_seconds: Optional[float] = Query(None, gt=0),
+    langchain_agent: SuperAgent = Depends(get_langchain_agent),
+    langgraph_agent: GraphSuperAgent = Depends(get_langgraph_agent)
+):
+    """두 에이전트를 동시에 실행하고 에이전트별 지연 시간, 토큰 수, 도구 호출 수를 함께 반환합니다.
+
+    제한 시간(deadline_seconds, 기본값은 COMPARE_CONFIG)이 지나면 끝나지 않은 쪽은
+    취소하고 response를 null로, status를 timeout으로 돌려줍니다. 응답 캐시나 진행 중인
+    같은 요청의 결과를 받은 쪽은 사용량이 0이므로 metrics의 cached가 true입니다.
+    """
+    deadline = deadline_seconds
+    if deadline is None:
+        deadline = COMPARE_CONFIG["deadline_seconds"]
+    agents = {"langchain": langchain_agent, "langgraph": langgraph_agent}
+    trackers = {name: UsageTracker() for name in agents}
+    # 태스크마다 컨텍스트가 복사되므로 각 에이전트의 사용량이 따로 집계됨
+    tasks = {
+        name: asyncio.ensure_future(track_usage(trackers[name], agent.run, message))
+        for name, agent in agents.items()
+    }
+    started = time.perf_counter()
+    pending = set(tasks.values())
     try:
-        langchain_response = await langchain_agent.run(message)
-        langgraph_response = await langgraph_agent.run(message)
-        
-        return {
-            "langchain": langchain_response,
-            "langgraph": langgraph_response
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        _, pending = await asyncio.wait(pending, timeout=deadline)
+    finally:
+        # 끝나지 않은 쪽은 취소가 끝날 때까지 기다려 컬렉션 참조 등을 정리한 뒤 집계
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    
+    result = {"metrics": {}}
+    for name, task in tasks.items():
+        if task in pending or task.cancelled():
+            status, response = "timeout", None
+        elif task.exception() is not None:
+            status, response = "error", str(task.exception())
+        else:
+            status, response = "ok", task.result()
+        result[name] = response
+        result["metrics"][name] = {"status": status, **trackers[name].summary()}
+    result["wall_time_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    result["deadline_seconds"] = deadline
+    return result
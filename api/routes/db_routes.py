@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from ai.agents.sql_tools import iter_query_export, prepare_export_query
+from api.dependencies import get_agent_engine
+
+router = APIRouter()
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+@router.post("/db/export")
+def export_query(sql: str, format: str = "ndjson", engine=Depends(get_agent_engine)):
+    """읽기 전용 쿼리의 전체 결과를 LLM을 거치지 않고 스트리밍으로 내려줍니다."""
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format은 csv 또는 ndjson이어야 합니다")
+
+    query = prepare_export_query(sql)
+    if query is None:
+        raise HTTPException(status_code=400, detail="읽기 전용 SELECT 한 문장만 내보낼 수 있습니다")
+
+    return StreamingResponse(
+        iter_query_export(engine, query, format),
+        media_type=EXPORT_MEDIA_TYPES[format]
+    )
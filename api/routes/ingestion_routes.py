@@ -0,0 +1,39 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from ai.rag.collections import validate_collection_name
+from ai.rag.jobs import IngestionJobQueue, JobError
+from api.dependencies import get_job_queue
+
+router = APIRouter()
+
+@router.post("/documents/jobs")
+async def submit_job(
+    kind: str = "sync",
+    collection: Optional[str] = None,
+    file_path: Optional[str] = None,
+    jobs: IngestionJobQueue = Depends(get_job_queue)
+):
+    """문서 동기화(sync), 전체 재색인(reindex), 추가(add) 작업을 백그라운드로 실행합니다."""
+    try:
+        return await jobs.submit(kind, validate_collection_name(collection), file_path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/documents/jobs")
+def list_jobs(limit: int = 50, jobs: IngestionJobQueue = Depends(get_job_queue)):
+    return jobs.list(max(1, min(limit, 500)))
+
+@router.get("/documents/jobs/{job_id}")
+def get_job(job_id: str, jobs: IngestionJobQueue = Depends(get_job_queue)):
+    """작업 상태와 진행 상황(파일, 청크, 임베딩 수)을 조회합니다."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+    return job
+
+@router.delete("/documents/jobs/{job_id}")
+async def cancel_job(job_id: str, jobs: IngestionJobQueue = Depends(get_job_queue)):
+    try:
+        return jobs.cancel(job_id)
+    except JobError as e:
+        raise HTTPException(status_code=409, detail=str(e))
@@ -0,0 +1,19 @@
+import json
+from typing import AsyncIterator, Dict
+
+from fastapi.responses import StreamingResponse
+
+
+async def _encode_events(events: AsyncIterator[Dict]) -> AsyncIterator[str]:
+    """이벤트 dict를 SSE 형식(event/data)으로 변환합니다."""
+    async for event in events:
+        yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+
+
+def sse_response(events: AsyncIterator[Dict]) -> StreamingResponse:
+    return StreamingResponse(
+        _encode_events(events),
+        media_type="text/event-stream",
+        # 프록시 버퍼링을 꺼서 토큰이 바로 전달되도록 함
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
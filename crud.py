@@ -0,0 +1,147 @@
+import json
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import models
+from ai.config import DB_CACHE_CONFIG
+from ai.ttl_cache import TTLCache
+
+if TYPE_CHECKING:
+    # 비동기 드라이버(greenlet)가 없어도 동기 함수는 쓸 수 있도록 타입 검사 때만 import
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+USER_COLUMNS = {column.name: column for column in models.User.__table__.columns}
+
+# user_id -> (직렬화된 사용자, updated_datetime)
+# updated_datetime을 갱신하지 않는 쓰기(직접 실행한 SQL 등)도 TTL이 지나면 반영됨
+_user_cache = TTLCache(
+    max_entries=DB_CACHE_CONFIG["user_cache_size"],
+    ttl_seconds=DB_CACHE_CONFIG["user_cache_ttl_seconds"]
+)
+
+
+def user_columns(fields: Optional[str] = None) -> List:
+    """조회할 열 목록을 반환합니다. 커서로 쓰이는 user_id는 항상 포함합니다."""
+    if not fields:
+        return list(USER_COLUMNS.values())
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in USER_COLUMNS]
+    if unknown:
+        raise ValueError(f"알 수 없는 필드: {', '.join(unknown)}")
+    if "user_id" not in names:
+        names.insert(0, "user_id")
+    return [USER_COLUMNS[name] for name in names]
+
+
+def serialize_row(row) -> Dict[str, Any]:
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in row.items()
+    }
+
+
+def _users_page_query(columns: List, limit: int, after_id: Optional[int] = None, skip: int = 0):
+    """user_id 기준 키셋 페이지네이션 쿼리를 만듭니다.
+
+    ORM 객체를 만들지 않고 필요한 열만 Core 쿼리로 가져옵니다. after_id가 없을 때만
+    이전 호환을 위해 skip(OFFSET)을 사용합니다.
+    """
+    stmt = select(*columns).order_by(models.User.user_id).limit(limit)
+    if after_id is not None:
+        stmt = stmt.where(models.User.user_id > after_id)
+    elif skip:
+        stmt = stmt.offset(skip)
+    return stmt
+
+
+def _ndjson_lines(rows) -> str:
+    return "".join(json.dumps(serialize_row(row), ensure_ascii=False) + "\n" for row in rows)
+
+
+def get_users_page(db: Session, columns: List, limit: int,
+                   after_id: Optional[int] = None, skip: int = 0) -> List[Dict[str, Any]]:
+    """사용자 목록 한 페이지를 조회합니다."""
+    stmt = _users_page_query(columns, limit, after_id, skip)
+    return [serialize_row(row) for row in db.execute(stmt).mappings()]
+
+
+async def aget_users_page(db: "AsyncSession", columns: List, limit: int,
+                          after_id: Optional[int] = None, skip: int = 0) -> List[Dict[str, Any]]:
+    """get_users_page의 비동기 버전입니다."""
+    result = await db.execute(_users_page_query(columns, limit, after_id, skip))
+    return [serialize_row(row) for row in result.mappings()]
+
+
+def iter_users_ndjson(engine, columns: List, batch_size: int = 1000) -> Iterator[str]:
+    """전체 사용자를 키셋 배치로 읽으며 NDJSON 줄로 내보냅니다."""
+    after_id = None
+    with engine.connect() as conn:
+        while True:
+            rows = conn.execute(_users_page_query(columns, batch_size, after_id)).mappings().all()
+            if not rows:
+                break
+            yield _ndjson_lines(rows)
+            after_id = rows[-1]["user_id"]
+
+
+async def aiter_users_ndjson(async_engine, columns: List, batch_size: int = 1000) -> AsyncIterator[str]:
+    """iter_users_ndjson의 비동기 버전입니다."""
+    after_id = None
+    async with async_engine.connect() as conn:
+        while True:
+            result = await conn.execute(_users_page_query(columns, batch_size, after_id))
+            rows = result.mappings().all()
+            if not rows:
+                break
+            yield _ndjson_lines(rows)
+            after_id = rows[-1]["user_id"]
+
+
+def get_user(db: Session, user_id: int) -> Optional[Dict[str, Any]]:
+    """사용자를 조회합니다.
+
+    캐시에 있으면 updated_datetime만 확인하고, 바뀌지 않았으면 캐시된 값을 반환합니다.
+    updated_datetime이 없는 사용자는 변경 여부를 알 수 없으므로 캐시하지 않습니다.
+    """
+    cached = _user_cache.get(user_id)
+    if cached is not None:
+        user, updated_datetime = cached
+        current = db.execute(_updated_datetime_query(user_id)).first()
+        if current is not None and current[0] == updated_datetime:
+            return user
+
+    row = db.execute(_user_query(user_id)).mappings().first()
+    return _remember_user(user_id, row)
+
+
+async def aget_user(db: "AsyncSession", user_id: int) -> Optional[Dict[str, Any]]:
+    """get_user의 비동기 버전입니다."""
+    cached = _user_cache.get(user_id)
+    if cached is not None:
+        user, updated_datetime = cached
+        current = (await db.execute(_updated_datetime_query(user_id))).first()
+        if current is not None and current[0] == updated_datetime:
+            return user
+
+    row = (await db.execute(_user_query(user_id))).mappings().first()
+    return _remember_user(user_id, row)
+
+
+def _user_query(user_id: int):
+    return select(*USER_COLUMNS.values()).where(models.User.user_id == user_id)
+
+
+def _updated_datetime_query(user_id: int):
+    return select(models.User.updated_datetime).where(models.User.user_id == user_id)
+
+
+def _remember_user(user_id: int, row) -> Optional[Dict[str, Any]]:
+    if row is None:
+        return None
+    user = serialize_row(row)
+    if row["updated_datetime"] is not None:
+        _user_cache.set(user_id, (user, row["updated_datetime"]))
+    return user
@@ -1,7 +1,9 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import importlib.util
 import os
+import threading
 from dotenv import load_dotenv
 
 # .env 파일 로드
@@ -13,12 +15,85 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 DB_NAME = os.getenv("DB_NAME")
+# 비동기 드라이버 (aiomysql 또는 asyncmy)
+DB_ASYNC_DRIVER = os.getenv("DB_ASYNC_DRIVER", "aiomysql")
 
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# DATABASE_URL을 지정하면 MySQL 대신 사용 (예: 로컬 테스트용 sqlite:///primes_db.sqlite)
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# DB 에이전트가 조회하는 데이터베이스 (/db/export도 같은 엔진을 사용)
+AGENT_DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/ecommerce_db"
+
+# 커넥션 풀 설정 (배포 환경별로 환경 변수로 조정)
+POOL_OPTIONS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+}
+
+def pool_options(url: str) -> dict:
+    """SQLite는 풀 크기 설정을 지원하지 않으므로 해당 옵션을 제외합니다."""
+    if url.startswith("sqlite"):
+        return {key: POOL_OPTIONS[key] for key in ("pool_recycle", "pool_pre_ping")}
+    return POOL_OPTIONS
+
+def to_async_url(url: str) -> str:
+    """동기 드라이버 URL을 같은 데이터베이스의 비동기 드라이버 URL로 바꿉니다."""
+    scheme, rest = url.split("://", 1)
+    dialect = scheme.split("+", 1)[0]
+    if dialect == "mysql":
+        return f"mysql+{DB_ASYNC_DRIVER}://{rest}"
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+# to_async_url이 만드는 URL에서 쓰일 수 있는 비동기 드라이버
+ASYNC_DRIVERS = ("aiomysql", "asyncmy", "aiosqlite", "asyncpg")
+
+def async_driver_available(url: str) -> bool:
+    """url의 비동기 드라이버와 SQLAlchemy asyncio에 필요한 greenlet이 설치되어 있는지 확인합니다."""
+    driver = to_async_url(url).split("://", 1)[0].split("+", 1)[-1]
+    if driver not in ASYNC_DRIVERS:
+        return False
+    return all(importlib.util.find_spec(module) is not None for module in (driver, "greenlet"))
+
+_engines = {}
+_async_engines = {}
+_engines_lock = threading.Lock()
+
+def get_engine(url: str):
+    """URL별로 하나의 커넥션 풀을 공유하는 엔진을 반환합니다."""
+    with _engines_lock:
+        if url not in _engines:
+            _engines[url] = create_engine(url, **pool_options(url))
+        return _engines[url]
+
+def get_async_engine(url: str):
+    """get_engine의 비동기 버전으로, 같은 풀 설정을 사용합니다.
+
+    드라이버가 설치되어 있지 않으면 ImportError가 발생합니다.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    async_url = to_async_url(url)
+    with _engines_lock:
+        if async_url not in _async_engines:
+            _async_engines[async_url] = create_async_engine(async_url, **pool_options(async_url))
+        return _async_engines[async_url]
+
+engine = get_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 비동기 세션은 첫 요청 때 생성 (비동기 드라이버가 필요할 때만 로드)
+_async_session_factory = None
+# 비동기 드라이버가 없으면 API는 동기 세션을 스레드 풀에서 사용
+ASYNC_DB_AVAILABLE = async_driver_available(SQLALCHEMY_DATABASE_URL)
+
 Base = declarative_base()
 
 def get_db():
@@ -26,4 +101,33 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+def get_async_session_factory():
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = sessionmaker(
+            get_async_engine(SQLALCHEMY_DATABASE_URL),
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False
+        )
+    return _async_session_factory
+
+async def get_async_db():
+    async with get_async_session_factory()() as db:
+        yield db
+
+async def get_request_db():
+    """비동기 드라이버가 있으면 AsyncSession을, 없으면 동기 Session을 제공합니다."""
+    if ASYNC_DB_AVAILABLE:
+        async with get_async_session_factory()() as db:
+            yield db
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
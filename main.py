@@ -1,19 +1,34 @@
 from fastapi import FastAPI, Depends, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
 from ai.super_agent import SuperAgent
+from ai.rag.collections import validate_collection_name
+from ai.rag.jobs import IngestionJobQueue
+from ai.tracing import TracingMiddleware, tracer
+from api.dependencies import get_langchain_agent, get_job_queue
+from api.routes import agent_routes, db_routes, ingestion_routes
 import asyncio
 from langchain.document_loaders import TextLoader
 import os
 
+import crud
 import models
-from database import engine, get_db
+from database import ASYNC_DB_AVAILABLE, SQLALCHEMY_DATABASE_URL, engine, get_async_engine, get_request_db
+from api.sse import sse_response
 
 models.Base.metadata.create_all(bind=engine)
 
+if not ASYNC_DB_AVAILABLE:
+    print("Warning: 비동기 DB 드라이버가 설치되지 않아 /users API는 동기 세션을 스레드 풀에서 사용합니다.")
+
 app = FastAPI()
-super_agent = SuperAgent()
+# 요청마다 루트 스팬을 만들고, 그 안의 라우팅/LLM/도구/검색/SQL 스팬을 같은 트레이스로 묶음
+app.add_middleware(TracingMiddleware)
+app.include_router(agent_routes.router)
+app.include_router(db_routes.router)
+app.include_router(ingestion_routes.router)
 
 # 요청 모델 정의
 class Query(BaseModel):
@@ -25,24 +40,65 @@ class AgentResponse(BaseModel):
 
 class Message(BaseModel):
     content: str
+    collection: Optional[str] = None  # 검색할 RAG 컬렉션 (없으면 기본 컬렉션)
 
 class DocumentLoad(BaseModel):
     file_path: str
+    collection: Optional[str] = None
+
+def _collection(name: Optional[str]) -> str:
+    try:
+        return validate_collection_name(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _user_columns(fields: Optional[str]):
+    try:
+        return crud.user_columns(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _run_db(db, async_func, sync_func, *args, **kwargs):
+    """비동기 세션이면 async_func를, 동기 세션이면 sync_func를 스레드 풀에서 실행합니다."""
+    if isinstance(db, Session):
+        return await asyncio.to_thread(sync_func, db, *args, **kwargs)
+    return await async_func(db, *args, **kwargs)
 
 @app.get("/users/")
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    users = db.query(models.User).offset(skip).limit(limit).all()
-    return users
+async def read_users(
+    after_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[str] = None,
+    db = Depends(get_request_db)
+):
+    """사용자 목록을 조회합니다. 다음 페이지는 X-Next-Cursor 헤더 값을 after_id로 넘겨 조회합니다."""
+    limit = max(1, min(limit, 1000))
+    users = await _run_db(db, crud.aget_users_page, crud.get_users_page,
+                          _user_columns(fields), limit, after_id=after_id, skip=skip)
+    headers = {"X-Next-Cursor": str(users[-1]["user_id"])} if len(users) == limit else {}
+    return JSONResponse(users, headers=headers)
+
+@app.get("/users/export")
+async def export_users(fields: Optional[str] = None):
+    """전체 사용자를 NDJSON으로 스트리밍합니다."""
+    columns = _user_columns(fields)
+    if ASYNC_DB_AVAILABLE:
+        lines = crud.aiter_users_ndjson(get_async_engine(SQLALCHEMY_DATABASE_URL), columns)
+    else:
+        # 동기 제너레이터는 StreamingResponse가 스레드 풀에서 순회
+        lines = crud.iter_users_ndjson(engine, columns)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
 
 @app.get("/users/{user_id}")
-def read_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.user_id == user_id).first()
+async def read_user(user_id: int, db = Depends(get_request_db)):
+    user = await _run_db(db, crud.aget_user, crud.get_user, user_id)
     if user is None:
         raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
-    return user
+    return JSONResponse(user)
 
 @app.post("/ask/", response_model=AgentResponse)
-async def ask_agent(query: Query):
+async def ask_agent(query: Query, super_agent: SuperAgent = Depends(get_langchain_agent)):
     try:
         # 슈퍼에이전트에게 질문하고 응답 받기
         response = await super_agent.process_message(query.text)
@@ -53,51 +109,79 @@ async def ask_agent(query: Query):
             detail=f"에이전트 처리 중 오류가 발생했습니다: {str(e)}"
         )
 
+@app.post("/ask/stream")
+async def ask_agent_stream(query: Query, super_agent: SuperAgent = Depends(get_langchain_agent)):
+    """/ask/의 SSE 스트리밍 버전입니다."""
+    return sse_response(super_agent.stream_message(query.text))
+
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
 
 @app.post("/chat")
-async def chat(message: Message):
+async def chat(message: Message, super_agent: SuperAgent = Depends(get_langchain_agent)):
+    collection = _collection(message.collection)
     try:
-        response = await super_agent.process_message(message.content)
+        response = await super_agent.process_message(message.content, collection)
         return {"response": response}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/chat/stream")
+async def chat_stream(message: Message, super_agent: SuperAgent = Depends(get_langchain_agent)):
+    """/chat의 SSE 스트리밍 버전입니다."""
+    return sse_response(super_agent.stream_message(message.content, _collection(message.collection)))
+
 @app.post("/load-documents")
-async def load_documents(doc_load: DocumentLoad):
+async def load_documents(doc_load: DocumentLoad, super_agent: SuperAgent = Depends(get_langchain_agent)):
+    collection = _collection(doc_load.collection)
     try:
         if not os.path.exists(doc_load.file_path):
             raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
             
         loader = TextLoader(doc_load.file_path)
         documents = loader.load()
-        super_agent.initialize_rag(documents)
+        await asyncio.to_thread(super_agent.initialize_rag, documents, collection)
         return {"message": "문서가 성공적으로 로드되었습니다"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/documents/load")
-async def load_all_documents():
-    """모든 문서를 로드합니다."""
+async def load_all_documents(collection: Optional[str] = None, background: bool = False,
+                             super_agent: SuperAgent = Depends(get_langchain_agent),
+                             jobs: IngestionJobQueue = Depends(get_job_queue)):
+    """컬렉션의 모든 문서를 로드합니다. background이면 작업을 제출하고 바로 반환합니다."""
+    collection = _collection(collection)
+    if background:
+        return {"job": await jobs.submit("sync", collection)}
     try:
-        result = await super_agent.load_all_documents()
+        result = await super_agent.load_all_documents(collection)
         return {"message": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/documents/add")
-async def add_document(file_path: str):
-    """새로운 문서를 추가합니다."""
+async def add_document(file_path: str, collection: Optional[str] = None, background: bool = False,
+                       super_agent: SuperAgent = Depends(get_langchain_agent),
+                       jobs: IngestionJobQueue = Depends(get_job_queue)):
+    """컬렉션에 새로운 문서를 추가합니다. background이면 작업을 제출하고 바로 반환합니다."""
+    collection = _collection(collection)
+    if background:
+        return {"job": await jobs.submit("add", collection, file_path)}
     try:
-        result = await super_agent.add_document(file_path)
+        result = await super_agent.add_document(file_path, collection)
         return {"message": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metrics")
+async def metrics():
+    """스팬별 지연 시간 히스토그램과 토큰/오류 카운터 (Prometheus 텍스트 형식)"""
+    return PlainTextResponse(tracer.metrics.render(), media_type="text/plain; version=0.0.4")
+
 # CLI 테스트용
 async def test_super_agent():
+    super_agent = get_langchain_agent()
     test_queries = [
         "sample.txt 문서에서 인공지능 관련 내용을 찾아줘",
         "데이터베이스에서 사용자 정보를 조회해줘",
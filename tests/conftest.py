@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# 테스트는 MySQL 없이 메모리 SQLite로 실행
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+
+def pytest_sessionstart(session):
+    # ai.config가 만드는 data/ 디렉토리와 트레이스 파일이 저장소에 남지 않도록 임시 디렉토리에서 실행
+    os.chdir(tempfile.mkdtemp(prefix="prompt-demo-tests-"))
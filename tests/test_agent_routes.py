@@ -0,0 +1,78 @@
+import asyncio
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.dependencies import get_langchain_agent, get_langgraph_agent
+from api.routes import agent_routes
+from api.routes.agent_routes import compare_agents
+from ai.usage import current_usage, record_cache_hit
+
+
+class FakeAgent:
+    def __init__(self, delay=0.0, cached=False):
+        self.delay = delay
+        self.cached = cached
+        self.cancelled = False
+
+    async def run(self, message):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.cached:
+            record_cache_hit()
+        else:
+            current_usage.get().on_llm_end(SimpleNamespace(
+                generations=[], llm_output={"token_usage": {"prompt_tokens": 10, "completion_tokens": 5}}
+            ))
+        return f"{message} 응답"
+
+
+def _compare(langchain_agent, langgraph_agent, deadline=1.0):
+    return asyncio.run(compare_agents("질문", deadline, langchain_agent, langgraph_agent))
+
+
+def test_compare_reports_usage_and_cached_runs():
+    result = _compare(FakeAgent(), FakeAgent(cached=True))
+
+    assert result["langchain"] == result["langgraph"] == "질문 응답"
+    assert result["metrics"]["langchain"]["total_tokens"] == 15
+    assert result["metrics"]["langchain"]["cached"] is False
+    assert result["metrics"]["langgraph"]["total_tokens"] == 0
+    assert result["metrics"]["langgraph"]["cached"] is True
+
+
+def test_compare_cancels_agents_past_deadline():
+    slow = FakeAgent(delay=5)
+    result = _compare(FakeAgent(), slow, deadline=0.05)
+
+    assert result["langchain"] == "질문 응답"
+    assert result["langgraph"] is None
+    assert result["metrics"]["langgraph"]["status"] == "timeout"
+    # 응답을 돌려주기 전에 취소가 끝나 있어야 함
+    assert slow.cancelled
+    assert result["wall_time_ms"] < 1000
+
+
+def test_compare_uses_configured_deadline_by_default(monkeypatch):
+    monkeypatch.setitem(agent_routes.COMPARE_CONFIG, "deadline_seconds", 0.05)
+    result = _compare(FakeAgent(), FakeAgent(delay=5), deadline=None)
+
+    assert result["deadline_seconds"] == 0.05
+    assert result["metrics"]["langgraph"]["status"] == "timeout"
+
+
+def test_compare_rejects_non_positive_deadline():
+    app = FastAPI()
+    app.include_router(agent_routes.router)
+    app.dependency_overrides[get_langchain_agent] = FakeAgent
+    app.dependency_overrides[get_langgraph_agent] = FakeAgent
+    client = TestClient(app)
+
+    assert client.post("/compare/chat", params={"message": "질문", "deadline_seconds": 0}).status_code == 422
+    response = client.post("/compare/chat", params={"message": "질문", "deadline_seconds": 0.5})
+    assert response.status_code == 200
+    assert response.json()["deadline_seconds"] == 0.5
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from ai.rag.ann_index import ANN_BACKENDS, ANNIndex, create_ann_index, normalize_rows
+
+
+def _vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+@pytest.fixture(params=sorted(ANN_BACKENDS))
+def index_class(request):
+    # 백엔드 이름이 곧 라이브러리 모듈 이름
+    pytest.importorskip(request.param)
+    return ANN_BACKENDS[request.param]
+
+
+def _index(index_class, path):
+    return index_class(str(path), m=16, ef_construction=100, ef_search=64)
+
+
+def test_base_class_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        ANNIndex(str(tmp_path), m=16, ef_construction=100, ef_search=64)
+
+
+def test_normalize_rows_handles_zero_vector():
+    rows = normalize_rows([[3.0, 4.0], [0.0, 0.0]])
+    assert np.allclose(rows, [[0.6, 0.8], [0.0, 0.0]])
+
+
+def test_search_finds_exact_neighbour(index_class, tmp_path):
+    vectors = _vectors(200)
+    index = _index(index_class, tmp_path)
+    index.add([f"c{i}" for i in range(200)], vectors)
+
+    hits = index.search(vectors[17], 3)
+    assert hits[0][0] == "c17"
+    assert hits[0][1] == pytest.approx(1.0, abs=1e-4)
+    assert len(index) == 200
+
+
+def test_replace_and_remove(index_class, tmp_path):
+    vectors = _vectors(50)
+    index = _index(index_class, tmp_path)
+    ids = [f"c{i}" for i in range(50)]
+    index.add(ids, vectors)
+
+    index.add(["c0"], vectors[1:2])
+    index.remove(["c1"])
+
+    assert len(index) == 49
+    assert "c1" not in [chunk_id for chunk_id, _ in index.search(vectors[1], 49)]
+    assert index.search(vectors[1], 1)[0][0] == "c0"
+
+
+def test_save_and_reload(index_class, tmp_path):
+    vectors = _vectors(100)
+    index = _index(index_class, tmp_path)
+    index.add([f"c{i}" for i in range(100)], vectors)
+    index.remove(["c5"])
+    index.save()
+
+    reloaded = _index(index_class, tmp_path)
+    assert len(reloaded) == 99
+    assert reloaded.search(vectors[42], 1)[0][0] == "c42"
+    assert "c5" not in [chunk_id for chunk_id, _ in reloaded.search(vectors[5], 10)]
+
+
+def test_recall_against_brute_force(index_class, tmp_path):
+    vectors = _vectors(500, dim=32, seed=1)
+    queries = _vectors(20, dim=32, seed=2)
+    index = _index(index_class, tmp_path)
+    index.add([str(i) for i in range(500)], vectors)
+
+    exact = normalize_rows(queries) @ normalize_rows(vectors).T
+    found = 0
+    for query, scores in zip(queries, exact):
+        truth = {str(i) for i in np.argsort(-scores)[:10]}
+        found += len(truth & {chunk_id for chunk_id, _ in index.search(query, 10)})
+    assert found / 200 >= 0.9
+
+
+def test_empty_index_search(index_class, tmp_path):
+    assert _index(index_class, tmp_path).search([1.0, 0.0], 5) == []
+
+
+def test_unknown_backend_uses_chroma(tmp_path):
+    assert create_ann_index("chroma", str(tmp_path), 16, 100, 64) is None
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ai import registry
+from ai.rag.collections import CollectionRegistry, validate_collection_name
+
+
+class FakeTool:
+    def __init__(self, name):
+        self.collection = name
+        self.busy = False
+        self.closed = False
+        self.thread = threading.current_thread()
+
+    def close(self):
+        self.closed = True
+
+
+def _registry(idle_seconds=60, max_loaded=2):
+    created = []
+
+    def factory(name):
+        tool = FakeTool(name)
+        created.append(tool)
+        return tool
+
+    return CollectionRegistry(factory, idle_seconds=idle_seconds, max_loaded=max_loaded), created
+
+
+def test_validate_collection_name():
+    assert validate_collection_name(None) == validate_collection_name("")
+    with pytest.raises(ValueError):
+        validate_collection_name("../etc")
+
+
+def test_get_reuses_loaded_tool():
+    collections, created = _registry()
+    assert collections.get("a") is collections.get("a")
+    assert len(created) == 1
+
+
+def test_evicted_tool_is_closed():
+    collections, _ = _registry(max_loaded=2)
+    a = collections.get("a")
+    collections.get("b")
+    collections.get("c")
+
+    assert collections.loaded() == ["b", "c"]
+    assert a.closed
+
+
+def test_acquired_tool_is_not_evicted_until_released():
+    collections, _ = _registry(max_loaded=1)
+    a = collections.acquire("a")
+    b = collections.get("b")
+
+    assert not a.closed
+    assert set(collections.loaded()) == {"a", "b"}
+
+    collections.release("a")
+    collections.get("b")
+    assert a.closed and not b.closed
+    assert collections.loaded() == ["b"]
+
+
+def test_nested_acquire_needs_matching_releases():
+    collections, _ = _registry(max_loaded=1)
+    a = collections.acquire("a")
+    collections.acquire("a")
+    collections.release("a")
+    collections.get("b")
+    assert not a.closed
+
+    collections.release("a")
+    assert a.closed
+
+
+def test_busy_tool_is_not_evicted():
+    collections, _ = _registry(idle_seconds=0, max_loaded=1)
+    a = collections.get("a")
+    a.busy = True
+    time.sleep(0.01)
+    collections.get("b")
+
+    assert not a.closed
+    assert "a" in collections.loaded()
+
+
+def test_idle_tool_is_evicted():
+    collections, _ = _registry(idle_seconds=0.01, max_loaded=10)
+    a = collections.get("a")
+    time.sleep(0.02)
+    collections.get("b")
+
+    assert a.closed
+    assert collections.loaded() == ["b"]
+
+
+def test_async_use_builds_tool_off_the_event_loop(monkeypatch):
+    collections, created = _registry()
+    monkeypatch.setattr(registry, "get_rag_collections", lambda: collections)
+
+    async def scenario():
+        async with registry.ause_rag_tool("a") as tool:
+            assert collections._refs == {"a": 1}
+            return tool, threading.current_thread()
+
+    tool, loop_thread = asyncio.run(scenario())
+    assert tool.thread is not loop_thread
+    assert collections._refs == {}
+
+
+def test_async_use_releases_when_cancelled_while_loading(monkeypatch):
+    loading = threading.Event()
+    proceed = threading.Event()
+
+    def slow_factory(name):
+        loading.set()
+        proceed.wait(5)
+        return FakeTool(name)
+
+    collections = CollectionRegistry(slow_factory, idle_seconds=60, max_loaded=2)
+    monkeypatch.setattr(registry, "get_rag_collections", lambda: collections)
+
+    async def scenario():
+        async def use():
+            async with registry.ause_rag_tool("a"):
+                pass
+
+        task = asyncio.ensure_future(use())
+        await asyncio.to_thread(loading.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        proceed.set()
+        # 스레드가 컬렉션을 연 뒤 바로 놓아줄 때까지 대기
+        for _ in range(100):
+            if "a" in collections.loaded() and not collections._refs:
+                return True
+            await asyncio.sleep(0.01)
+        return False
+
+    assert asyncio.run(scenario())
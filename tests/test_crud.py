@@ -0,0 +1,123 @@
+import asyncio
+import json
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+import crud
+import models
+from ai.ttl_cache import TTLCache
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    models.Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add_all(
+            models.User(user_id=i, user_no=f"u{i}", user_name=f"user{i}", role_id=1)
+            for i in range(1, 8)
+        )
+        db.commit()
+    return engine
+
+
+@pytest.fixture(autouse=True)
+def user_cache(monkeypatch):
+    cache = TTLCache(max_entries=100, ttl_seconds=60)
+    monkeypatch.setattr(crud, "_user_cache", cache)
+    return cache
+
+
+def test_keyset_pages_follow_cursor(engine):
+    columns = crud.user_columns("user_name")
+    with Session(engine) as db:
+        first = crud.get_users_page(db, columns, 3)
+        second = crud.get_users_page(db, columns, 3, after_id=first[-1]["user_id"])
+        last = crud.get_users_page(db, columns, 3, after_id=second[-1]["user_id"])
+
+    assert [user["user_id"] for user in first + second + last] == list(range(1, 8))
+    assert set(first[0]) == {"user_id", "user_name"}
+
+
+def test_offset_is_used_only_without_cursor(engine):
+    columns = crud.user_columns()
+    with Session(engine) as db:
+        assert [u["user_id"] for u in crud.get_users_page(db, columns, 2, skip=2)] == [3, 4]
+        assert [u["user_id"] for u in crud.get_users_page(db, columns, 2, after_id=5, skip=2)] == [6, 7]
+
+
+def test_unknown_field_is_rejected():
+    with pytest.raises(ValueError):
+        crud.user_columns("user_name,password")
+
+
+def test_ndjson_export_reads_in_batches(engine):
+    lines = "".join(crud.iter_users_ndjson(engine, crud.user_columns("user_no"), batch_size=3)).splitlines()
+
+    assert [json.loads(line) for line in lines] == [
+        {"user_id": i, "user_no": f"u{i}"} for i in range(1, 8)
+    ]
+
+
+def test_async_keyset_page(tmp_path):
+    async def scenario():
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'users.sqlite'}")
+        async with async_engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+            await conn.execute(models.User.__table__.insert(), [
+                {"user_id": i, "user_no": f"u{i}", "user_name": f"user{i}"} for i in range(1, 6)
+            ])
+        async with AsyncSession(async_engine) as db:
+            page = await crud.aget_users_page(db, crud.user_columns(), 2, after_id=2)
+        await async_engine.dispose()
+        return [user["user_id"] for user in page]
+
+    assert asyncio.run(scenario()) == [3, 4]
+
+
+def test_user_without_updated_datetime_is_not_cached(engine, user_cache):
+    with Session(engine) as db:
+        assert crud.get_user(db, 1)["user_name"] == "user1"
+        # updated_datetime을 바꾸지 않는 직접 SQL 쓰기
+        db.execute(text("UPDATE tb_user SET user_name = 'renamed' WHERE user_id = 1"))
+        db.commit()
+        assert crud.get_user(db, 1)["user_name"] == "renamed"
+    assert user_cache.get(1) is None
+
+
+def test_cached_user_is_revalidated_by_updated_datetime(engine):
+    with Session(engine) as db:
+        db.execute(update(models.User).where(models.User.user_id == 2)
+                   .values(updated_datetime=datetime(2024, 1, 1)))
+        db.commit()
+        assert crud.get_user(db, 2)["user_name"] == "user2"
+        db.execute(update(models.User).where(models.User.user_id == 2)
+                   .values(user_name="changed", updated_datetime=datetime(2024, 1, 2)))
+        db.commit()
+        assert crud.get_user(db, 2)["user_name"] == "changed"
+
+
+def test_cached_user_expires_after_ttl(engine, user_cache):
+    user_cache.ttl_seconds = 0.05
+    with Session(engine) as db:
+        db.execute(update(models.User).where(models.User.user_id == 3)
+                   .values(updated_datetime=datetime(2024, 1, 1)))
+        db.commit()
+        crud.get_user(db, 3)
+        # updated_datetime은 그대로 두고 이름만 바꾸는 쓰기
+        db.execute(text("UPDATE tb_user SET user_name = 'silent' WHERE user_id = 3"))
+        db.commit()
+        assert crud.get_user(db, 3)["user_name"] == "user3"
+        time.sleep(0.06)
+        assert crud.get_user(db, 3)["user_name"] == "silent"
+
+
+def test_missing_user_returns_none(engine):
+    with Session(engine) as db:
+        assert crud.get_user(db, 999) is None
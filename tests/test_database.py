@@ -0,0 +1,36 @@
+import asyncio
+import importlib.util
+
+from sqlalchemy.orm import Session
+
+import database
+
+
+def test_async_driver_available_for_installed_driver(monkeypatch):
+    installed = {"aiosqlite", "greenlet"}
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: object() if name in installed else None)
+
+    assert database.async_driver_available("sqlite:///users.sqlite")
+    assert not database.async_driver_available("mysql+pymysql://u:p@host:3306/db")
+
+
+def test_async_driver_requires_greenlet(monkeypatch):
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: object() if name == "aiosqlite" else None)
+
+    assert not database.async_driver_available("sqlite:///users.sqlite")
+
+
+def test_unknown_dialect_has_no_async_driver():
+    assert not database.async_driver_available("postgresql+psycopg2://u:p@host/db")
+
+
+def test_request_db_falls_back_to_sync_session(monkeypatch):
+    monkeypatch.setattr(database, "ASYNC_DB_AVAILABLE", False)
+
+    async def first_session():
+        sessions = database.get_request_db()
+        db = await sessions.__anext__()
+        await sessions.aclose()
+        return db
+
+    assert isinstance(asyncio.run(first_session()), Session)
@@ -0,0 +1,107 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from ai.agents import db_agent as db_agent_module
+from ai.agents.db_agent import DBAgent
+from ai.singleflight import SingleFlight
+from ai.ttl_cache import TTLCache
+
+QUESTION = "사용자 수를 알려줘"
+SQL = "SELECT COUNT(*) FROM users"
+
+
+class FakeAgentExecutor:
+    def __init__(self):
+        self.calls = 0
+
+    def _result(self):
+        self.calls += 1
+        action = SimpleNamespace(tool="MySQL_쿼리실행", tool_input=SQL)
+        return {"output": "사용자는 42명입니다.", "intermediate_steps": [(action, "[(42,)]")]}
+
+    def invoke(self, inputs):
+        return self._result()
+
+    async def ainvoke(self, inputs):
+        return self._result()
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr(db_agent_module, "run_sql", lambda db, query: "[(42,)]")
+
+    async def arun_sql(db, async_engine, query):
+        return "[(42,)]"
+
+    monkeypatch.setattr(db_agent_module, "arun_sql", arun_sql)
+
+    agent = DBAgent.__new__(DBAgent)
+    agent.db = SimpleNamespace(schema_version=1, get_usable_table_names=lambda: ["users"])
+    agent.async_engine = None
+    agent.sql_cache = TTLCache(10)
+    agent.result_cache = None
+    agent.answer_chain = RunnableLambda(lambda inputs: f"{inputs['result']} 기준 42명입니다.")
+    agent.agent_executor = FakeAgentExecutor()
+    agent._flight = SingleFlight(enabled=False)
+    return agent
+
+
+def test_cached_sql_answer_is_natural_language(agent):
+    first = agent.run(QUESTION)
+    second = agent.run(QUESTION)
+
+    assert first == "사용자는 42명입니다."
+    assert second == "[(42,)] 기준 42명입니다."
+    assert agent.agent_executor.calls == 1
+
+
+def test_cached_sql_answer_is_natural_language_async(agent):
+    async def scenario():
+        return await agent.arun(QUESTION), await agent.arun(QUESTION)
+
+    assert asyncio.run(scenario()) == ("사용자는 42명입니다.", "[(42,)] 기준 42명입니다.")
+    assert agent.agent_executor.calls == 1
+
+
+def test_explicit_sql_returns_raw_result(agent):
+    assert agent.run(SQL) == "[(42,)]"
+    assert agent.agent_executor.calls == 0
+
+
+def test_concurrent_natural_language_requests_are_not_coalesced(agent):
+    agent._flight = SingleFlight(enabled=True)
+    executor = agent.agent_executor
+
+    async def slow_ainvoke(inputs):
+        await asyncio.sleep(0.02)
+        return executor._result()
+
+    executor.ainvoke = slow_ainvoke
+
+    async def scenario():
+        # 자연어 요청은 쓰기일 수 있으므로 동시에 들어와도 각각 실행
+        return await asyncio.gather(agent.arun("주문 저장해줘"), agent.arun("주문 저장해줘"))
+
+    asyncio.run(scenario())
+    assert executor.calls == 2
+
+
+def test_concurrent_read_only_sql_is_coalesced(agent, monkeypatch):
+    agent._flight = SingleFlight(enabled=True)
+    calls = []
+
+    async def arun_sql(db, async_engine, query):
+        calls.append(query)
+        await asyncio.sleep(0.02)
+        return "[(42,)]"
+
+    monkeypatch.setattr(db_agent_module, "arun_sql", arun_sql)
+
+    async def scenario():
+        return await asyncio.gather(agent.arun(SQL), agent.arun(SQL))
+
+    assert asyncio.run(scenario()) == ["[(42,)]", "[(42,)]"]
+    assert len(calls) == 1
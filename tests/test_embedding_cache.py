@@ -0,0 +1,44 @@
+import time
+
+from ai.rag.embedding_cache import EmbeddingStore
+
+
+def _store(tmp_path, max_entries):
+    return EmbeddingStore(str(tmp_path / "embeddings.sqlite"), max_entries)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    store = _store(tmp_path, 3)
+    for i in range(3):
+        store.put_many("m", {f"h{i}": [float(i)]})
+        time.sleep(0.01)
+    store.get_many("m", ["h0"])  # h0을 최근 사용으로 갱신
+    store.put_many("m", {"h3": [3.0]})
+
+    assert set(store.get_many("m", ["h0", "h1", "h2", "h3"])) == {"h0", "h2", "h3"}
+    assert store._count == 3
+
+
+def test_replacing_existing_entry_does_not_grow_count(tmp_path):
+    store = _store(tmp_path, 10)
+    store.put_many("m", {"a": [1.0], "b": [2.0]})
+    store.put_many("m", {"a": [5.0], "c": [3.0]})
+
+    assert store._count == 3
+    assert store.get_many("m", ["a"])["a"] == [5.0]
+
+
+def test_put_does_not_count_whole_table(tmp_path):
+    store = _store(tmp_path, 2)
+    statements = []
+    store._conn.set_trace_callback(statements.append)
+    for i in range(5):
+        store.put_many("m", {f"h{i}": [float(i)]})
+
+    assert not [sql for sql in statements if "COUNT(*)" in sql]
+    assert store._count == 2
+
+
+def test_count_survives_reopen(tmp_path):
+    _store(tmp_path, 10).put_many("m", {"a": [1.0], "b": [2.0]})
+    assert _store(tmp_path, 10)._count == 2
@@ -0,0 +1,102 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from ai import graph_super_agent, registry
+from ai.graph_super_agent import GraphSuperAgent
+from ai.rag.collections import CollectionRegistry
+from ai.router import IntentRouter
+from ai.singleflight import SingleFlight
+
+
+class SlowAgent:
+    def __init__(self, name, delay=0.1):
+        self.name = name
+        self.delay = delay
+        self.calls = 0
+
+    async def arun(self, message):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return f"{self.name} 결과"
+
+
+class PromptLLM:
+    def __init__(self):
+        self.prompts = []
+
+    async def ainvoke(self, messages):
+        self.prompts.append(messages[0].content)
+        return SimpleNamespace(content="종합 답변")
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    async def retrieve(query):
+        await asyncio.sleep(0.1)
+        return "문서 컨텍스트"
+
+    rag_tool = SimpleNamespace(collection="default", busy=False, _arun=retrieve)
+    collections = CollectionRegistry(lambda name: rag_tool, idle_seconds=60, max_loaded=4)
+    monkeypatch.setattr(registry, "get_rag_collections", lambda: collections)
+
+    agent = GraphSuperAgent.__new__(GraphSuperAgent)
+    agent.llm = PromptLLM()
+    agent.router = IntentRouter()
+    agent.sub_agents = {name: SlowAgent(name) for name in ("db", "doc", "search")}
+    agent._flight = SingleFlight(enabled=True)
+    agent.workflow = agent._create_workflow()
+    return agent
+
+
+def test_composite_question_fans_out_to_db_and_rag(agent):
+    message = "우리 매출 데이터와 문서 내용을 비교해줘"
+    assert agent.route_message({"message": message}) == ["db", "rag"]
+
+    started = time.perf_counter()
+    assert asyncio.run(agent.run(message)) == "종합 답변"
+    elapsed = time.perf_counter() - started
+
+    # 분기는 병렬로 실행되므로 가장 느린 분기 하나 정도의 시간만 걸림
+    assert elapsed < 0.18
+    prompt = agent.llm.prompts[-1]
+    assert "[데이터베이스]\ndb 결과" in prompt
+    assert "[저장된 문서]\n문서 컨텍스트" in prompt
+
+
+def test_slow_branch_is_dropped_but_db_is_awaited(agent, monkeypatch):
+    monkeypatch.setitem(graph_super_agent.GRAPH_CONFIG, "branch_timeout_seconds", 0.05)
+    agent.sub_agents["db"].delay = 0.2
+
+    # RAG 분기는 제한 시간을 넘겨 빠지고, 쓰기일 수 있는 DB 분기는 끝까지 기다림
+    assert asyncio.run(agent.run("우리 매출 데이터와 문서 내용을 비교해줘")) == "db 결과"
+    assert agent.sub_agents["db"].calls == 1
+
+
+def test_slow_idempotent_branches_are_dropped(agent, monkeypatch):
+    monkeypatch.setitem(graph_super_agent.GRAPH_CONFIG, "branch_timeout_seconds", 0.05)
+    agent.sub_agents["search"].delay = 1
+
+    assert asyncio.run(agent.run("웹에서 검색해줘")) == "종합 답변"
+    prompt = agent.llm.prompts[-1]
+    assert "search 결과" not in prompt
+
+
+def test_concurrent_db_writes_are_not_coalesced(agent):
+    async def scenario():
+        message = "사용자 테이블에 홍길동을 저장해줘"
+        return await asyncio.gather(agent.run(message), agent.run(message))
+
+    assert asyncio.run(scenario()) == ["db 결과", "db 결과"]
+    assert agent.sub_agents["db"].calls == 2
+
+
+def test_concurrent_searches_are_coalesced(agent):
+    async def scenario():
+        message = "최신 뉴스 알려줘"
+        return await asyncio.gather(agent.run(message), agent.run(message))
+
+    assert asyncio.run(scenario()) == ["search 결과", "search 결과"]
+    assert agent.sub_agents["search"].calls == 1
@@ -0,0 +1,52 @@
+import pytest
+from langchain.schema import Document
+
+from ai.rag.bm25 import BM25Index, tokenize
+from ai.rag.hybrid import reciprocal_rank_fusion, rerank
+
+
+def test_tokenize_korean_bigrams_and_codes():
+    tokens = tokenize("휴가규정 AB-1234")
+    assert "휴가규정" in tokens and "규정" in tokens
+    assert {"ab-1234", "ab", "1234"} <= set(tokens)
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = BM25Index(str(tmp_path / "bm25.sqlite"))
+    index.add(["a", "b", "c"], ["연차 휴가 규정 안내", "제품 AB-1234 사양", "출장비 정산 규정"])
+    yield index
+    index.close()
+
+
+def test_bm25_finds_exact_codes(index):
+    assert index.search("AB-1234 최대 전력", 2)[0][0] == "b"
+
+
+def test_bm25_replace_remove_and_reopen(index, tmp_path):
+    index.add(["a"], ["재택 근무 안내"])
+    assert len(index) == 3
+    assert not index.search("연차", 3)
+    index.remove(["c", "missing"])
+    assert index.chunk_ids() == {"a", "b"}
+    index.close()
+
+    reopened = BM25Index(str(tmp_path / "bm25.sqlite"))
+    assert len(reopened) == 2
+    assert reopened.search("재택", 1)[0][0] == "a"
+    reopened.close()
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+    assert [chunk_id for chunk_id, _ in fused] == ["b", "a", "d", "c"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+
+
+def test_rerank_uses_similarity_and_keyword_coverage():
+    docs = [Document(page_content="출장비 정산"), Document(page_content="연차 휴가 규정")]
+    vectors = [[1.0, 0.0], [0.9, 0.1]]
+
+    assert rerank("휴가 규정", [1.0, 0.0], docs, vectors, keyword_weight=0.0)[0] is docs[0]
+    assert rerank("휴가 규정", [1.0, 0.0], docs, vectors, keyword_weight=0.5)[0] is docs[1]
+    assert rerank("질문", [1.0, 0.0], [], [], keyword_weight=0.5) == []
@@ -0,0 +1,94 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from ai import registry
+from ai.rag.jobs import IngestionJobQueue, JobError
+
+
+class SlowTool:
+    def __init__(self):
+        self.started = asyncio.Event()
+
+    async def async_reindex(self, on_progress=None):
+        self.started.set()
+        await asyncio.sleep(10)
+        return {"files": 1}
+
+
+class FastTool:
+    async def async_reindex(self, on_progress=None):
+        on_progress({"files": 1})
+        return {"files": 1}
+
+
+def _use(monkeypatch, tool):
+    @asynccontextmanager
+    async def ause_rag_tool(collection=None):
+        yield tool
+
+    monkeypatch.setattr(registry, "ause_rag_tool", ause_rag_tool)
+
+
+async def _wait_for_status(queue, job_id, status):
+    for _ in range(200):
+        if queue.get(job_id)["status"] == status:
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+def test_job_succeeds_and_records_result(monkeypatch, tmp_path):
+    _use(monkeypatch, FastTool())
+
+    async def scenario():
+        queue = IngestionJobQueue(str(tmp_path / "jobs.sqlite"), workers=1)
+        job = await queue.submit("sync", "default")
+        assert await _wait_for_status(queue, job["id"], "succeeded")
+        return queue.get(job["id"])
+
+    assert asyncio.run(scenario())["result"] == {"files": 1}
+
+
+def test_cancel_running_job_from_another_thread(monkeypatch, tmp_path):
+    tool = SlowTool()
+    _use(monkeypatch, tool)
+
+    async def scenario():
+        queue = IngestionJobQueue(str(tmp_path / "jobs.sqlite"), workers=1)
+        job = await queue.submit("sync", "default")
+        await asyncio.wait_for(tool.started.wait(), 5)
+        # 동기 라우트처럼 스레드 풀에서 취소
+        await asyncio.to_thread(queue.cancel, job["id"])
+        return await _wait_for_status(queue, job["id"], "cancelled")
+
+    # 디버그 모드의 이벤트 루프는 다른 스레드에서 루프를 건드리면 RuntimeError를 냄
+    assert asyncio.run(scenario(), debug=True)
+
+
+def test_cancel_queued_job_and_reject_finished(monkeypatch, tmp_path):
+    tool = SlowTool()
+    _use(monkeypatch, tool)
+
+    async def scenario():
+        queue = IngestionJobQueue(str(tmp_path / "jobs.sqlite"), workers=1)
+        running = await queue.submit("sync", "default")
+        queued = await queue.submit("sync", "default")
+        await asyncio.wait_for(tool.started.wait(), 5)
+        assert queue.cancel(queued["id"])["status"] == "cancelled"
+        with pytest.raises(JobError):
+            queue.cancel(queued["id"])
+        queue.cancel(running["id"])
+        assert await _wait_for_status(queue, running["id"], "cancelled")
+
+    asyncio.run(scenario())
+
+
+def test_unknown_kind_is_rejected(tmp_path):
+    async def scenario():
+        queue = IngestionJobQueue(str(tmp_path / "jobs.sqlite"), workers=1)
+        with pytest.raises(ValueError):
+            await queue.submit("drop", "default")
+
+    asyncio.run(scenario())
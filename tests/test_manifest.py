@@ -0,0 +1,51 @@
+from langchain.schema import Document
+
+from ai.rag.manifest import IngestionManifest, file_sha256, make_chunk_ids, text_sha256
+
+
+def test_chunk_ids_are_deterministic_and_unique():
+    chunks = [Document(page_content="같은 내용", metadata={"page": 1}),
+              Document(page_content="같은 내용", metadata={"page": 1}),
+              Document(page_content="같은 내용", metadata={"page": 2})]
+
+    ids = make_chunk_ids("a.txt", chunks)
+    assert ids == make_chunk_ids("a.txt", chunks)
+    assert len(set(ids)) == 3
+    assert set(ids).isdisjoint(make_chunk_ids("b.txt", chunks))
+
+
+def test_unchanged_prefix_keeps_chunk_ids():
+    first = [Document(page_content="첫째"), Document(page_content="둘째")]
+    edited = [Document(page_content="첫째"), Document(page_content="고친 둘째")]
+    assert make_chunk_ids("a.txt", first)[0] == make_chunk_ids("a.txt", edited)[0]
+    assert make_chunk_ids("a.txt", first)[1] != make_chunk_ids("a.txt", edited)[1]
+
+
+def test_hashes(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"hello")
+    assert file_sha256(str(path)) == "2cf24dba5fb0a30e26e83b2ac5b9e29e1b161e5c1fa7425e73043362938b9824"
+    # 구분자가 있어 이어붙인 결과가 같아도 해시가 다름
+    assert text_sha256(["ab", "c"]) != text_sha256(["a", "bc"])
+
+
+def test_manifest_round_trip(tmp_path):
+    path = str(tmp_path / "store" / "manifest.json")
+    manifest = IngestionManifest(path)
+    manifest.update("a.txt", 1.0, "hash-a", ["a:0", "a:1"])
+    manifest.update("b.txt", 2.0, "hash-b", ["b:0"])
+    manifest.touch("a.txt", 3.0)
+    assert manifest.remove("b.txt") == ["b:0"]
+    assert manifest.remove("missing.txt") == []
+    manifest.save()
+
+    loaded = IngestionManifest(path)
+    assert loaded.sources() == ["a.txt"]
+    assert loaded.get("a.txt") == {"mtime": 3.0, "sha256": "hash-a", "chunk_ids": ["a:0", "a:1"]}
+
+
+def test_corrupt_manifest_starts_empty(tmp_path, capsys):
+    path = tmp_path / "manifest.json"
+    path.write_text("{", encoding="utf-8")
+    assert len(IngestionManifest(str(path))) == 0
+    assert "Warning" in capsys.readouterr().out
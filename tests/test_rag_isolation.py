@@ -0,0 +1,114 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+
+import pytest
+
+from ai import registry
+from ai.agents.rag_agent import RAGTool
+from ai.config import RAG_CONFIG
+from ai.rag.jobs import IngestionJobQueue
+
+
+class FakeCollection:
+    def __init__(self):
+        self.rows = {}
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        for row in zip(ids, embeddings, documents, metadatas):
+            self.rows[row[0]] = row[1:]
+
+    def get(self, ids=None, include=(), limit=None, offset=0):
+        ids = sorted(self.rows) if ids is None else [chunk_id for chunk_id in ids if chunk_id in self.rows]
+        ids = ids[offset:offset + limit if limit else None]
+        return {
+            "ids": ids,
+            "embeddings": [self.rows[chunk_id][0] for chunk_id in ids],
+            "documents": [self.rows[chunk_id][1] for chunk_id in ids],
+            "metadatas": [self.rows[chunk_id][2] for chunk_id in ids],
+        }
+
+    def query(self, query_embeddings, n_results, include=()):
+        return {"ids": [sorted(self.rows)[:n_results]]}
+
+    def peek(self, limit):
+        return self.get(limit=limit)
+
+
+class FakeStore:
+    def __init__(self):
+        self._collection = FakeCollection()
+
+    def delete(self, ids):
+        for chunk_id in ids:
+            self._collection.rows.pop(chunk_id, None)
+
+
+class BlockingEmbeddings:
+    """block이 포함된 문서를 임베딩할 때 release될 때까지 멈춤"""
+
+    def __init__(self):
+        self.block = None
+        self.embedding = threading.Event()
+        self.release = threading.Event()
+
+    def embed_documents(self, texts):
+        if self.block and any(self.block in text for text in texts):
+            self.embedding.set()
+            self.release.wait(5)
+        return [[1.0, float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return [1.0, float(len(text))]
+
+
+@pytest.fixture
+def tool(monkeypatch):
+    monkeypatch.setitem(RAG_CONFIG, "load_workers", 1)
+    monkeypatch.setitem(RAG_CONFIG, "embed_concurrency", 1)
+    stores = {}
+    monkeypatch.setattr(RAGTool, "_open_vector_store", lambda self, path: stores.setdefault(path, FakeStore()))
+    tool = RAGTool("isolation", embeddings=BlockingEmbeddings())
+    yield tool
+    tool.close()
+
+
+def _write(tool, filename, text):
+    with open(f"{tool.documents_path}/{filename}", "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_query_during_background_sync_sees_previous_corpus(tool, monkeypatch):
+    _write(tool, "old.txt", "이전 휴가 규정")
+    tool.reindex()
+    assert "이전 휴가 규정" in tool._retrieve("휴가 규정")
+
+    @asynccontextmanager
+    async def ause_rag_tool(collection=None):
+        yield tool
+
+    monkeypatch.setattr(registry, "ause_rag_tool", ause_rag_tool)
+    # a.txt가 반영된 뒤 b.txt를 임베딩하는 중에 검색
+    _write(tool, "a.txt", "새 출장 규정")
+    _write(tool, "b.txt", "새 재택 규정")
+    tool.embeddings.block = "재택"
+
+    async def scenario(tmp_dir):
+        queue = IngestionJobQueue(f"{tmp_dir}/jobs.sqlite", workers=1)
+        job = await queue.submit("sync", tool.collection)
+        assert await asyncio.to_thread(tool.embeddings.embedding.wait, 5)
+
+        # 작업이 일부 파일만 반영한 동안에도 검색은 이전 스냅샷을 그대로 사용
+        during = await asyncio.to_thread(tool._retrieve, "규정")
+        tool.embeddings.release.set()
+        for _ in range(200):
+            if queue.get(job["id"])["status"] in ("succeeded", "failed"):
+                break
+            await asyncio.sleep(0.01)
+        return during, queue.get(job["id"])
+
+    during, job = asyncio.run(scenario(tool.store_path))
+    assert "이전 휴가 규정" in during and "새 출장 규정" not in during
+    assert job["status"] == "succeeded"
+    after = tool._retrieve("규정")
+    assert "새 출장 규정" in after and "새 재택 규정" in after
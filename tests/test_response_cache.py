@@ -0,0 +1,90 @@
+import asyncio
+
+from ai.response_cache import ResponseCache
+
+
+class CharEmbeddings:
+    """글자 빈도 벡터 (비슷한 문장은 코사인 유사도가 높음)"""
+
+    async def aembed_query(self, text):
+        vector = [0.0] * 64
+        for char in text:
+            vector[ord(char) % 64] += 1.0
+        return vector
+
+
+def _cache(**overrides):
+    options = {"ttl_seconds": 60, "max_entries": 10, "similarity_threshold": 0.95}
+    options.update(overrides)
+    return ResponseCache(CharEmbeddings(), **options)
+
+
+def test_exact_match_ignores_case_spacing_and_punctuation():
+    async def scenario():
+        cache = _cache(similarity_threshold=1.0)
+        await cache.set("휴가 규정  알려줘?", "15일", 1)
+        return await cache.get("휴가 규정 알려줘", 1)
+
+    assert asyncio.run(scenario()) == "15일"
+
+
+def test_semantic_match_above_threshold():
+    async def scenario():
+        cache = _cache(similarity_threshold=0.9)
+        await cache.set("회사 휴가 규정을 알려줘", "15일", 1)
+        return await cache.get("회사 휴가 규정 알려줘", 1), await cache.get("오늘 날씨 어때", 1)
+
+    assert asyncio.run(scenario()) == ("15일", None)
+
+
+def test_non_semantic_lookup_uses_exact_match_only():
+    async def scenario():
+        cache = _cache(similarity_threshold=0.9)
+        await cache.set("이 문장을 영어로 번역해줘", "번역", 1, semantic=False)
+        await cache.set("회사 휴가 규정을 알려줘", "15일", 1)
+        return (
+            await cache.get("이 문장을 영어로 번역해 줘", 1),
+            await cache.get("회사 휴가 규정 알려줘", 1, semantic=False),
+            await cache.get("이 문장을 영어로 번역해줘", 1, semantic=False),
+        )
+
+    assert asyncio.run(scenario()) == (None, None, "번역")
+
+
+def test_version_change_invalidates():
+    async def scenario():
+        cache = _cache()
+        await cache.set("질문", "답", 1)
+        return await cache.get("질문", 2)
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_expired_entry_is_not_returned():
+    async def scenario():
+        cache = _cache(ttl_seconds=0)
+        await cache.set("질문", "답", 1)
+        return await cache.get("질문", 1)
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_namespaces_are_isolated():
+    async def scenario():
+        cache = _cache()
+        await cache.set("질문", "a의 답", 1, "a")
+        return await cache.get("질문", 1, "b"), await cache.get("질문", 1, "a")
+
+    assert asyncio.run(scenario()) == (None, "a의 답")
+
+
+def test_lru_eviction():
+    async def scenario():
+        cache = _cache(max_entries=2, similarity_threshold=1.0)
+        await cache.set("q1", "a1", 1)
+        await cache.set("q2", "a2", 1)
+        await cache.get("q1", 1)
+        await cache.set("q3", "a3", 1)
+        return [await cache.get(q, 1) for q in ("q1", "q2", "q3")]
+
+    assert asyncio.run(scenario()) == ["a1", None, "a3"]
@@ -0,0 +1,57 @@
+import re
+
+import pytest
+
+from ai.router import IntentRouter, NaiveBayesClassifier, _trie_pattern
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouter()
+
+
+def test_trie_pattern_prefers_longest_keyword():
+    pattern = re.compile(_trie_pattern(["검색", "검색해줘", "검색해서"]))
+    assert pattern.findall("웹 검색해줘 그리고 검색") == ["검색해줘", "검색"]
+
+
+@pytest.mark.parametrize("message", ["feedback 정리해줘", "adblock 설치법", "nosql과 mysql 차이"])
+def test_ascii_keywords_need_word_boundary(router, message):
+    assert "db" not in router.select(message)
+
+
+@pytest.mark.parametrize("message", ["DB에서 사용자 조회해줘", "sql 쿼리 짜줘", "db 테이블 목록"])
+def test_ascii_keywords_match_as_words(router, message):
+    assert router.route(message) == {"route": "db", "confident": True, "source": "keyword", "score": 2.0}
+
+
+def test_rag_keywords_take_precedence_over_file_names(router):
+    result = router.route("sample.txt 문서에서 인공지능 관련 내용을 찾아줘")
+    assert result["route"] == "rag"
+    assert result["confident"]
+    assert router.select("sample.txt 문서에서 인공지능 관련 내용을 찾아줘") == ["rag"]
+
+
+def test_file_name_alone_routes_to_doc(router):
+    result = router.route("sample.txt 파일을 읽어줘")
+    assert result["route"] == "doc"
+    assert result["confident"]
+
+
+def test_multiple_routes_are_not_confident(router):
+    result = router.route("웹에서 검색해줘")
+    assert not result["confident"]
+    assert router.select("웹에서 검색해줘") == ["search", "rag"]
+
+
+def test_unknown_message_falls_back_to_llm(router):
+    assert router.route("qwerty")["route"] is None
+    assert router.select("qwerty") == ["llm"]
+
+
+def test_classifier_probabilities():
+    classifier = NaiveBayesClassifier().fit([("사용자 수 알려줘", "db"), ("휴가 규정 알려줘", "rag")])
+    proba = classifier.predict_proba("사용자 수")
+    assert max(proba, key=proba.get) == "db"
+    assert sum(proba.values()) == pytest.approx(1.0)
+    assert classifier.predict_proba("zzz") == {}
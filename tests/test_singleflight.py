@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ai.singleflight import SingleFlight
+
+
+def test_ado_coalesces_concurrent_calls():
+    flight = SingleFlight(enabled=True)
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    async def scenario():
+        return await asyncio.gather(*(flight.ado("key", work, 21) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [42] * 5
+    assert calls == [21]
+    assert not flight._tasks
+
+
+def test_ado_does_not_keep_results():
+    flight = SingleFlight(enabled=True)
+    calls = []
+
+    async def work():
+        calls.append(1)
+        return len(calls)
+
+    async def scenario():
+        return [await flight.ado("key", work) for _ in range(2)]
+
+    assert asyncio.run(scenario()) == [1, 2]
+
+
+def test_ado_shares_exceptions():
+    flight = SingleFlight(enabled=True)
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("실패")
+
+    async def scenario():
+        return await asyncio.gather(flight.ado("key", work), flight.ado("key", work), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelling_one_waiter_keeps_shared_call_running():
+    flight = SingleFlight(enabled=True)
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.ado("key", work))
+        second = asyncio.ensure_future(flight.ado("key", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_disabled_runs_every_call():
+    flight = SingleFlight(enabled=False)
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    async def scenario():
+        await asyncio.gather(flight.ado("key", work), flight.ado("key", work))
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def test_do_coalesces_threads():
+    flight = SingleFlight(enabled=True)
+    calls = []
+    results = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", work))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["value"] * 4
+    assert len(calls) == 1
@@ -0,0 +1,137 @@
+import sys
+import threading
+
+import pytest
+
+from ai.agents.rag_agent import RAGTool
+from ai.rag.snapshots import IndexSnapshot, SnapshotStore
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+
+    def upsert(self, ids, documents, **kwargs):
+        self.docs.update(zip(ids, documents))
+
+    def get(self, include=(), limit=None, offset=0):
+        ids = sorted(self.docs)[offset:offset + limit if limit else None]
+        return {"ids": ids}
+
+    def peek(self, limit):
+        return {"documents": [self.docs[chunk_id] for chunk_id in sorted(self.docs)[:limit]]}
+
+    def count(self):
+        return len(self.docs)
+
+
+class FakeStore:
+    def __init__(self):
+        self._collection = FakeCollection()
+
+    def delete(self, ids):
+        for chunk_id in ids:
+            self._collection.docs.pop(chunk_id, None)
+
+
+@pytest.fixture
+def tool(tmp_path):
+    snapshot = IndexSnapshot("s1", str(tmp_path / "s1"), lambda path: FakeStore())
+    tool = RAGTool.__new__(RAGTool)
+    tool._active = tool._target = snapshot
+    tool._state_lock = threading.Lock()
+    tool.corpus_version = 0
+    tool._search = lambda snapshot, query, k: ["hit"]
+    yield tool
+    snapshot.close()
+
+
+def _write(tool, ids):
+    texts = [f"청크 {chunk_id}" for chunk_id in ids]
+    tool._target.get_vector_store()._collection.upsert(ids=ids, documents=texts)
+    tool.bm25.add(ids, texts)
+
+
+def test_validate_prunes_chunks_of_failed_files(tool):
+    snapshot = tool._target
+    _write(tool, ["a:0", "a:1"])
+    snapshot.manifest.update("a.txt", 1.0, "hash-a", ["a:0", "a:1"])
+    # b.txt는 첫 배치만 upsert된 뒤 실패하여 매니페스트에 반영되지 않음
+    _write(tool, ["b:0"])
+
+    tool._validate_snapshot(snapshot)
+
+    assert snapshot.stored_ids() == {"a:0", "a:1"}
+    assert snapshot.bm25.chunk_ids() == {"a:0", "a:1"}
+
+
+def test_validate_rejects_missing_chunks(tool):
+    snapshot = tool._target
+    _write(tool, ["a:0"])
+    snapshot.manifest.update("a.txt", 1.0, "hash-a", ["a:0", "a:1"])
+
+    with pytest.raises(RuntimeError):
+        tool._validate_snapshot(snapshot)
+
+
+def test_stored_ids_pages_through_collection(tool):
+    _write(tool, [f"a:{i}" for i in range(7)])
+    assert len(tool._target.stored_ids(batch_size=3)) == 7
+
+
+def test_snapshot_store_publish_and_collect(tmp_path):
+    store = SnapshotStore(str(tmp_path), keep=1)
+    assert store.current() == ""
+    assert store.path("") == str(tmp_path)
+
+    created = []
+    for _ in range(3):
+        snapshot_id = store.create()
+        IndexSnapshot(snapshot_id, store.path(snapshot_id), lambda path: FakeStore()).close()
+        created.append(snapshot_id)
+    assert created == sorted(created)
+
+    store.publish(created[0])
+    assert store.current() == created[0]
+
+    store.collect(in_use=[created[1]])
+    remaining = sorted((tmp_path / SnapshotStore.snapshots_dir).iterdir())
+    # 현재 스냅샷, 사용 중인 스냅샷, 가장 최근 keep개만 남음
+    assert [path.name for path in remaining] == created
+    store.collect(in_use=[])
+    remaining = sorted((tmp_path / SnapshotStore.snapshots_dir).iterdir())
+    assert [path.name for path in remaining] == [created[0], created[2]]
+
+
+def test_concurrent_commits_do_not_lose_versions(tool):
+    # 스레드 전환을 자주 일으켜 잠금 없이 += 하면 증가분이 사라지도록 함
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+
+    def commit(worker):
+        for i in range(200):
+            chunk_id = f"{worker}:{i}"
+            tool._commit_plan({"source": chunk_id, "mtime": None, "sha256": "hash", "chunk_ids": [chunk_id],
+                               "added_ids": [chunk_id], "stale_ids": []})
+
+    try:
+        threads = [threading.Thread(target=commit, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert tool.corpus_version == 1600
+    assert len(tool._target.chunk_ids()) == 1600
+
+
+def test_remove_source_deletes_chunks_and_bumps_version(tool):
+    _write(tool, ["a:0"])
+    tool._target.manifest.update("a.txt", 1.0, "hash-a", ["a:0"])
+
+    assert tool._remove_source("a.txt") == 1
+    assert tool._remove_source("a.txt") == 0
+    assert tool.corpus_version == 1
+    assert tool._target.stored_ids() == set()
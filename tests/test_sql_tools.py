@@ -0,0 +1,92 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from ai.agents import sql_tools
+from ai.agents.sql_planner import Statement
+from ai.agents.sql_tools import (
+    CachedSQLDatabase, _bound_query, _BoundedRows, iter_query_export, prepare_export_query, run_sql,
+)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("SELECT * FROM users;", "SELECT * FROM users LIMIT 6"),
+    ("with t as (select 1) select * from t", "with t as (select 1) select * from t LIMIT 6"),
+    ("SELECT * FROM users LIMIT 3", "SELECT * FROM users LIMIT 3"),
+    ("UPDATE users SET name = 'a'", "UPDATE users SET name = 'a'"),
+    ("SHOW TABLES", "SHOW TABLES"),
+    ("SELECT * FROM users -- all rows", "SELECT * FROM users LIMIT 6"),
+    ("SELECT * FROM users; # done\n", "SELECT * FROM users LIMIT 6"),
+    ("SELECT * FROM users WHERE name = 'a -- b'", "SELECT * FROM users WHERE name = 'a -- b' LIMIT 6"),
+    ("SELECT * FROM users WHERE note = 'LIMIT 3'", "SELECT * FROM users WHERE note = 'LIMIT 3' LIMIT 6"),
+    ("SELECT * FROM users FOR UPDATE", "SELECT * FROM users LIMIT 6 FOR UPDATE"),
+    ("SELECT * FROM users LOCK IN SHARE MODE;", "SELECT * FROM users LIMIT 6 LOCK IN SHARE MODE"),
+])
+def test_bound_query(query, expected):
+    assert _bound_query(Statement(query), 5) == expected
+
+
+def test_bounded_rows_stop_at_row_and_byte_limits():
+    rows = _BoundedRows(max_rows=2, max_bytes=1000)
+    assert rows.add([(1,), (2,)])
+    assert not rows.add([(3,)])
+    assert rows.rows == [(1,), (2,)] and rows.truncated
+
+    rows = _BoundedRows(max_rows=10, max_bytes=10)
+    assert not rows.add([("a" * 20,)])
+    assert rows.rows == [] and rows.truncated
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setitem(sql_tools.SQL_RESULT_CONFIG, "max_rows", 3)
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, price INTEGER)"))
+        conn.execute(text("INSERT INTO items (price) VALUES " + ", ".join(f"({i * 10})" for i in range(1, 11))))
+    return CachedSQLDatabase(engine)
+
+
+def test_run_sql_truncates_without_summary_by_default(db):
+    result = run_sql(db, "SELECT id, price FROM items ORDER BY id").splitlines()
+    assert result[0] == "[(1, 10), (2, 20), (3, 30)]"
+    assert "[결과 요약] 행/크기 제한으로 처음 3행만 표시" in result
+
+
+def test_run_sql_truncates_with_summary(db, monkeypatch):
+    monkeypatch.setitem(sql_tools.SQL_RESULT_CONFIG, "summarize_truncated", True)
+    result = run_sql(db, "SELECT id, price FROM items ORDER BY id").splitlines()
+    assert result[0] == "[(1, 10), (2, 20), (3, 30)]"
+    assert "[결과 요약] 전체 10행 중 3행만 표시" in result
+    assert "[집계] price: 최소 10, 최대 100, 평균 55.0" in result
+
+
+def test_run_sql_small_result_and_errors(db):
+    assert run_sql(db, "SELECT COUNT(*) FROM items") == "[(10,)]"
+    assert run_sql(db, "SELECT * FROM missing").startswith("Error:")
+
+
+def test_ddl_invalidates_schema_cache(db):
+    assert list(db.get_usable_table_names()) == ["items"]
+    run_sql(db, "CREATE TABLE orders (id INTEGER)")
+    assert sorted(db.get_usable_table_names()) == ["items", "orders"]
+    assert db.schema_version == 1
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("```sql\nSELECT * FROM items;\n```", "SELECT * FROM items"),
+    ("SELECT ';' AS sep FROM items -- 구분자", "SELECT ';' AS sep FROM items"),
+    ("SELECT * FROM items INTO OUTFILE '/tmp/items.csv'", None),
+    ("SELECT * FROM items /*!50000 INTO DUMPFILE '/tmp/x' */", None),
+    ("SELECT 1; DELETE FROM items", None),
+    ("DELETE FROM items", None),
+    ("가격이 높은 상품 보여줘", None),
+])
+def test_prepare_export_query(sql, expected):
+    assert prepare_export_query(sql) == expected
+
+
+def test_iter_query_export_streams_all_rows(db):
+    lines = "".join(iter_query_export(db._engine, "SELECT id, price FROM items ORDER BY id", "csv")).splitlines()
+    assert lines[0] == "id,price"
+    assert len(lines) == 11
@@ -0,0 +1,156 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from ai import registry
+from ai.prompts import RESPONSE_PROMPT
+from ai.rag.collections import CollectionRegistry
+from ai.response_cache import ResponseCache
+from ai.router import IntentRouter
+from ai.singleflight import SingleFlight
+from ai.super_agent import SuperAgent
+from ai.usage import UsageTracker, track_usage
+
+
+class ExactEmbeddings:
+    async def aembed_query(self, text):
+        return [float(len(text)), 1.0]
+
+
+class CountingAgent:
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+
+    async def arun(self, message):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return f"{self.name} 응답 {self.calls}"
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    rag_tool = SimpleNamespace(collection="default", corpus_version=1, retrievals=0)
+
+    async def retrieve(query):
+        rag_tool.retrievals += 1
+        return "컨텍스트"
+
+    rag_tool._arun = retrieve
+    collections = CollectionRegistry(lambda name: rag_tool, idle_seconds=60, max_loaded=4)
+    monkeypatch.setattr(registry, "get_rag_collections", lambda: collections)
+
+    agent = SuperAgent.__new__(SuperAgent)
+    agent.router = IntentRouter()
+    agent.response_cache = ResponseCache(ExactEmbeddings(), ttl_seconds=60, max_entries=10,
+                                         similarity_threshold=1.0)
+    agent._flight = SingleFlight(enabled=True)
+    agent.db_agent = CountingAgent("db")
+    agent.doc_agent = CountingAgent("doc")
+    agent.search_agent = CountingAgent("search")
+    agent.llm_calls = 0
+
+    async def generate(prompt):
+        agent.llm_calls += 1
+        return f"LLM 응답 {agent.llm_calls}"
+
+    agent._generate_response = generate
+    agent.rag = rag_tool
+    return agent
+
+
+def test_db_route_is_not_cached(agent):
+    async def scenario():
+        first = await agent.process_message("사용자 테이블에 홍길동을 저장해줘")
+        second = await agent.process_message("사용자 테이블에 홍길동을 저장해줘")
+        return first, second
+
+    assert asyncio.run(scenario()) == ("db 응답 1", "db 응답 2")
+    assert agent.db_agent.calls == 2
+
+
+def test_rag_route_is_cached(agent):
+    async def scenario():
+        return [await agent.process_message("문서에서 휴가 규정을 찾아줘") for _ in range(2)]
+
+    assert asyncio.run(scenario()) == ["LLM 응답 1", "LLM 응답 1"]
+    assert agent.rag.retrievals == 1
+
+
+def test_only_rag_route_uses_semantic_match(agent):
+    # 길이가 같은 질문은 ExactEmbeddings에서 같은 벡터가 되어 유사도 1.0
+    agent.response_cache.similarity_threshold = 0.5
+
+    async def scenario():
+        llm = [await agent.process_message(m) for m in ("이 문장을 영어로 번역해줘", "이 문장을 일어로 번역해줘")]
+        rag = [await agent.process_message(m) for m in ("문서에서 휴가 규정을 찾아줘", "문서에서 휴직 규정을 찾아줘")]
+        return llm, rag
+
+    assert asyncio.run(scenario()) == (["LLM 응답 1", "LLM 응답 2"], ["LLM 응답 3", "LLM 응답 3"])
+
+
+def test_failed_response_is_not_cached(agent):
+    async def failing(prompt):
+        raise RuntimeError("LLM 오류")
+
+    generate = agent._generate_response
+    agent._generate_response = failing
+    first = asyncio.run(agent.process_message("안녕"))
+    agent._generate_response = generate
+
+    assert "오류" in first
+    assert asyncio.run(agent.process_message("안녕")) == "LLM 응답 1"
+
+
+def test_stream_does_not_cache_db_route(agent):
+    async def collect():
+        return [event async for event in agent.stream_message("db에서 사용자 목록 조회해줘")]
+
+    first, second = asyncio.run(collect()), asyncio.run(collect())
+    assert first[-1] == {"type": "done", "response": "db 응답 1", "cached": False}
+    assert second[-1] == {"type": "done", "response": "db 응답 2", "cached": False}
+
+
+def test_concurrent_db_writes_are_not_coalesced(agent):
+    async def scenario():
+        message = "사용자 테이블에 홍길동을 저장해줘"
+        return await asyncio.gather(agent.process_message(message), agent.process_message(message))
+
+    asyncio.run(scenario())
+    assert agent.db_agent.calls == 2
+
+
+def test_concurrent_reads_are_coalesced(agent):
+    agent.response_cache = None
+
+    async def scenario():
+        message = "문서에서 휴가 규정을 찾아줘"
+        return await asyncio.gather(*(agent.process_message(message) for _ in range(3)))
+
+    assert asyncio.run(scenario()) == ["LLM 응답 1"] * 3
+    assert agent.rag.retrievals == 1
+
+
+def test_cache_hits_and_shared_runs_are_marked_cached(agent):
+    async def scenario():
+        message = "문서에서 휴가 규정을 찾아줘"
+        trackers = [UsageTracker() for _ in range(3)]
+        # 두 요청이 동시에 들어오면 하나는 진행 중인 요청의 결과를 받고, 세 번째는 응답 캐시에서 받음
+        await asyncio.gather(*(
+            asyncio.ensure_future(track_usage(tracker, agent.process_message, message)) for tracker in trackers[:2]
+        ))
+        await track_usage(trackers[2], agent.process_message, message)
+        return [tracker.cached for tracker in trackers]
+
+    assert asyncio.run(scenario()) == [False, True, True]
+
+
+def test_generate_response_passes_prompt_as_variable(agent):
+    # 미리 만든 체인을 재사용하고, 사용자 입력의 중괄호는 템플릿 변수로 해석되지 않아야 함
+    echo = RunnableLambda(lambda value: AIMessage(content=value.to_messages()[-1].content))
+    agent.response_chain = RESPONSE_PROMPT | echo
+
+    assert asyncio.run(SuperAgent._generate_response(agent, "{name} 값을 설명해줘")) == "{name} 값을 설명해줘"
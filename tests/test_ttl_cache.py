@@ -0,0 +1,41 @@
+import time
+
+from ai.ttl_cache import TTLCache
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert len(cache) == 2
+
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(max_entries=10, ttl_seconds=0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_without_ttl_entries_do_not_expire():
+    cache = TTLCache(max_entries=10)
+    cache.set("a", 1)
+    time.sleep(0.01)
+    assert cache.get("a") == 1
+
+
+def test_overwrite_and_clear():
+    cache = TTLCache(max_entries=10)
+    cache.set("a", 1)
+    cache.set("a", 2)
+    assert cache.get("a") == 2
+    cache.clear()
+    assert cache.get("a") is None